@@ -0,0 +1,296 @@
+"""
+Command-line entry point for headless bulk runs.
+
+Usage:
+    python -m agent meetings.jsonl --workers 4 --concurrency 8 --output results.jsonl
+    python -m agent notes_dir/ --workers 8 --output results.jsonl --resume
+    cat meetings.jsonl | python -m agent - --shard 0/3 --output node0.jsonl
+
+The input is a JSON list, a JSONL file/stream ("-" for stdin) where every record
+has "notes", "attendees" and optional "context"/"id", or a directory of such
+files plus plain-text notes (.txt/.md, one meeting per file, attendees taken
+from --attendees or the addresses found in the notes).
+
+Meetings are read lazily and handed out in chunks to a pool of worker
+processes, each running its own MeetingNotesAgent, configured from the
+environment like the app's, with --concurrency threads.
+Results are appended to the output as JSONL as soon as a chunk finishes, so the
+output file doubles as the checkpoint: --resume skips every meeting that
+already has a successful record there. --shard i/n splits the input between
+nodes. Per-worker throughput is printed to stderr at the end. Set
+DEMO_MODE=true (or pass --demo) to exercise the batch path offline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+NOTE_SUFFIXES = (".txt", ".md")
+RECORD_SUFFIXES = (".json", ".jsonl")
+
+# Per-process state of pool workers (set by _init_worker)
+_worker_agent = None
+_worker_concurrency = 1
+
+
+def iter_meetings(path: str, attendees: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yields (meeting_id, record) pairs from a file, directory or "-" (stdin).
+    Ids come from the record's "id" field, otherwise from the file name and line
+    number, so they stay stable between runs and can be used to resume.
+    """
+    if path == "-":
+        yield from _iter_stream(sys.stdin, "stdin")
+    elif os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if not os.path.isfile(file_path):
+                continue
+            if name.endswith(RECORD_SUFFIXES):
+                with open(file_path, encoding="utf-8") as f:
+                    yield from _iter_stream(f, name)
+            elif name.endswith(NOTE_SUFFIXES):
+                yield name, _notes_record(file_path, attendees)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from _iter_stream(f, os.path.basename(path))
+
+
+def load_items(path: str) -> List[Dict]:
+    """Reads all meeting records from a JSON list, a JSONL file or a directory ("-" for stdin)."""
+    return [record for _, record in iter_meetings(path)]
+
+
+def _iter_stream(stream, source: str) -> Iterator[Tuple[str, Dict]]:
+    first = stream.readline()
+    while first and not first.strip():
+        first = stream.readline()
+    if first.lstrip().startswith("["):
+        # A JSON list has to be parsed as a whole
+        records = json.loads(first + stream.read())
+        for number, record in enumerate(records, start=1):
+            yield _meeting_id(record, source, number), record
+        return
+    lines = [first] if first else []
+    for number, line in enumerate(_chain(lines, stream), start=1):
+        if line.strip():
+            record = json.loads(line)
+            yield _meeting_id(record, source, number), record
+
+
+def _chain(first: List[str], rest: Iterable[str]) -> Iterator[str]:
+    yield from first
+    yield from rest
+
+
+def _meeting_id(record: Dict, source: str, number: int) -> str:
+    return str(record.get("id") or f"{source}:{number}")
+
+
+def _notes_record(file_path: str, attendees: Optional[List[str]]) -> Dict:
+    from agent.emails import extract_emails
+
+    with open(file_path, encoding="utf-8") as f:
+        notes = f.read()
+    return {"notes": notes, "attendees": attendees or extract_emails(notes)}
+
+
+def in_shard(meeting_id: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """Stable assignment of meetings to nodes: crc32(id) mod n."""
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(meeting_id.encode("utf-8")) % count == index
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids with a successful record in an existing output file (the checkpoint)."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Line cut short by an interrupted run
+            if record.get("success") and record.get("id") is not None:
+                done.add(str(record["id"]))
+    return done
+
+
+def _chunks(meetings: Iterable[Tuple[str, Dict]], size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    chunk: List[Tuple[str, Dict]] = []
+    for meeting in meetings:
+        chunk.append(meeting)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(demo: bool, concurrency: int) -> None:
+    """Builds the agent once per worker process."""
+    global _worker_agent, _worker_concurrency
+    load_dotenv()
+    if demo:
+        os.environ["DEMO_MODE"] = "true"
+
+    from agent.meeting_agent import MeetingNotesAgent, agent_components_from_env
+
+    # The same cache, calendar, revisions, digests, budget, ... as the app, so a batch run behaves like an
+    # interactive one. A local-only fallback would be checkpointed as a success and never retried, so a
+    # degraded upstream fails the meeting and --resume picks it up later
+    components = agent_components_from_env()
+    components["resilience"].fallback = False
+    # Its own agent rather than the process-wide shared one: with --workers 1 the chunks run in
+    # this process, and a shared agent built earlier would ignore these settings (or keep them)
+    _worker_agent = MeetingNotesAgent(**components)
+    _worker_concurrency = concurrency
+
+
+def _process_chunk(chunk: List[Tuple[str, Dict]]) -> Dict:
+    """Runs one chunk in a worker and returns its serialized results and timing."""
+    from agent.utils import serialize_result
+
+    started = time.perf_counter()
+    batch = _worker_agent.run_batch([record for _, record in chunk], max_concurrency=_worker_concurrency)
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    records = []
+    for (meeting_id, _), result in zip(chunk, batch["results"]):
+        record = serialize_result(result)
+        record["id"] = meeting_id
+        record["worker"] = worker
+        records.append(record)
+    return {"worker": worker, "busy": time.perf_counter() - started, "records": records}
+
+
+def _run_chunks(chunks: Iterator[List[Tuple[str, Dict]]], workers: int, demo: bool,
+                concurrency: int) -> Iterator[Dict]:
+    """Yields finished chunks as they complete, keeping at most 2 chunks per worker in flight."""
+    if workers <= 1:
+        _init_worker(demo, concurrency)
+        for chunk in chunks:
+            yield _process_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(demo, concurrency)) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_process_chunk, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def worker_report(chunks: List[Dict]) -> Dict[str, Dict]:
+    """Meetings, failures, busy seconds and meetings/s per worker, from finished chunk counts."""
+    report: Dict[str, Dict] = {}
+    for chunk in chunks:
+        stats = report.setdefault(chunk["worker"], {"meetings": 0, "failed": 0, "busy": 0.0})
+        stats["meetings"] += chunk["meetings"]
+        stats["failed"] += chunk["failed"]
+        stats["busy"] += chunk["busy"]
+    for stats in report.values():
+        stats["throughput_per_sec"] = stats["meetings"] / stats["busy"] if stats["busy"] > 0 else 0.0
+    return report
+
+
+def _parse_shard(value: str) -> Tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected INDEX/COUNT, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, COUNT)")
+    return index, count
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m agent", description="Batch-process meeting notes.")
+    parser.add_argument("input", help="JSON/JSONL file, directory of meetings, or '-' for a JSONL stream on stdin")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, in-process)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Meetings processed in parallel per worker")
+    parser.add_argument("--chunk-size", type=int, help="Meetings handed to a worker at a time (default: --concurrency)")
+    parser.add_argument("--output", help="Append per-meeting results as JSONL to this file (default: stdout)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip meetings that already have a successful record in --output")
+    parser.add_argument("--shard", type=_parse_shard, help="Only process this node's share of the input, e.g. 0/4")
+    parser.add_argument("--attendees", default="", help="Comma-separated attendees for plain-text notes in a directory")
+    parser.add_argument("--demo", action="store_true", help="Force demo mode (no Google/Gemini calls)")
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output (the output file is the checkpoint)")
+
+    load_dotenv()
+    if args.demo:
+        os.environ["DEMO_MODE"] = "true"
+
+    attendees = [email.strip() for email in args.attendees.split(",") if email.strip()]
+    skip = completed_ids(args.output) if args.resume else set()
+    meetings = (
+        (meeting_id, record) for meeting_id, record in iter_meetings(args.input, attendees)
+        if meeting_id not in skip and in_shard(meeting_id, args.shard)
+    )
+    chunks = _chunks(meetings, max(1, args.chunk_size or args.concurrency))
+
+    out = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    if args.resume and out.tell() > 0:
+        with open(args.output, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                out.write("\n")  # Finish a line cut short by an interrupted run
+
+    started = time.perf_counter()
+    finished: List[Dict] = []
+    try:
+        for chunk in _run_chunks(chunks, args.workers, args.demo, args.concurrency):
+            for record in chunk["records"]:
+                out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            # Keep only the counts, not the results, of finished chunks
+            finished.append({
+                "worker": chunk["worker"],
+                "busy": chunk["busy"],
+                "meetings": len(chunk["records"]),
+                "failed": sum(1 for record in chunk["records"] if not record.get("success")),
+            })
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    wall_time = time.perf_counter() - started
+    return _report(finished, wall_time, len(skip))
+
+
+def _report(chunks: List[Dict], wall_time: float, skipped: int) -> int:
+    report = worker_report(chunks)
+    total = sum(stats["meetings"] for stats in report.values())
+    failed = sum(stats["failed"] for stats in report.values())
+    print(
+        f"Processed {total} meetings ({total - failed} ok, {failed} failed, {skipped} already done) "
+        f"in {wall_time:.2f}s - {total / wall_time if wall_time > 0 else 0.0:.2f} meetings/s",
+        file=sys.stderr,
+    )
+    for worker, stats in sorted(report.items()):
+        print(
+            f"  {worker}: {stats['meetings']} meetings ({stats['failed']} failed), "
+            f"busy {stats['busy']:.2f}s - {stats['throughput_per_sec']:.2f} meetings/s",
+            file=sys.stderr,
+        )
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
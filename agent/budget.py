@@ -0,0 +1,169 @@
+"""
+Prompt token budgeting and token/cost accounting.
+
+Token counts are estimated locally (about 4 characters per token for English
+text; no tokenizer download or API call), which is close enough to size prompts
+and track spend. With a budget configured, the prompt is trimmed in order of
+increasing information loss until it fits:
+
+1. whitespace runs in the notes are collapsed,
+2. the notes are replaced by the locally pre-extracted action items/decisions,
+3. the notes are truncated.
+
+Huge attendee lists can additionally be capped to `max_attendees` addresses in
+the prompt. A budget smaller than the prompt template itself is a configuration
+error (PromptBudgetExceeded), not something trimming the notes can fix.
+
+Every run records token estimates of the task prompt sent to Portia and of its
+final output, and their cost. That is what the agent controls and trims; the
+planner and each tool step make LLM calls of their own (the task plus tool
+descriptions and earlier step outputs), which are not included, so the figures
+are a lower bound on real spend, for comparing runs and settings.
+"""
+import math
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[... notes truncated to fit the prompt budget ...]"
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when the fixed part of the prompt alone does not fit the token budget."""
+
+
+_SPACES = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Approximate token count of `text`."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapses runs of spaces/tabs and blank lines, keeping the line structure the extractor relies on."""
+    lines = [_SPACES.sub(" ", line).strip() for line in text.strip().splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
+
+
+def format_attendees(emails: List[str], max_attendees: Optional[int] = None) -> str:
+    """Comma-separated attendee list, capped at `max_attendees` addresses."""
+    if max_attendees is None or len(emails) <= max_attendees:
+        return ", ".join(emails)
+    hidden = len(emails) - max_attendees
+    return ", ".join(emails[:max_attendees]) + f" (and {hidden} more attendees not listed)"
+
+
+class TokenBudget:
+    """
+    Prompt budget plus a thread-safe meter of the tokens and cost of finished runs.
+    With no `max_prompt_tokens` prompts are left as they are and only measured.
+    Costs are per 1,000 tokens, in whatever currency the prices are given in.
+    """
+
+    def __init__(self, max_prompt_tokens: Optional[int] = None, max_attendees: Optional[int] = None,
+                 prompt_cost_per_1k: float = 0.0, response_cost_per_1k: float = 0.0):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_attendees = max_attendees
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.response_cost_per_1k = response_cost_per_1k
+        self._lock = threading.Lock()
+        self._counters = {"runs": 0, "trimmed_runs": 0, "prompt_tokens": 0, "response_tokens": 0,
+                          "tokens_saved": 0, "cost": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "TokenBudget":
+        """
+        PROMPT_TOKEN_BUDGET and PROMPT_MAX_ATTENDEES (unset: no limit), PROMPT_COST_PER_1K_TOKENS
+        and RESPONSE_COST_PER_1K_TOKENS (default 0).
+        """
+        budget = os.getenv("PROMPT_TOKEN_BUDGET")
+        max_attendees = os.getenv("PROMPT_MAX_ATTENDEES")
+        return cls(int(budget) if budget else None, int(max_attendees) if max_attendees else None,
+                   float(os.getenv("PROMPT_COST_PER_1K_TOKENS", "0")),
+                   float(os.getenv("RESPONSE_COST_PER_1K_TOKENS", "0")))
+
+    def fit(self, notes_block: str, emails: List[str], overhead_tokens: int,
+            condense: Optional[Callable[[], Optional[str]]] = None) -> Dict:
+        """
+        Trims the notes block and attendee list so that together with the fixed
+        `overhead_tokens` of the prompt template they fit the budget. `condense`
+        returns the pre-extracted notes (or None when nothing was found).
+        Returns {"notes_block", "attendees_text", "condensed", "steps", "tokens_saved"}.
+        Raises PromptBudgetExceeded when not even the truncation marker fits next to
+        the overhead and attendees.
+        """
+        attendees_text = format_attendees(emails, self.max_attendees)
+        original = estimate_tokens(notes_block) + estimate_tokens(", ".join(emails))
+        steps = ["attendees"] if len(attendees_text) < len(", ".join(emails)) else []
+        condensed = False
+
+        if self.max_prompt_tokens is not None:
+            available = self.max_prompt_tokens - overhead_tokens - estimate_tokens(attendees_text)
+            if available < estimate_tokens(TRUNCATION_MARKER):
+                raise PromptBudgetExceeded(
+                    f"PROMPT_TOKEN_BUDGET of {self.max_prompt_tokens} tokens leaves no room for the notes: the "
+                    f"instructions and attendees alone take {self.max_prompt_tokens - available} tokens")
+            collapsed = collapse_whitespace(notes_block)
+            if collapsed != notes_block:
+                notes_block = collapsed
+                steps.append("whitespace")
+            if estimate_tokens(notes_block) > available and condense is not None:
+                condensed_block = condense()
+                if condensed_block and len(condensed_block) < len(notes_block):
+                    notes_block = condensed_block
+                    condensed = True
+                    steps.append("condensed")
+            if estimate_tokens(notes_block) > available:
+                keep = max(0, available * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+                notes_block = notes_block[:keep].rstrip() + TRUNCATION_MARKER
+                steps.append("truncated")
+
+        saved = original - estimate_tokens(notes_block) - estimate_tokens(attendees_text)
+        return {"notes_block": notes_block, "attendees_text": attendees_text, "condensed": condensed,
+                "steps": steps, "tokens_saved": max(0, saved)}
+
+    def cost(self, prompt_tokens: int, response_tokens: int) -> float:
+        return (prompt_tokens * self.prompt_cost_per_1k + response_tokens * self.response_cost_per_1k) / 1000
+
+    def measure(self, prompt: str, response: str, parts: Optional[Dict[str, str]] = None,
+                trimmed: Optional[List[str]] = None, tokens_saved: int = 0) -> Dict:
+        """
+        Token usage of one run's task prompt (split into the given `parts`, the rest
+        being instructions) and final output, and its cost. Adds it to the meter.
+        Planner and tool-step LLM calls are not seen here (see the module docstring).
+        """
+        prompt_tokens = estimate_tokens(prompt)
+        response_tokens = estimate_tokens(response)
+        stages = {name: estimate_tokens(text) for name, text in (parts or {}).items()}
+        stages["instructions"] = max(0, prompt_tokens - sum(stages.values()))
+        stages["response"] = response_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "total_tokens": prompt_tokens + response_tokens,
+            "cost": self.cost(prompt_tokens, response_tokens),
+            "stages": stages,
+            "trimmed": list(trimmed or []),
+            "tokens_saved": tokens_saved,
+        }
+        with self._lock:
+            self._counters["runs"] += 1
+            self._counters["trimmed_runs"] += 1 if usage["trimmed"] else 0
+            self._counters["prompt_tokens"] += prompt_tokens
+            self._counters["response_tokens"] += response_tokens
+            self._counters["tokens_saved"] += tokens_saved
+            self._counters["cost"] += usage["cost"]
+        return usage
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        runs = stats["runs"]
+        stats["avg_prompt_tokens"] = stats["prompt_tokens"] / runs if runs else 0.0
+        stats["avg_cost"] = stats["cost"] / runs if runs else 0.0
+        return stats
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def normalize_notes(raw_notes: str) -> str:
+    """Collapses whitespace so cosmetic edits (indentation, blank lines) hit the same cache entry."""
+    lines = (" ".join(line.split()) for line in raw_notes.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_cache_key(raw_notes: str, valid_emails: List[str], context: str, current_date: str, **extra) -> str:
+    """
+    Content-addressed key for one agent run: a SHA-256 over the normalized notes,
+    the sorted attendee list, the context instructions and the resolved date.
+    Extra keyword arguments (e.g. demo mode) are folded into the key as well.
+    """
+    payload = {
+        "notes": normalize_notes(raw_notes),
+        "attendees": sorted(email.strip().lower() for email in valid_emails),
+        "context": context.strip(),
+        "date": current_date,
+        "extra": extra,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for agent summaries: an in-memory LRU in front of an optional
+    SQLite file, both with TTL eviction. Only the plan id and the final summary are
+    stored, so a cache hit never replays calendar or email tool calls.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 24 * 3600, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the cached entry for `key`, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry["created_at"] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memory_hits"] += 1
+                    return entry
+                del self._memory[key]
+                self._counters["evictions"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM result_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if now - row[1] <= self.ttl_seconds:
+                        entry = json.loads(row[0])
+                        entry["created_at"] = row[1]
+                        self._remember(key, entry)
+                        self._counters["hits"] += 1
+                        self._counters["disk_hits"] += 1
+                        return entry
+                    self._db.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._counters["evictions"] += 1
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, plan_id: Optional[str], final_output: str, **metadata) -> None:
+        """Stores the summary of a successful run."""
+        entry = {"plan_id": plan_id, "final_output": final_output, "created_at": time.time(), **metadata}
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                value = {k: v for k, v in entry.items() if k != "created_at"}
+                self._db.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), entry["created_at"]),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM result_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters plus current size, for the UI and logs."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, entry: Dict) -> None:
+        # Caller holds the lock
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
@@ -0,0 +1,194 @@
+"""
+Local, timezone-aware resolution of deadline phrases.
+
+    resolver = resolver_for(today_in("Europe/Berlin"), "Europe/Berlin", "en_GB")
+    resolver.resolve("EOD Friday")  # {"phrase": ..., "date": "2026-10-23", "weekday": "Friday", "due": ...}
+
+Relative phrases ("today", "EOD Friday", "next Tuesday", "end of next week",
+"ASAP") are computed from the reference date; explicit dates ("March 15th",
+"15/3", "2026-03-15") are parsed with python-dateutil (imported on first use), day-first or month-first
+depending on the locale. Every resolver memoizes its phrase -> date table and
+resolvers are cached per (reference date, timezone, locale), so a phrase is
+only worked out once per day. The agent puts the resolved dates in the prompt
+instead of asking the model to do the date arithmetic.
+"""
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from agent.extraction import DEADLINE_PATTERN
+
+# Locales that write numeric dates month first (3/15); everyone else is day first (15/3)
+MONTH_FIRST_LOCALES = {"en_US", "en_PH", "en_CA", "es_US"}
+# Explicit dates without a year that are further in the past than this are taken to mean next year
+OVERDUE_DAYS = 90
+
+_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+_WEEKDAY_NAMES = (r"monday|mon|tuesday|tues|tue|wednesday|wed|thursday|thurs|thur|thu|friday|fri"
+                  r"|saturday|sat|sunday|sun")
+_SAME_DAY = {"today", "tonight", "asap", "as soon as possible", "eod", "cob", "end of day", "end of the day",
+             "end of this day"}
+_WEEKDAY_PHRASE = re.compile(
+    r"^(?:(?:eod|cob|end of (?:the )?day)\s+)?(?:(this|next)\s+)?"
+    r"(" + _WEEKDAY_NAMES + r")$"
+)
+_THIS_WEEK = {"eow", "end of week", "end of the week", "end of this week", "this week"}
+_NEXT_WEEK = {"end of next week", "next week"}
+_THIS_MONTH = {"end of month", "end of the month", "end of this month", "this month"}
+_NEXT_MONTH = {"end of next month", "next month"}
+_HAS_YEAR = re.compile(r"\b\d{4}\b|^\d{1,2}[/-]\d{1,2}[/-]\d{2}$")
+
+
+class DeadlineResolver:
+    """
+    Resolves deadline phrases relative to `reference` (a date in `timezone`).
+    `timezone` is an IANA name ("America/New_York"); None means the machine's local
+    time, with naive due times. Results are memoized per normalized phrase.
+    """
+
+    def __init__(self, reference: date, timezone: Optional[str] = None, locale: str = "en_US",
+                 end_of_day: time = time(17, 0)):
+        self.reference = reference
+        self.timezone = timezone
+        self.locale = locale
+        self.dayfirst = locale not in MONTH_FIRST_LOCALES
+        self.end_of_day = end_of_day
+        self._tz = _load_timezone(timezone) if timezone else None
+        self._default = datetime(reference.year, reference.month, reference.day)
+        # Plain dict: concurrent writers at worst resolve the same phrase twice
+        self._table: Dict[str, Optional[Dict]] = {}
+
+    def resolve(self, phrase: str) -> Optional[Dict]:
+        """
+        {"phrase", "date" (YYYY-MM-DD), "weekday", "due" (ISO datetime at end of day)}
+        for a deadline phrase, or None when it cannot be resolved. Treat results as read-only.
+        """
+        key = " ".join(phrase.lower().split()).rstrip(".")
+        try:
+            return self._table[key]
+        except KeyError:
+            pass
+        resolved = self._resolve(key)
+        result = None
+        if resolved is not None:
+            due = datetime.combine(resolved, self.end_of_day)
+            result = {
+                "phrase": phrase,
+                "date": resolved.isoformat(),
+                "weekday": calendar.day_name[resolved.weekday()],
+                "due": (self._tz.localize(due) if self._tz else due).isoformat(),
+            }
+        self._table[key] = result
+        return result
+
+    def table_size(self) -> int:
+        return len(self._table)
+
+    def _resolve(self, key: str) -> Optional[date]:
+        ref = self.reference
+        if key in _SAME_DAY:
+            return ref
+        if key == "tomorrow":
+            return ref + timedelta(days=1)
+        next_monday = ref + timedelta(days=7 - ref.weekday())
+        match = _WEEKDAY_PHRASE.match(key)
+        if match:
+            weekday = _WEEKDAYS[match.group(2)[:3]]
+            if match.group(1) == "next":
+                return next_monday + timedelta(days=weekday)
+            # "Friday" / "this Friday": the coming one, or today when it is Friday
+            return ref + timedelta(days=(weekday - ref.weekday()) % 7)
+        if key in _THIS_WEEK:
+            return ref + timedelta(days=(4 - ref.weekday()) % 7)
+        if key in _NEXT_WEEK:
+            return next_monday + timedelta(days=4)
+        if key in _THIS_MONTH:
+            return _month_end(ref)
+        if key in _NEXT_MONTH:
+            return _month_end(_month_end(ref) + timedelta(days=1))
+        return self._parse_explicit(key)
+
+    def _parse_explicit(self, key: str) -> Optional[date]:
+        from dateutil import parser as date_parser  # Lazy: only explicit dates need it, once per phrase
+
+        parsed = None
+        for dayfirst in (self.dayfirst, not self.dayfirst):
+            try:
+                parsed = date_parser.parse(key.removeprefix("the "), default=self._default, dayfirst=dayfirst).date()
+                break
+            except (ValueError, OverflowError):
+                continue  # e.g. "15/3" read month first; try the other order
+        if parsed is None:
+            return None
+        if not _HAS_YEAR.search(key) and (self.reference - parsed).days > OVERDUE_DAYS:
+            try:
+                parsed = parsed.replace(year=parsed.year + 1)
+            except ValueError:
+                parsed = parsed.replace(year=parsed.year + 1, day=28)  # February 29th
+        return parsed
+
+
+@lru_cache(maxsize=64)
+def resolver_for(reference: date, timezone: Optional[str] = None, locale: str = "en_US") -> DeadlineResolver:
+    """The shared, memoized resolver for one (reference date, timezone, locale)."""
+    return DeadlineResolver(reference, timezone, locale)
+
+
+def today_in(timezone: Optional[str] = None) -> date:
+    """Today's date in `timezone` (the machine's local date when None)."""
+    if timezone is None:
+        return date.today()
+    return datetime.now(_load_timezone(timezone)).date()
+
+
+def deadline_phrases(text: str) -> List[str]:
+    """Distinct deadline phrases in free text ("by Friday", "(due: March 15th)"), in order."""
+    phrases = {}
+    for match in DEADLINE_PATTERN.finditer(text):
+        phrase = " ".join(next(group for group in match.groups() if group).split())
+        phrases.setdefault(phrase.lower(), phrase)
+    return list(phrases.values())
+
+
+def resolve_phrases(phrases: List[str], resolver: DeadlineResolver) -> List[Dict]:
+    """Resolutions of the phrases that could be resolved, one per distinct phrase, in order."""
+    resolved: List[Dict] = []
+    seen = set()
+    for phrase in phrases:
+        resolution = resolver.resolve(phrase)
+        if resolution and phrase.lower() not in seen:
+            seen.add(phrase.lower())
+            resolved.append(dict(resolution, phrase=phrase))
+    return resolved
+
+
+def resolve_deadlines(extract: Dict, resolver: DeadlineResolver) -> List[Dict]:
+    """
+    Adds "due_date" (YYYY-MM-DD or None) to every action item of an extraction
+    result and returns the distinct resolved deadlines in order of appearance.
+    """
+    for item in extract.get("action_items", []):
+        resolution = resolver.resolve(item["deadline"]) if item.get("deadline") else None
+        item["due_date"] = resolution["date"] if resolution else None
+    return resolve_phrases([item["deadline"] for item in extract.get("action_items", []) if item.get("deadline")],
+                           resolver)
+
+
+def format_resolved_deadlines(resolved: List[Dict]) -> str:
+    """Prompt block mapping each deadline phrase in the notes to its date."""
+    lines = ["RESOLVED DEADLINES (use these dates, do not recompute them):"]
+    lines.extend(f"- {r['phrase']}: {r['date']} ({r['weekday']})" for r in resolved)
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def _load_timezone(name: str):
+    import pytz  # Lazy: only needed once a timezone is configured
+
+    return pytz.timezone(name)
+
+
+def _month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
@@ -0,0 +1,260 @@
+"""
+Per-recipient email digests across meetings.
+
+Without coalescing every processed meeting drafts its own summary email to
+every attendee, so someone in eight meetings a day gets eight emails and each
+one costs a Gmail tool call planned by the LLM. With a DigestCoalescer the agent
+only writes the meeting summary; the summary and action items are queued for
+each attendee, and once a recipient's oldest queued meeting is older than the
+window, all of their meetings go out as one digest. The digests that are due
+are rendered locally and handed to a mail backend in one batch, after each run
+and on a timer (start_flush_timer) so quiet recipients are not kept waiting.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from agent.utils import run_tool_batch
+
+DEFAULT_WINDOW_SECONDS = 3600.0
+DEFAULT_FLUSH_INTERVAL_SECONDS = 60.0
+
+
+class MailBackend(ABC):
+    """Interface for mail backends. Every call must handle a whole batch of drafts."""
+
+    @abstractmethod
+    def send_digests(self, digests: List[Dict]) -> List[str]:
+        """Drafts one email per digest ({"to", "subject", "body"}) and returns their ids, in order."""
+
+
+class LocalMailbox(MailBackend):
+    """
+    Offline stand-in mailbox. Drafts live in memory and, when `path` is given,
+    are persisted to a JSON file so they can be inspected afterwards.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.drafts: Dict[str, Dict] = {}
+        self.batch_calls = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.drafts = json.load(f)
+
+    def send_digests(self, digests: List[Dict]) -> List[str]:
+        with self._lock:
+            self.batch_calls += 1
+            ids = []
+            for digest in digests:
+                draft_id = f"draft-{uuid.uuid4().hex[:12]}"
+                self.drafts[draft_id] = {**digest, "created_at": datetime.now().isoformat()}
+                ids.append(draft_id)
+            if self.path:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump(self.drafts, f, indent=2, default=str)
+        return ids
+
+
+class PortiaMailBackend(MailBackend):
+    """
+    Gmail through Portia. All due digests go out as one plan run restricted to the
+    draft tool, with the text already written, so nothing is left for the model
+    to summarize. The run goes through `resilience` (a ResilientCaller) when
+    given; a run that does not complete raises PlanRunFailed, so the digests stay
+    queued. Returns the draft ids reported by the tool (None where it gave none).
+    """
+
+    TOOL_ID = "portia:google:gmail:draft_email"
+
+    def __init__(self, portia, resilience=None):
+        self.portia = portia
+        self.resilience = resilience
+
+    def send_digests(self, digests: List[Dict]) -> List[str]:
+        blocks = [
+            f"{i + 1}. To: {digest['to']}\nSubject: {digest['subject']}\nBody:\n{digest['body']}"
+            for i, digest in enumerate(digests)
+        ]
+        query = (
+            "Draft exactly one email for each of the following items, in order, using the recipient, "
+            "subject and body exactly as given, and nothing else:\n\n" + "\n\n".join(blocks)
+        )
+        return run_tool_batch(self.portia, query, [self.TOOL_ID], len(digests), self.resilience)
+
+
+class DigestCoalescer:
+    """
+    SQLite queue of meeting summaries per recipient, flushed as one digest per
+    recipient once their oldest entry has waited `window_seconds`. Use ":memory:"
+    for a throwaway queue. `backend` is the default mail backend for flush().
+    """
+
+    def __init__(self, backend: Optional[MailBackend] = None, window_seconds: float = DEFAULT_WINDOW_SECONDS,
+                 db_path: str = ":memory:"):
+        self.backend = backend
+        self.window_seconds = window_seconds
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # One flush at a time, so concurrent runs never send the same meetings twice
+        self._flush_lock = threading.Lock()
+        self._counters = {"queued": 0, "digests_sent": 0, "meetings_sent": 0, "backend_calls": 0}
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS digest_queue ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, recipient TEXT NOT NULL, meeting TEXT NOT NULL, "
+            "summary TEXT NOT NULL, items TEXT NOT NULL, queued_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS digest_queue_recipient ON digest_queue (recipient, queued_at)")
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls, backend: Optional[MailBackend] = None) -> Optional["DigestCoalescer"]:
+        """
+        EMAIL_DIGEST_WINDOW_MINUTES enables coalescing (unset: every meeting emails on its own);
+        EMAIL_DIGEST_DB is where the queue is kept (default digests.db, so a restart loses nothing).
+        """
+        window = os.getenv("EMAIL_DIGEST_WINDOW_MINUTES")
+        if not window:
+            return None
+        return cls(backend, float(window) * 60, os.getenv("EMAIL_DIGEST_DB", "digests.db"))
+
+    def add(self, recipients: List[str], meeting: str, summary: str, action_items: List[Dict]) -> int:
+        """Queues a meeting's summary and action items for every recipient; returns the number queued."""
+        now = time.time()
+        items = json.dumps([{"task": item["task"], "owner": item.get("owner"),
+                             "due": item.get("due_date") or item.get("deadline")} for item in action_items])
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO digest_queue (recipient, meeting, summary, items, queued_at) VALUES (?, ?, ?, ?, ?)",
+                [(recipient, meeting, summary, items, now) for recipient in recipients],
+            )
+            self._db.commit()
+            self._counters["queued"] += len(recipients)
+        return len(recipients)
+
+    def due(self, force: bool = False) -> List[str]:
+        """Recipients whose oldest queued meeting has waited the whole window (everyone with `force`)."""
+        cutoff = float("inf") if force else time.time() - self.window_seconds
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT recipient FROM digest_queue GROUP BY recipient HAVING MIN(queued_at) <= ? ORDER BY recipient",
+                (cutoff,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def flush(self, backend: Optional[MailBackend] = None, force: bool = False) -> Dict:
+        """
+        Sends one digest per due recipient in a single backend call and removes
+        their queued meetings. Returns {"sent": [{"to", "meetings", "draft_id"}], "backend_calls"}.
+        """
+        backend = backend or self.backend
+        if backend is None:
+            raise ValueError("DigestCoalescer.flush() needs a mail backend")
+        with self._flush_lock:
+            return self._flush(backend, force)
+
+    def _flush(self, backend: MailBackend, force: bool) -> Dict:
+        recipients = self.due(force)
+        if not recipients:
+            return {"sent": [], "backend_calls": 0}
+
+        with self._lock:
+            placeholders = ",".join("?" * len(recipients))
+            rows = self._db.execute(
+                f"SELECT id, recipient, meeting, summary, items, queued_at FROM digest_queue "
+                f"WHERE recipient IN ({placeholders}) ORDER BY recipient, queued_at, id",
+                recipients,
+            ).fetchall()
+        entries: Dict[str, List[Dict]] = {}
+        for row_id, recipient, meeting, summary, items, queued_at in rows:
+            entries.setdefault(recipient, []).append({"id": row_id, "meeting": meeting, "summary": summary,
+                                                      "items": json.loads(items), "queued_at": queued_at})
+        digests = [render_digest(recipient, meetings) for recipient, meetings in entries.items()]
+
+        draft_ids = backend.send_digests(digests)
+        # Only delete what was sent; meetings queued meanwhile wait for the next flush
+        sent_ids = [entry["id"] for meetings in entries.values() for entry in meetings]
+        with self._lock:
+            self._db.executemany("DELETE FROM digest_queue WHERE id = ?", [(row_id,) for row_id in sent_ids])
+            self._db.commit()
+            self._counters["digests_sent"] += len(digests)
+            self._counters["meetings_sent"] += len(sent_ids)
+            self._counters["backend_calls"] += 1
+        return {
+            "sent": [{"to": recipient, "meetings": len(meetings), "draft_id": draft_id}
+                     for (recipient, meetings), draft_id in zip(entries.items(), draft_ids)],
+            "backend_calls": 1,
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"], stats["pending_recipients"] = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT recipient) FROM digest_queue").fetchone()
+        # Each coalesced digest replaces one email per meeting it covers
+        stats["emails_saved"] = stats["meetings_sent"] - stats["digests_sent"]
+        return stats
+
+
+def start_flush_timer(flush: Callable[[], Dict], interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                      ) -> threading.Event:
+    """
+    Calls `flush` (e.g. agent.flush_digests) right away and then every
+    `interval_seconds` on a daemon thread, so digests go out once due even when
+    no new meeting comes in. Failures are logged and retried on the next tick.
+    Set the returned event to stop the timer.
+    """
+    stop = threading.Event()
+
+    def tick() -> None:
+        while True:
+            try:
+                sent = flush()["sent"]
+                if sent:
+                    print(f"DEBUG: digest timer sent {len(sent)} digest(s)")
+            except Exception as e:
+                print(f"Warning: sending digests failed, they stay queued: {e}")
+            if stop.wait(interval_seconds):
+                return
+
+    threading.Thread(target=tick, name="digest-flush", daemon=True).start()
+    return stop
+
+
+def render_digest(recipient: str, meetings: List[Dict]) -> Dict:
+    """One email for `recipient` covering the queued `meetings`, their own action items first."""
+    count = len(meetings)
+    subject = meetings[0]["meeting"] if count == 1 else f"Your meeting digest: {count} meetings"
+    mine, others = [], []
+    for meeting in meetings:
+        for item in meeting["items"]:
+            target = mine if owned_by(item.get("owner"), recipient) else others
+            target.append(f"- {item['task']} ({meeting['meeting']}"
+                          + (f", due {item['due']}" if item.get("due") else "") + ")")
+
+    lines = ["Hi,", "", f"Here is a summary of {'your meeting' if count == 1 else f'your last {count} meetings'}."]
+    if mine:
+        lines += ["", "YOUR ACTION ITEMS:"] + mine
+    for meeting in meetings:
+        queued = datetime.fromtimestamp(meeting["queued_at"]).strftime("%Y-%m-%d %H:%M")
+        lines += ["", f"== {meeting['meeting']} ({queued}) ==", meeting["summary"].strip()]
+    if others:
+        lines += ["", "OTHER ACTION ITEMS:"] + others
+    return {"to": recipient, "subject": subject, "body": "\n".join(lines)}
+
+
+def owned_by(owner: Optional[str], recipient: str) -> bool:
+    """Best-effort match of an owner name ("Sarah", "John Doe") to an address (john.doe@company.com)."""
+    if not owner:
+        return False
+    first = owner.split()[0].lower()
+    local = recipient.split("@", 1)[0].lower()
+    return local.startswith(first) or first in re.split(r"[._+-]", local)
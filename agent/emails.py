@@ -0,0 +1,109 @@
+"""
+Shared attendee email parsing, validation and normalization.
+
+One precompiled pattern is used everywhere (agent validation, sample loading,
+local extraction). normalize_attendees() lowercases, de-duplicates, expands
+group aliases and validates a whole list in a single pass, which keeps bulk
+imports of large distribution lists linear.
+"""
+import csv
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Character class fix: the old pattern used [A-Z|a-z], which also accepted "|" in the TLD
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+_ADDRESS = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}')
+_SEPARATORS = re.compile(r'[,;\s]+')
+# "Sarah Lee <sarah@company.com>" -> "sarah@company.com"
+_ANGLE_ADDRESS = re.compile(r'<([^<>]+)>\s*$')
+
+
+def extract_emails(text: str) -> List[str]:
+    """All distinct email addresses in free text, lowercased, in order of appearance."""
+    seen = set()
+    found = []
+    for email in EMAIL_PATTERN.findall(text):
+        email = email.lower()
+        if email not in seen:
+            seen.add(email)
+            found.append(email)
+    return found
+
+
+def split_attendees(raw: str) -> List[str]:
+    """Splits a comma/semicolon/whitespace separated attendee string into entries."""
+    if "<" in raw:
+        # Keep "Display Name <address>" entries intact
+        return [part.strip() for part in re.split(r'[,;\n]+', raw) if part.strip()]
+    return [part for part in _SEPARATORS.split(raw) if part]
+
+
+def is_valid_email(address: str) -> bool:
+    return _ADDRESS.fullmatch(address) is not None
+
+
+def normalize_attendees(addresses: Iterable[str],
+                        aliases: Optional[Dict[str, List[str]]] = None) -> Tuple[List[str], List[str]]:
+    """
+    Single pass over `addresses`: trims, unwraps "Name <address>", lowercases,
+    expands group aliases (recursively, cycle-safe), validates and de-duplicates.
+    Returns (valid addresses in first-seen order, invalid entries as given).
+    """
+    valid: List[str] = []
+    invalid: List[str] = []
+    seen = set()
+    fullmatch = _ADDRESS.fullmatch
+    alias_map = aliases or {}
+    expanded_aliases = set()
+
+    def add(entry: str) -> None:
+        if not entry:
+            return
+        address = entry.strip()
+        if "<" in address:
+            angle = _ANGLE_ADDRESS.search(address)
+            if angle:
+                address = angle.group(1).strip()
+        address = address.lower()
+
+        if alias_map and address in alias_map:
+            if address not in expanded_aliases:
+                expanded_aliases.add(address)
+                for member in alias_map[address]:
+                    add(member)
+            return
+
+        if address in seen:
+            return
+        if fullmatch(address):
+            seen.add(address)
+            valid.append(address)
+        else:
+            invalid.append(entry)
+
+    for entry in addresses:
+        add(entry)
+    return valid, invalid
+
+
+def load_alias_directory(path: str) -> Dict[str, List[str]]:
+    """
+    Loads group aliases from a local directory file.
+    JSON: {"eng-all@company.com": ["a@company.com", ...]}
+    CSV:  rows of "alias,member" (a header row "alias,member" is skipped).
+    Alias names are lowercased so lookups match normalized addresses.
+    """
+    aliases: Dict[str, List[str]] = {}
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            for alias, members in json.load(f).items():
+                aliases[alias.strip().lower()] = list(members)
+        return aliases
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip().lower() == "alias":
+                continue
+            aliases.setdefault(row[0].strip().lower(), []).append(row[1].strip())
+    return aliases
@@ -0,0 +1,246 @@
+"""
+Deterministic, rule-based extraction of action items from meeting notes.
+
+This is a fast local pre-pass: it pulls owners, deadlines, decisions and email
+addresses out of the notes so the agent can be given a condensed, structured
+extract instead of the whole transcript.
+"""
+import re
+from typing import Dict, List, Optional
+
+from agent.emails import EMAIL_PATTERN
+
+DATE_PATTERNS = [
+    re.compile(r'\b(\d{1,2}/\d{1,2}/\d{4})\b'),
+    re.compile(r'\b(\d{1,2}-\d{1,2}-\d{4})\b'),
+    re.compile(r'\b((?:January|February|March|April|May|June|July|August|September|October|November|December)'
+               r'\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4})\b', re.IGNORECASE),
+    re.compile(r'\b(today|yesterday|tomorrow)\b', re.IGNORECASE),
+]
+
+MEETING_TYPES = {
+    "standup": ["standup", "stand-up", "daily", "scrum"],
+    "review": ["review", "retrospective", "retro"],
+    "planning": ["planning", "roadmap", "strategy"],
+    "interview": ["interview", "hiring", "candidate"],
+    "client": ["client", "customer"],
+}
+
+_MONTH = r'(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)'
+_WEEKDAY = r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Tues|Wed|Thu|Thur|Thurs|Fri|Sat|Sun)'
+
+# A deadline phrase on its own, e.g. "EOD Friday", "March 15th", "next week", "ASAP"
+DEADLINE_PHRASE = (
+    r'(?:(?:EOD|EOW|COB|end of (?:the |this |next )?(?:day|week|month))(?:\s+' + _WEEKDAY + r')?'
+    r'|(?:this|next)\s+(?:week|month|' + _WEEKDAY + r')'
+    r'|' + _MONTH + r'\.?\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?'
+    r'|\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?' + _MONTH + r'(?:,?\s+\d{4})?'
+    r'|\d{4}-\d{2}-\d{2}'
+    r'|\d{1,2}/\d{1,2}(?:/\d{2,4})?'
+    r'|' + _WEEKDAY +
+    r'|today|tonight|tomorrow|ASAP|as soon as possible)\b'
+)
+
+DEADLINE_PATTERN = re.compile(
+    r'(?:\b(?:by|due|before|until|no later than|deadline|scheduled for)\b\s*:?\s*(?:the\s+)?(' + DEADLINE_PHRASE + r'))'
+    r'|\(\s*(?:due|deadline)\s*:?\s*(' + DEADLINE_PHRASE + r')\s*\)'
+    r'|\b(ASAP|as soon as possible|next week|next month)\b',
+    re.IGNORECASE,
+)
+
+# "Sarah will ...", "John needs to ...", "Mike is launching ...", "Sarah to schedule ..."
+OWNER_VERB_PATTERN = re.compile(
+    r"^(?:[-*•]\s*)?(?P<owner>(?:[A-Z][a-z]+|[Oo]ur [a-z]+ team|[A-Z][a-z]+ team)(?:\s+[A-Z][a-z]+)?)"
+    r"(?:\s*\([^)]*\))?"
+    r"\s+(?:will|needs?\s+to|needs|has\s+to|to|is|shall|should|must|owns|agreed\s+to|volunteered\s+to)\b",
+)
+# "- Budget approval: Sarah (Due: Thursday)", "- Demo environment setup: Tech team by March 10th"
+ITEM_OWNER_PATTERN = re.compile(
+    r'^(?:[-*•]\s*)?(?P<task>[^:]{3,80}):\s*(?P<owner>[A-Z][A-Za-z]*(?:\s+[A-Za-z]+){0,2}?)'
+    r'\s*(?:\(|\bby\b|\bdue\b|$)',
+)
+EXPLICIT_OWNER_PATTERN = re.compile(r'(?:\bowner|\bassignee|\bassigned to)\s*:?\s*(?P<owner>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
+                                    r'|@(?P<handle>[A-Za-z][\w.-]+)', re.IGNORECASE)
+
+ACTION_PREFIX = re.compile(r'^(?:[-*•]\s*)?(?:action(?: item)?|todo|to-do|ai|follow[- ]?up)\s*:\s*', re.IGNORECASE)
+DECISION_PREFIX = re.compile(r'^(?:[-*•]\s*)?(?:decision|decided|agreed|resolution)\s*:\s*', re.IGNORECASE)
+DECISION_VERBS = re.compile(r'\b(?:decided|agreed|approved|confirmed|will be pushed|signed off)\b', re.IGNORECASE)
+ACTION_VERBS = re.compile(
+    r'\b(?:will|needs?|has to|must|should|is \w+ing|to (?:prepare|send|schedule|finalize|follow|review|complete|update|create|draft|book|share))\b',
+    re.IGNORECASE,
+)
+METADATA_LINE = re.compile(r'^(?:date|attendees|present|participants|time|location|client)\s*:\s*(?P<value>.*)$', re.IGNORECASE)
+SECTION_HEADER = re.compile(r'^(?P<name>[A-Za-z][A-Za-z /\'-]{2,40}):\s*$')
+
+ACTION_SECTIONS = ("action item", "action", "next step", "todo", "to-do", "follow-up", "follow up", "tasks")
+DECISION_SECTIONS = ("decision", "agreed", "resolution")
+_NOT_OWNERS = {"the", "this", "that", "we", "they", "it", "there", "client", "date", "next", "need", "action", "decision"}
+
+
+def parse_meeting_context(text: str) -> Dict:
+    """Extract meeting metadata (date, attendees, meeting type, title) from notes."""
+    context = {
+        "title": None,
+        "date": None,
+        "attendees": [],
+        "meeting_type": "General Meeting",
+    }
+
+    for line in text.splitlines():
+        line = line.strip()
+        metadata = METADATA_LINE.match(line)
+        if metadata:
+            # An explicit "Date:" line wins over dates mentioned in passing
+            if line.lower().startswith("date") and context["date"] is None:
+                context["date"] = metadata.group("value").strip() or None
+        elif line and context["title"] is None:
+            context["title"] = line[:120]
+
+    if context["date"] is None:
+        for pattern in DATE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                context["date"] = match.group(1)
+                break
+
+    context["attendees"] = _unique(EMAIL_PATTERN.findall(text))
+
+    text_lower = text.lower()
+    for meeting_type, keywords in MEETING_TYPES.items():
+        if any(keyword in text_lower for keyword in keywords):
+            context["meeting_type"] = meeting_type.title() + " Meeting"
+            break
+
+    return context
+
+
+def find_deadline(line: str) -> Optional[str]:
+    """Returns the deadline phrase in a line ("Thursday", "EOD Friday", "March 15th"), if any."""
+    match = DEADLINE_PATTERN.search(line)
+    if not match:
+        return None
+    phrase = next(group for group in match.groups() if group)
+    return " ".join(phrase.split())
+
+
+def find_owner(line: str) -> Optional[str]:
+    """Best-effort owner detection for a single action line."""
+    body = ACTION_PREFIX.sub("", line.strip())
+
+    explicit = EXPLICIT_OWNER_PATTERN.search(body)
+    if explicit:
+        return explicit.group("owner") or explicit.group("handle")
+
+    match = ITEM_OWNER_PATTERN.match(body)
+    if match and match.group("owner").split()[0].lower() not in _NOT_OWNERS:
+        return match.group("owner").strip()
+
+    match = OWNER_VERB_PATTERN.match(body)
+    if match and match.group("owner").split()[0].lower() not in _NOT_OWNERS:
+        return match.group("owner").strip()
+    return None
+
+
+def extract_meeting_items(text: str) -> Dict:
+    """
+    Single pass over the notes collecting action items, decisions and emails.
+    Action items are dicts with "task", "owner", "deadline" and the source "line".
+    """
+    action_items: List[Dict] = []
+    decisions: List[str] = []
+    section = None
+    seen = set()
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        header = SECTION_HEADER.match(line)
+        if header:
+            name = header.group("name").lower()
+            if any(name.startswith(s) for s in ACTION_SECTIONS):
+                section = "actions"
+            elif any(name.startswith(s) for s in DECISION_SECTIONS):
+                section = "decisions"
+            else:
+                section = None
+            continue
+
+        is_bullet = line[:1] in "-*•"
+        if not is_bullet and section is not None and not ACTION_PREFIX.match(line) and not DECISION_PREFIX.match(line):
+            # A plain paragraph ends a bulleted section
+            section = None
+
+        if DECISION_PREFIX.match(line) or (section == "decisions" and is_bullet):
+            decision = DECISION_PREFIX.sub("", line).lstrip("-*• ").strip()
+            if decision:
+                decisions.append(decision)
+            continue
+
+        deadline = find_deadline(line)
+        owner = find_owner(line)
+        explicit_action = bool(ACTION_PREFIX.match(line)) or (section == "actions" and is_bullet)
+        implied_action = (deadline is not None or owner is not None) and bool(ACTION_VERBS.search(line))
+
+        if explicit_action or implied_action:
+            task = ACTION_PREFIX.sub("", line).lstrip("-*• ").strip()
+            key = " ".join(task.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            action_items.append({
+                "task": task,
+                "owner": owner,
+                "deadline": deadline,
+                "line": line,
+            })
+        elif DECISION_VERBS.search(line):
+            decisions.append(line.lstrip("-*• ").strip())
+
+    return {
+        "context": parse_meeting_context(text),
+        "action_items": action_items,
+        "decisions": decisions,
+        "emails": _unique(EMAIL_PATTERN.findall(text)),
+    }
+
+
+def format_condensed_notes(extract: Dict) -> str:
+    """Renders an extraction result as a compact, structured block for the agent prompt."""
+    meta = extract.get("context", {})
+    lines = []
+    if meta.get("title"):
+        lines.append(f"TITLE: {meta['title']}")
+    lines.append(f"TYPE: {meta.get('meeting_type', 'General Meeting')}")
+    if meta.get("date"):
+        lines.append(f"DATE: {meta['date']}")
+
+    lines.append("ACTION ITEMS:")
+    for item in extract.get("action_items", []):
+        owner = item.get("owner") or "unassigned"
+        deadline = item.get("deadline") or "none"
+        if item.get("due_date"):
+            deadline += f" = {item['due_date']}"
+        lines.append(f"- {item['task']} [owner: {owner}; deadline: {deadline}]")
+    if not extract.get("action_items"):
+        lines.append("- (none found)")
+
+    if extract.get("decisions"):
+        lines.append("DECISIONS:")
+        lines.extend(f"- {decision}" for decision in extract["decisions"])
+
+    if extract.get("emails"):
+        lines.append(f"EMAILS MENTIONED: {', '.join(extract['emails'])}")
+
+    return "\n".join(lines)
+
+
+def _unique(values: List[str]) -> List[str]:
+    seen = set()
+    ordered = []
+    for value in values:
+        if value.lower() not in seen:
+            seen.add(value.lower())
+            ordered.append(value)
+    return ordered
@@ -0,0 +1,176 @@
+"""
+Pluggable stand-in for the Portia client, for benchmarks and offline tests.
+
+FakePortia mimics the parts of the Portia API the agent uses (`run`, `arun`,
+`execution_hooks`) and simulates configurable LLM planning latency, per-tool
+latency and failure rates without any network access:
+
+    agent = MeetingNotesAgent(portia=FakePortia(llm_latency=0.8, tool_latency=0.2))
+"""
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from typing import List, Optional
+
+
+class FakeBackendError(Exception):
+    """Raised for simulated upstream failures (quota, timeouts)."""
+
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakePlanRun:
+    """Minimal plan run: `id`, `state` and `outputs.final_output`/`step_outputs`, like Portia's PlanRun."""
+
+    def __init__(self, plan_id: str, final_output: str, step_outputs: Optional[dict] = None):
+        self.id = plan_id
+        self.state = "COMPLETE"
+        self.outputs = _Obj(final_output=final_output, step_outputs=dict(step_outputs or {}))
+
+
+class FakePlan:
+    """Stored plan: the query template and tools, serializable like Portia's pydantic Plan."""
+
+    def __init__(self, plan_id: str, query: str, tools: List[str], plan_inputs: Optional[List] = None):
+        self.id = plan_id
+        self.query = query
+        self.steps = list(tools)
+        self.plan_inputs = list(plan_inputs or [])
+
+    def model_dump_json(self) -> str:
+        return json.dumps({"id": self.id, "query": self.query, "steps": self.steps, "plan_inputs": self.plan_inputs})
+
+
+class FakePortia:
+    """
+    Simulated Portia client.
+    Each run sleeps `llm_latency` seconds for planning, then `tool_latency` per
+    tool and `llm_latency * summary_factor` for the final summary. A run fails
+    with FakeBackendError with probability `failure_rate`. Latencies get
+    +/- `jitter` (a fraction) of uniform noise. Execution hooks, when given,
+    are called the way Portia calls them so tracing can be exercised.
+    `plan()` + `run_plan()` split the same work: planning latency is paid in
+    plan(), and run_plan() only executes tools and the summary.
+    """
+
+    def __init__(self, llm_latency: float = 0.0, tool_latency: float = 0.0, failure_rate: float = 0.0,
+                 jitter: float = 0.0, summary_factor: float = 0.5, seed: Optional[int] = None,
+                 execution_hooks=None):
+        self.llm_latency = llm_latency
+        self.tool_latency = tool_latency
+        self.failure_rate = failure_rate
+        self.jitter = jitter
+        self.summary_factor = summary_factor
+        self.execution_hooks = execution_hooks
+        self.config = None
+        self.calls = 0
+        self.plans = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def run(self, query: str, end_user: Optional[str] = None, tools: Optional[List[str]] = None, **kwargs):
+        plan, plan_run, delays, fail = self._start(tools)
+        time.sleep(delays[0])  # planning
+        self._before_plan(plan, plan_run)
+        for index, (tool_id, delay) in enumerate(zip(tools or [], delays[1:])):
+            self._tool_call(plan, plan_run, index, tool_id, lambda: time.sleep(delay))
+        time.sleep(delays[-1])
+        return self._finish(query, plan, plan_run, fail)
+
+    def plan(self, query: str, tools: Optional[List[str]] = None, plan_inputs: Optional[List] = None, **kwargs) -> FakePlan:
+        with self._lock:
+            self.plans += 1
+            plan_id = f"fake-plan-template-{self.plans}"
+        time.sleep(self._jittered(self.llm_latency))
+        return FakePlan(plan_id, query, tools or [], plan_inputs)
+
+    def run_plan(self, plan: FakePlan, end_user: Optional[str] = None, plan_run_inputs: Optional[dict] = None, **kwargs):
+        _, plan_run, delays, fail = self._start(plan.steps)
+        self._before_plan(plan, plan_run)
+        for index, (tool_id, delay) in enumerate(zip(plan.steps, delays[1:])):
+            self._tool_call(plan, plan_run, index, tool_id, lambda: time.sleep(delay))
+        time.sleep(delays[-1])
+        query = plan.query
+        for name, value in (plan_run_inputs or {}).items():
+            query = query.replace(name, str(value))
+        return self._finish(query, plan, plan_run, fail)
+
+    def load_plan(self, plan_json: str) -> FakePlan:
+        data = json.loads(plan_json)
+        return FakePlan(data["id"], data["query"], data["steps"], data["plan_inputs"])
+
+    async def arun(self, query: str, end_user: Optional[str] = None, tools: Optional[List[str]] = None, **kwargs):
+        plan, plan_run, delays, fail = self._start(tools)
+        await asyncio.sleep(delays[0])  # planning
+        self._before_plan(plan, plan_run)
+        for index, (tool_id, delay) in enumerate(zip(tools or [], delays[1:])):
+            tool, step = self._start_step(plan, plan_run, index, tool_id)
+            await asyncio.sleep(delay)
+            self._finish_step(plan, plan_run, tool, step)
+        await asyncio.sleep(delays[-1])
+        return self._finish(query, plan, plan_run, fail)
+
+    def _start(self, tools: Optional[List[str]]):
+        with self._lock:
+            self.calls += 1
+            run_number = next(self._ids)
+            fail = self._random.random() < self.failure_rate
+            delays = [self._jittered(self.llm_latency)]
+            delays += [self._jittered(self.tool_latency) for _ in tools or []]
+            delays.append(self._jittered(self.llm_latency * self.summary_factor))
+        plan = _Obj(id=f"fake-plan-{run_number}", steps=list(tools or []))
+        plan_run = _Obj(id=f"fake-run-{run_number}")
+        return plan, plan_run, delays, fail
+
+    def _finish(self, query: str, plan, plan_run, fail: bool) -> FakePlanRun:
+        if fail:
+            with self._lock:
+                self.failures += 1
+            raise FakeBackendError("429 Resource has been exhausted (simulated quota error)")
+        summary = f"FAKE BACKEND: processed {len(query)} prompt characters."
+        self._hook("after_plan_run", plan, plan_run, _Obj(final_output=summary))
+        # Each tool step reports the id of what it created, like the Gmail and Calendar tools
+        step_outputs = {f"$step_{index}_output": _Obj(value={"id": f"{plan_run.id}-{index}"})
+                        for index in range(len(plan.steps))}
+        return FakePlanRun(plan_run.id, summary, step_outputs)
+
+    def _before_plan(self, plan, plan_run) -> None:
+        self._hook("before_plan_run", plan, plan_run)
+
+    def _tool_call(self, plan, plan_run, index: int, tool_id: str, work) -> None:
+        tool, step = self._start_step(plan, plan_run, index, tool_id)
+        work()
+        self._finish_step(plan, plan_run, tool, step)
+
+    def _start_step(self, plan, plan_run, index: int, tool_id: str):
+        """One plan step per tool, hooked like Portia: step execution around the tool call."""
+        step = _Obj(task=f"call {tool_id}", tool_id=tool_id)
+        tool = _Obj(id=tool_id)
+        plan_run.current_step_index = index
+        self._hook("before_step_execution", plan, plan_run, step)
+        self._hook("before_tool_call", tool, {}, plan_run, step)
+        return tool, step
+
+    def _finish_step(self, plan, plan_run, tool, step) -> None:
+        self._hook("after_tool_call", tool, "ok", plan_run, step)
+        self._hook("after_step_execution", plan, plan_run, step, _Obj(value="ok"))
+
+    def _hook(self, name: str, *args) -> None:
+        callback = getattr(self.execution_hooks, name, None) if self.execution_hooks else None
+        if callback:
+            callback(*args)
+
+    def _jittered(self, seconds: float) -> float:
+        if seconds <= 0:
+            return 0.0
+        if not self.jitter:
+            return seconds
+        return max(0.0, seconds * (1 + self._random.uniform(-self.jitter, self.jitter)))
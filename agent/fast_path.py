@@ -0,0 +1,171 @@
+"""
+Local fast path for simple, well-structured notes.
+
+Notes like "Action: Our team needs to prepare the demo environment by March
+10th" are fully understood by the rule-based extractor, so sending them
+through a Portia plan run (an LLM planning step and an LLM-drafted email) adds
+seconds and cost without adding information. The fast path scores how
+completely the local extraction explains the notes:
+
+- coverage: the share of lines that are items, decisions, metadata or headers;
+- item quality: items with an owner, and deadlines that resolved to a date;
+- open questions and hedges ("?", "TBD", "maybe") count against it.
+
+At or above the threshold the run is answered locally, with a deterministic
+summary email. Below it, or when something only the agent can do is needed,
+the run goes to the agent. Every decision is counted, so the share of
+traffic that skips the LLM is visible.
+"""
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from agent.extraction import ACTION_PREFIX, DECISION_PREFIX, METADATA_LINE, SECTION_HEADER
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MAX_LINES = 60
+# Each unexplained hedge or open question costs this much confidence
+HEDGE_PENALTY = 0.1
+
+_HEDGES = re.compile(r"\?|\b(?:tbd|tbc|maybe|not sure|unclear|might|possibly|to be discussed|depends on)\b",
+                     re.IGNORECASE)
+
+
+def score_extract(raw_notes: str, extract: Dict, max_lines: int = DEFAULT_MAX_LINES) -> Dict:
+    """
+    How completely `extract` explains `raw_notes`, from 0 to 1.
+    Returns {"confidence", "coverage", "item_quality", "hedges", "lines", "reasons"};
+    `reasons` says what lowered the confidence.
+    """
+    lines = [line.strip() for line in raw_notes.splitlines() if line.strip()]
+    items = extract.get("action_items", [])
+    reasons: List[str] = []
+    if not items:
+        reasons.append("no action items found")
+    if len(lines) > max_lines:
+        reasons.append(f"long notes ({len(lines)} lines)")
+
+    item_lines = {item["line"] for item in items}
+    decisions = extract.get("decisions", [])
+    title = extract.get("context", {}).get("title")
+    explained = 0
+    hedges = 0
+    for line in lines:
+        if (line in item_lines or line == title or SECTION_HEADER.match(line) or METADATA_LINE.match(line)
+                or DECISION_PREFIX.match(line) or any(decision in line for decision in decisions)):
+            explained += 1
+        elif _HEDGES.search(line):
+            hedges += 1
+    coverage = explained / len(lines) if lines else 0.0
+    if coverage < 1.0:
+        reasons.append(f"{len(lines) - explained} line(s) not understood")
+    if hedges:
+        reasons.append(f"{hedges} open question(s)")
+
+    quality = 0.0
+    if items:
+        owned = sum(1 for item in items if item.get("owner"))
+        resolved = sum(1 for item in items if not item.get("deadline") or item.get("due_date"))
+        explicit = sum(1 for item in items if ACTION_PREFIX.match(item["line"]) or item.get("owner"))
+        quality = (owned + resolved + explicit) / (3 * len(items))
+        if owned < len(items):
+            reasons.append(f"{len(items) - owned} item(s) without an owner")
+        if resolved < len(items):
+            reasons.append(f"{len(items) - resolved} deadline(s) not resolved")
+
+    confidence = 0.0 if not items or len(lines) > max_lines else max(0.0, coverage * quality - HEDGE_PENALTY * hedges)
+    return {"confidence": round(confidence, 3), "coverage": round(coverage, 3), "item_quality": round(quality, 3),
+            "hedges": hedges, "lines": len(lines), "reasons": reasons}
+
+
+def local_summary(extract: Dict) -> str:
+    """
+    The meeting summary of a locally handled run: its action items and decisions.
+    Items still open from earlier meetings with nothing new (tracked "duplicate",
+    see agent.item_index) are listed apart, so they are not announced as new.
+    """
+    items = extract.get("action_items", [])
+    repeated = [item for item in items if item.get("tracked") == "duplicate"]
+    lines = ["ACTION ITEMS:"]
+    lines += [_item_line(item) for item in items if item.get("tracked") != "duplicate"] or ["- None new"]
+    if repeated:
+        lines += ["", "ALREADY TRACKED (open from earlier meetings):"] + [_item_line(item) for item in repeated]
+    if extract.get("decisions"):
+        lines += ["", "DECISIONS:"] + [f"- {decision}" for decision in extract["decisions"]]
+    return "\n".join(lines)
+
+
+def _item_line(item: Dict) -> str:
+    due = item.get("due_date") or item.get("deadline")
+    return f"- {item['task']} (owner: {item.get('owner') or 'unassigned'}" + (f", due {due}" if due else "") + ")"
+
+
+def render_summary_email(extract: Dict, attendees: List[str], current_date: str) -> str:
+    """Deterministic summary email to all attendees for a locally handled run."""
+    meta = extract.get("context", {})
+    title = meta.get("title") or meta.get("meeting_type") or "Meeting"
+    return "\n".join([
+        f"To: {', '.join(attendees)}",
+        f"Subject: Summary: {title}",
+        "",
+        "Hi all,",
+        "",
+        f"Here are the action items and decisions from {title} ({meta.get('date') or current_date}).",
+        "",
+        local_summary(extract),
+        "",
+        "Please reply if anything is missing or wrong.",
+    ])
+
+
+class FastPath:
+    """
+    Routes runs whose local extraction scores at least `threshold` away from the
+    LLM, and keeps thread-safe routing stats. Notes over `max_lines` always go
+    to the agent.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_lines: int = DEFAULT_MAX_LINES):
+        self.threshold = threshold
+        self.max_lines = max_lines
+        self._lock = threading.Lock()
+        self._counters = {"runs": 0, "local": 0, "escalated": 0, "confidence_total": 0.0}
+        self._escalations: Counter = Counter()
+
+    @classmethod
+    def from_env(cls) -> Optional["FastPath"]:
+        """FAST_PATH_CONFIDENCE enables the fast path at that threshold (unset: every run uses the agent)."""
+        threshold = os.getenv("FAST_PATH_CONFIDENCE")
+        if not threshold:
+            return None
+        return cls(float(threshold), int(os.getenv("FAST_PATH_MAX_LINES", DEFAULT_MAX_LINES)))
+
+    def route(self, raw_notes: str, extract: Dict, blockers: Optional[List[str]] = None) -> Dict:
+        """
+        Scores the extraction and decides: {"local": bool, "confidence", "reasons", ...}.
+        `blockers` are reasons the run needs the agent whatever the score.
+        """
+        decision = score_extract(raw_notes, extract, self.max_lines)
+        decision["reasons"] = list(blockers or []) + decision["reasons"]
+        decision["local"] = not blockers and decision["confidence"] >= self.threshold
+        with self._lock:
+            self._counters["runs"] += 1
+            self._counters["confidence_total"] += decision["confidence"]
+            if decision["local"]:
+                self._counters["local"] += 1
+            else:
+                self._counters["escalated"] += 1
+                self._escalations[(blockers or decision["reasons"] or ["low confidence"])[0].split(" (")[0]] += 1
+        return decision
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["escalation_reasons"] = dict(self._escalations.most_common())
+        runs = stats["runs"]
+        stats["local_rate"] = stats["local"] / runs if runs else 0.0
+        stats["avg_confidence"] = stats.pop("confidence_total") / runs if runs else 0.0
+        return stats
+
@@ -0,0 +1,161 @@
+"""
+Durable processing history.
+
+Every run is written to a SQLite file with indexes on timestamp, plan id and
+attendee, so the history panel reads one page at a time and computes its
+aggregates in SQL instead of loading every record into a DataFrame. Retention
+(maximum age and/or maximum row count) is enforced on write.
+"""
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    processing_time REAL NOT NULL,
+    input_length INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    plan_id TEXT,
+    prompt_mode TEXT,
+    summary TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_plan ON runs (plan_id);
+CREATE TABLE IF NOT EXISTS run_attendees (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    attendee TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attendees_attendee ON run_attendees (attendee, run_id);
+CREATE INDEX IF NOT EXISTS idx_attendees_run ON run_attendees (run_id);
+"""
+
+_COLUMNS = "id, created_at, processing_time, input_length, success, cached, plan_id, prompt_mode"
+
+
+class HistoryStore:
+    """
+    SQLite-backed run history shared by all sessions of the app.
+    `max_age_days` and `max_records` bound the table; retention runs every
+    `prune_every` writes so a single insert stays cheap.
+    """
+
+    def __init__(self, db_path: str = "history.db", max_records: Optional[int] = 50000,
+                 max_age_days: Optional[float] = 90, prune_every: int = 100):
+        self.db_path = db_path
+        self.max_records = max_records
+        self.max_age_days = max_age_days
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        if db_path != ":memory:":
+            self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def record(self, processing_time: float, input_length: int, success: bool, attendees: List[str] = (),
+               plan_id: Optional[str] = None, prompt_mode: Optional[str] = None, summary: str = "",
+               error: Optional[str] = None, cached: bool = False, created_at: Optional[float] = None) -> int:
+        """Stores one run and returns its id."""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO runs (created_at, processing_time, input_length, success, cached, plan_id, "
+                "prompt_mode, summary, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (created_at or time.time(), processing_time, input_length, int(success), int(cached),
+                 plan_id, prompt_mode, summary, error),
+            )
+            run_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO run_attendees (run_id, attendee) VALUES (?, ?)",
+                [(run_id, attendee.lower()) for attendee in dict.fromkeys(attendees)],
+            )
+            self._db.commit()
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune()
+        return run_id
+
+    def page(self, page: int = 0, page_size: int = 20, attendee: Optional[str] = None) -> List[Dict]:
+        """Newest-first page of runs (without the summary text), optionally for one attendee."""
+        where, params = self._filter(attendee)
+        query = (f"SELECT {_COLUMNS} FROM runs{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._db.execute(query, params + [page_size, page * page_size]).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        """One run including summary, error and attendees."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            attendees = [r[0] for r in self._db.execute(
+                "SELECT attendee FROM run_attendees WHERE run_id = ?", (run_id,))]
+        return {**dict(row), "attendees": attendees}
+
+    def find_by_plan(self, plan_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {_COLUMNS} FROM runs WHERE plan_id = ?", (plan_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, attendee: Optional[str] = None) -> int:
+        where, params = self._filter(attendee)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+
+    def stats(self, attendee: Optional[str] = None) -> Dict:
+        """Aggregates computed by SQLite over the whole (filtered) history."""
+        where, params = self._filter(attendee)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) AS total, COALESCE(SUM(success), 0) AS succeeded, "
+                "COALESCE(SUM(cached), 0) AS cached, AVG(processing_time) AS avg_processing_time, "
+                "MAX(processing_time) AS max_processing_time, AVG(input_length) AS avg_input_length, "
+                f"MIN(created_at) AS first_run, MAX(created_at) AS last_run FROM runs{where}",
+                params,
+            ).fetchone()
+        stats = dict(row)
+        stats["success_rate"] = stats["succeeded"] / stats["total"] if stats["total"] else 0.0
+        return stats
+
+    def prune(self) -> int:
+        """Applies the retention policy now; returns the number of runs removed."""
+        with self._lock:
+            return self._prune()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM runs")
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _prune(self) -> int:
+        # Caller holds the lock
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed += self._db.execute("DELETE FROM runs WHERE created_at < ?", (cutoff,)).rowcount
+        if self.max_records is not None:
+            removed += self._db.execute(
+                "DELETE FROM runs WHERE id IN (SELECT id FROM runs ORDER BY created_at DESC, id DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_records,),
+            ).rowcount
+        self._db.commit()
+        return removed
+
+    @staticmethod
+    def _filter(attendee: Optional[str]):
+        if not attendee:
+            return "", []
+        return " WHERE id IN (SELECT run_id FROM run_attendees WHERE attendee = ?)", [attendee.strip().lower()]
@@ -0,0 +1,306 @@
+"""
+Cross-meeting index of open action items.
+
+Recurring meetings repeat the same items week after week ("Sarah will send the
+budget report by Friday"). Every item of a processed meeting is recorded here,
+and the items of the next meeting are matched against the open ones first:
+
+- an exact match on the normalized task (agent.revisions.item_identity) is a dict lookup;
+- otherwise the task's word and word-pair shingles are MinHashed and looked up
+  in LSH buckets, and the few candidates are compared by exact Jaccard similarity.
+
+A match with the same owner, deadline and due date is a duplicate (the agent
+neither schedules nor announces it again); one whose deadline changed or that
+gained an owner is an update. Items assigned to someone else are tracked
+separately. Open items are also indexed per owner, so "all open items for X"
+does not scan the table. The table lives in SQLite; the in-memory index is
+rebuilt from it on start.
+
+Each item keeps the id of its calendar event, so an update moves that event
+instead of creating another. Items leave the index when closed, or expire once
+they have not come up for `max_age_days`.
+"""
+import array
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from agent.revisions import item_identity
+
+# Words that carry no meaning for matching ("send the report" == "send report")
+STOP_WORDS = frozenset("a an and are be by for from in is it of on or our the their to we will with".split())
+# 16 bands of 2 rows: items with Jaccard similarity >= 0.6 share a bucket with probability > 0.999
+NUM_PERM = 32
+BANDS = 16
+_ROWS = NUM_PERM // BANDS
+_WORD = re.compile(r"[a-z0-9]+")
+# Crude suffix stripping so "fixes"/"fix" and "updated"/"update" share shingles
+_SUFFIXES = ("ing", "ed", "es", "s", "e")
+
+
+def shingles(identity: str) -> frozenset:
+    """Stemmed content words of a normalized task plus adjacent word pairs."""
+    words = [_stem(word) for word in _WORD.findall(identity) if word not in STOP_WORDS]
+    return frozenset(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def minhash(features: frozenset) -> Tuple[int, ...]:
+    """MinHash signature of a non-empty shingle set (stable across processes)."""
+    return tuple(map(min, zip(*[_feature_hashes(feature) for feature in features])))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def owner_key(owner: Optional[str]) -> str:
+    return (owner or "").strip().lower()
+
+
+class ActionItemIndex:
+    """
+    Persistent open action items with similarity lookup. Use ":memory:" for a
+    throwaway index. Items match when their shingle Jaccard similarity is at
+    least `threshold` and their owners agree (or one of them has none). Items
+    not seen for `max_age_days` expire (never when None), checked on start and
+    on every record().
+    """
+
+    def __init__(self, db_path: str = ":memory:", threshold: float = 0.6, max_age_days: Optional[float] = None):
+        self.threshold = threshold
+        self.max_age_days = max_age_days
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS action_items ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, identity TEXT NOT NULL, task TEXT NOT NULL, owner TEXT, "
+            "deadline TEXT, due_date TEXT, status TEXT NOT NULL DEFAULT 'open', source TEXT, "
+            "occurrences INTEGER NOT NULL DEFAULT 1, first_seen TEXT NOT NULL, last_seen TEXT NOT NULL, "
+            "event_id TEXT)"
+        )
+        # Indexes created before items kept their calendar event
+        if "event_id" not in {row[1] for row in self._db.execute("PRAGMA table_info(action_items)")}:
+            self._db.execute("ALTER TABLE action_items ADD COLUMN event_id TEXT")
+        self._db.commit()
+        self._items: Dict[int, Dict] = {}
+        self._shingles: Dict[int, frozenset] = {}
+        self._item_bands: Dict[int, List[Tuple]] = {}
+        self._by_identity: Dict[str, Set[int]] = {}
+        # (owner, band, MinHash rows...) -> item ids
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._by_owner: Dict[str, Set[int]] = {}
+        self._counters = {"lookups": 0, "duplicates": 0, "updates": 0, "new": 0, "expired": 0}
+        rows = self._db.execute(
+            "SELECT id, identity, task, owner, deadline, due_date, source, occurrences, first_seen, last_seen, "
+            "event_id FROM action_items WHERE status = 'open'"
+        ).fetchall()
+        for row in rows:
+            self._add(dict(zip(("id", "identity", "task", "owner", "deadline", "due_date", "source",
+                                "occurrences", "first_seen", "last_seen", "event_id"), row)))
+        with self._lock:
+            self._expire()
+
+    def match(self, item: Dict) -> Optional[Tuple[Dict, float]]:
+        """The most similar open item matching `item` and its similarity, or None."""
+        with self._lock:
+            self._counters["lookups"] += 1
+            return self._match(item_identity(item), owner_key(item.get("owner")))
+
+    def classify(self, items: List[Dict]) -> List[Dict]:
+        """
+        {"status": "new" | "duplicate" | "updated", "match": open item or None, "similarity"}
+        for each extracted item, without recording anything.
+        """
+        classified = []
+        for item in items:
+            found = self.match(item)
+            if found is None:
+                classified.append({"status": "new", "match": None, "similarity": 0.0})
+                continue
+            tracked, similarity = found
+            status = "duplicate" if _same_details(tracked, item) else "updated"
+            classified.append({"status": status, "match": dict(tracked), "similarity": similarity})
+        return classified
+
+    def record(self, items: List[Dict], source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Adds new items, bumps duplicates and applies updates (new deadline, newly
+        assigned owner) to the matched open items. An item's "event_id", when set,
+        is kept as its calendar event. Returns the count of each.
+        """
+        counts = {"new": 0, "duplicate": 0, "updated": 0}
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._expire()
+            for item in items:
+                identity = item_identity(item)
+                found = self._match(identity, owner_key(item.get("owner")))
+                if found is None:
+                    self._insert(item, identity, source, now)
+                    counts["new"] += 1
+                    continue
+                tracked = found[0]
+                status = "duplicate" if _same_details(tracked, item) else "updated"
+                counts[status] += 1
+                if status == "updated":
+                    self._remove(tracked["id"])
+                    tracked.update(owner=tracked["owner"] or item.get("owner"),
+                                   deadline=item.get("deadline") or tracked["deadline"],
+                                   due_date=item.get("due_date") or tracked["due_date"])
+                    self._add(tracked)
+                tracked.update(occurrences=tracked["occurrences"] + 1, last_seen=now, source=source,
+                               event_id=item.get("event_id") or tracked["event_id"])
+                self._db.execute(
+                    "UPDATE action_items SET owner = ?, deadline = ?, due_date = ?, occurrences = ?, "
+                    "last_seen = ?, source = ?, event_id = ? WHERE id = ?",
+                    (tracked["owner"], tracked["deadline"], tracked["due_date"], tracked["occurrences"], now,
+                     source, tracked["event_id"], tracked["id"]),
+                )
+            self._db.commit()
+            self._counters["new"] += counts["new"]
+            self._counters["duplicates"] += counts["duplicate"]
+            self._counters["updates"] += counts["updated"]
+        return counts
+
+    def open_items(self, owner: Optional[str] = None) -> List[Dict]:
+        """Open items, oldest first; only `owner`'s (case-insensitive) when given."""
+        with self._lock:
+            ids = self._by_owner.get(owner_key(owner), set()) if owner is not None else self._items.keys()
+            return [dict(self._items[item_id]) for item_id in sorted(ids)]
+
+    def close(self, item_id: int) -> bool:
+        """Marks an item done; it no longer matches or shows up as open."""
+        with self._lock:
+            if item_id not in self._items:
+                return False
+            self._remove(item_id)
+            self._db.execute("UPDATE action_items SET status = 'done' WHERE id = ?", (item_id,))
+            self._db.commit()
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["open"] = len(self._items)
+            stats["owners"] = sum(1 for key, ids in self._by_owner.items() if key and ids)
+        return stats
+
+    # --- In-memory index (callers hold the lock) ---
+
+    def _expire(self) -> None:
+        """Marks open items not seen for max_age_days as expired and drops them from the index."""
+        if self.max_age_days is None:
+            return
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+        stale = [row[0] for row in self._db.execute(
+            "SELECT id FROM action_items WHERE status = 'open' AND last_seen < ?", (cutoff,))]
+        if not stale:
+            return
+        self._db.executemany("UPDATE action_items SET status = 'expired' WHERE id = ?", [(i,) for i in stale])
+        self._db.commit()
+        for item_id in stale:
+            if item_id in self._items:
+                self._remove(item_id)
+        self._counters["expired"] += len(stale)
+
+    def _match(self, identity: str, owner: str) -> Optional[Tuple[Dict, float]]:
+        exact = [item_id for item_id in self._by_identity.get(identity, ()) if self._owners_agree(item_id, owner)]
+        if exact:
+            return self._items[min(exact)], 1.0
+        features = shingles(identity)
+        if not features:
+            return None
+        # Buckets are per owner: look in the owner's and the unassigned ones (every owner's without one)
+        owners = (owner, "") if owner else list(self._by_owner)
+        candidates = set()
+        for band in _bands(minhash(features)):
+            for key in owners:
+                candidates.update(self._buckets.get((key,) + band, ()))
+        best, best_similarity = None, self.threshold
+        for item_id in sorted(candidates):
+            similarity = jaccard(features, self._shingles[item_id])
+            if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                best, best_similarity = item_id, similarity
+        return (self._items[best], best_similarity) if best is not None else None
+
+    def _owners_agree(self, item_id: int, owner: str) -> bool:
+        tracked = owner_key(self._items[item_id]["owner"])
+        return not owner or not tracked or owner == tracked
+
+    def _insert(self, item: Dict, identity: str, source: Optional[str], now: str) -> None:
+        cursor = self._db.execute(
+            "INSERT INTO action_items (identity, task, owner, deadline, due_date, source, first_seen, last_seen, "
+            "event_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (identity, item["task"], item.get("owner"), item.get("deadline"), item.get("due_date"), source, now, now,
+             item.get("event_id")),
+        )
+        self._add({"id": cursor.lastrowid, "identity": identity, "task": item["task"], "owner": item.get("owner"),
+                   "deadline": item.get("deadline"), "due_date": item.get("due_date"), "source": source,
+                   "occurrences": 1, "first_seen": now, "last_seen": now, "event_id": item.get("event_id")})
+
+    def _add(self, tracked: Dict) -> None:
+        item_id = tracked["id"]
+        features = shingles(tracked["identity"])
+        self._items[item_id] = tracked
+        self._shingles[item_id] = features
+        self._by_identity.setdefault(tracked["identity"], set()).add(item_id)
+        self._by_owner.setdefault(owner_key(tracked["owner"]), set()).add(item_id)
+        self._item_bands[item_id] = [(owner_key(tracked["owner"]),) + band
+                                     for band in (_bands(minhash(features)) if features else [])]
+        for band in self._item_bands[item_id]:
+            self._buckets.setdefault(band, set()).add(item_id)
+
+    def _remove(self, item_id: int) -> None:
+        tracked = self._items.pop(item_id)
+        del self._shingles[item_id]
+        self._by_identity[tracked["identity"]].discard(item_id)
+        self._by_owner[owner_key(tracked["owner"])].discard(item_id)
+        for band in self._item_bands.pop(item_id):
+            self._buckets[band].discard(item_id)
+
+
+def format_tracked_items(classified: List[Tuple[Dict, Dict]]) -> str:
+    """Prompt block listing (item, classification) pairs that are already tracked from earlier meetings."""
+    lines = ["ALREADY TRACKED (open from earlier meetings; do NOT schedule them again or announce them as new):"]
+    for item, entry in classified:
+        tracked = entry["match"]
+        change = ""
+        if entry["status"] == "updated":
+            change = f" (UPDATED: deadline {tracked['deadline'] or 'none'} -> {item.get('deadline') or 'none'})"
+        lines.append(f"- {item['task']} [owner: {tracked['owner'] or item.get('owner') or 'unassigned'}; "
+                     f"first seen {tracked['first_seen'][:10]}]{change}")
+    return "\n".join(lines)
+
+
+def _same_details(tracked: Dict, item: Dict) -> bool:
+    """True when the new occurrence adds nothing: same deadline and due date, and no newly assigned owner."""
+    if item.get("owner") and not tracked["owner"]:
+        return False
+    if not item.get("deadline"):
+        return True
+    return ((tracked["deadline"] or "").lower(), tracked["due_date"]) == (item["deadline"].lower(),
+                                                                         item.get("due_date"))
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_hashes(feature: str) -> List[int]:
+    # NUM_PERM independent 32-bit hashes from one extendable-output digest; shingles recur a lot
+    return array.array("I", hashlib.shake_128(feature.encode("utf-8")).digest(4 * NUM_PERM)).tolist()
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4:
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix):
+                return word[:-len(suffix)]
+    return word
+
+
+def _bands(signature: Tuple[int, ...]) -> List[Tuple]:
+    return [(band,) + signature[band * _ROWS:(band + 1) * _ROWS] for band in range(BANDS)]
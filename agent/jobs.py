@@ -0,0 +1,344 @@
+"""
+Persistent background job queue for agent runs.
+
+Submissions are written to a SQLite database and return a job id immediately.
+Worker processes claim jobs with a lease, run them through MeetingNotesAgent,
+and store status, progress and results, so the UI never blocks on a plan run
+and queued work survives restarts. Failed runs are retried with backoff.
+A worker renews its lease while the run is in progress, and only the worker
+holding the lease can record the outcome, so a job reclaimed after a stall is
+never completed twice.
+
+Start workers next to the app with:
+    python -m agent.jobs worker --db jobs.db --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at);
+"""
+
+
+class JobQueue:
+    """
+    SQLite-backed queue. Each call opens its own connection, so one database can be
+    shared by the Streamlit process and any number of worker processes.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", lease_seconds: float = 600.0, retry_backoff: float = 5.0):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    def submit(self, payload: Dict, max_attempts: int = 3) -> str:
+        """Queues a run and returns its job id straight away."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, payload, progress, max_attempts, created_at, updated_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), "Waiting for a worker", max_attempts, now, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 20, status: Optional[str] = None) -> List[Dict]:
+        query = "SELECT * FROM jobs"
+        params: list = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as db:
+            return [_row_to_job(row) for row in db.execute(query, params).fetchall()]
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """
+        Atomically takes the oldest runnable job: a queued job whose retry delay has
+        passed, or a running job whose worker's lease expired (e.g. after a crash).
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE (status = ? AND available_at <= ?) "
+                    "OR (status = ? AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, progress = ?, "
+                    "updated_at = ?, lease_expires_at = ? WHERE id = ?",
+                    (RUNNING, worker, "Claimed by worker", now, now + self.lease_seconds, row["id"]),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        job = _row_to_job(row)
+        job["attempts"] += 1
+        job["status"] = RUNNING
+        job["worker"] = worker
+        return job
+
+    def set_progress(self, job_id: str, message: str, worker: Optional[str] = None) -> bool:
+        """
+        Updates a running job's progress message and renews its lease. With `worker`,
+        only while that worker still holds the job; returns whether it was updated.
+        """
+        now = time.time()
+        query = "UPDATE jobs SET progress = ?, updated_at = ?, lease_expires_at = ? WHERE id = ? AND status = ?"
+        params: list = [message, now, now + self.lease_seconds, job_id, RUNNING]
+        if worker is not None:
+            query += " AND worker = ?"
+            params.append(worker)
+        with self._connect() as db:
+            return db.execute(query, params).rowcount == 1
+
+    def complete(self, job_id: str, result: Dict, worker: Optional[str] = None) -> bool:
+        """
+        Stores the result of a running job. With `worker`, only if that worker still
+        holds the job (its lease may have expired and the job been reclaimed); returns
+        whether the result was stored.
+        """
+        query = ("UPDATE jobs SET status = ?, result = ?, error = NULL, progress = ?, updated_at = ?, "
+                 "lease_expires_at = NULL WHERE id = ? AND status = ?")
+        params: list = [SUCCEEDED, json.dumps(result, default=str), "Done", time.time(), job_id, RUNNING]
+        if worker is not None:
+            query += " AND worker = ?"
+            params.append(worker)
+        with self._connect() as db:
+            return db.execute(query, params).rowcount == 1
+
+    def fail(self, job_id: str, error: str, retryable: bool = True, result: Optional[Dict] = None,
+             worker: Optional[str] = None) -> str:
+        """
+        Records a failed attempt. Retryable failures go back to the queue with
+        exponential backoff until max_attempts is reached. Returns the new status;
+        when `worker` no longer holds the job nothing is changed and its current
+        status is returned.
+        """
+        now = time.time()
+        owner = " AND worker = ?" if worker is not None else ""
+        owner_params = [worker] if worker is not None else []
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT status, attempts, max_attempts, worker FROM jobs WHERE id = ?",
+                                 (job_id,)).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return FAILED
+                if row["status"] != RUNNING or (worker is not None and row["worker"] != worker):
+                    db.execute("COMMIT")
+                    return row["status"]
+                if retryable and row["attempts"] < row["max_attempts"]:
+                    delay = self.retry_backoff * (2 ** (row["attempts"] - 1))
+                    db.execute(
+                        "UPDATE jobs SET status = ?, error = ?, progress = ?, updated_at = ?, available_at = ?, "
+                        "lease_expires_at = NULL WHERE id = ?" + owner,
+                        [QUEUED, error, f"Retrying in {delay:.0f}s (attempt {row['attempts']} failed)", now,
+                         now + delay, job_id, *owner_params],
+                    )
+                    status = QUEUED
+                else:
+                    db.execute(
+                        "UPDATE jobs SET status = ?, error = ?, result = ?, progress = ?, updated_at = ?, "
+                        "lease_expires_at = NULL WHERE id = ?" + owner,
+                        [FAILED, error, json.dumps(result, default=str) if result else None, "Failed", now, job_id,
+                         *owner_params],
+                    )
+                    status = FAILED
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return status
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+def process_job(queue: JobQueue, job: Dict, agent) -> str:
+    """
+    Runs one claimed job through the agent and records the outcome. The lease is
+    renewed every third of `queue.lease_seconds` while the agent runs. Returns the
+    final status, or the job's current one if another worker has taken it over.
+    """
+    from agent.utils import serialize_result
+
+    payload = job["payload"]
+    worker = job.get("worker")
+    message = f"Running agent (attempt {job['attempts']}/{job['max_attempts']})"
+    queue.set_progress(job["id"], message, worker)
+    finished = threading.Event()
+
+    def renew_lease() -> None:
+        while not finished.wait(queue.lease_seconds / 3):
+            if not queue.set_progress(job["id"], message, worker):
+                return
+
+    if queue.lease_seconds > 0:
+        threading.Thread(target=renew_lease, name=f"lease-{job['id'][:8]}", daemon=True).start()
+    try:
+        if payload.get("meeting_id"):
+            result = agent.reprocess(payload["meeting_id"], payload.get("notes", ""),
+                                     payload.get("attendees", []), payload.get("context", ""))
+        else:
+            result = agent.run_agent(
+                raw_notes=payload.get("notes", ""),
+                attendees=payload.get("attendees", []),
+                context=payload.get("context", ""),
+                prompt_mode=payload.get("prompt_mode"),
+            )
+    except Exception as e:
+        return queue.fail(job["id"], str(e), worker=worker)
+    finally:
+        finished.set()
+
+    record = serialize_result(result)
+    if result.get("success"):
+        if queue.complete(job["id"], record, worker):
+            return SUCCEEDED
+        return queue.get(job["id"])["status"]
+    return queue.fail(job["id"], result.get("error", "Unknown error"),
+                      retryable=result.get("retryable", True), result=record, worker=worker)
+
+
+def run_worker(db_path: str, poll_interval: float = 1.0, max_jobs: Optional[int] = None, agent=None) -> int:
+    """
+    Worker loop: claims and processes jobs until `max_jobs` have been handled
+    (forever when None). A `poll_interval` of 0 drains the queue and returns
+    once it is empty. Returns the number of jobs processed.
+    """
+    if agent is None:
+        from dotenv import load_dotenv
+        from agent.meeting_agent import agent_components_from_env, get_shared_agent
+
+        load_dotenv()
+        # The same cache, calendar, revisions, digests, ... as the app's agent. Workers share the
+        # rate limit via RATE_LIMIT_DB; a degraded upstream fails the attempt so the queue retries
+        # it later, instead of storing a local-only fallback
+        components = agent_components_from_env()
+        components["resilience"].fallback = False
+        agent = get_shared_agent(**components)
+
+    queue = JobQueue(db_path)
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker)
+        if job is None:
+            if poll_interval <= 0:
+                break
+            time.sleep(poll_interval)
+            continue
+        status = process_job(queue, job, agent)
+        processed += 1
+        print(f"[{worker}] job {job['id']} -> {status}")
+    return processed
+
+
+def start_workers(count: int, db_path: str = "jobs.db", poll_interval: float = 1.0) -> List[multiprocessing.Process]:
+    """Spawns `count` daemon worker processes sharing one queue database."""
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=run_worker, args=(db_path, poll_interval), daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m agent.jobs", description="Background job queue for the agent.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="Run worker processes")
+    worker.add_argument("--db", default=os.getenv("JOB_QUEUE_DB", "jobs.db"))
+    worker.add_argument("--workers", type=int, default=1)
+    worker.add_argument("--poll-interval", type=float, default=1.0)
+    status = sub.add_parser("status", help="Show queue counts and recent jobs")
+    status.add_argument("--db", default=os.getenv("JOB_QUEUE_DB", "jobs.db"))
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        queue = JobQueue(args.db)
+        print(json.dumps(queue.stats()))
+        for job in queue.list_jobs(limit=10):
+            print(f"{job['id']}  {job['status']:<9}  attempts={job['attempts']}  {job['progress'] or ''}")
+        return 0
+
+    JobQueue(args.db)  # Create the schema before the workers race for it
+    if args.workers == 1:
+        run_worker(args.db, args.poll_interval)
+        return 0
+    processes = start_workers(args.workers, args.db, args.poll_interval)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
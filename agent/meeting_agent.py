@@ -1,83 +1,1050 @@
+import asyncio
 import os
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List
-from portia import Config, Portia, StorageClass, LLMProvider
-from portia.tool_registry import DefaultToolRegistry
-from portia.cli import CLIExecutionHooks
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from agent.budget import PromptBudgetExceeded, TokenBudget, estimate_tokens
+from agent.cache import ResultCache, make_cache_key
+from agent.deadlines import (DeadlineResolver, deadline_phrases, format_resolved_deadlines, resolve_deadlines,
+                             resolve_phrases, resolver_for, today_in)
+from agent.digests import DigestCoalescer, LocalMailbox, MailBackend, PortiaMailBackend
+from agent.emails import load_alias_directory, normalize_attendees
+from agent.extraction import extract_meeting_items, format_condensed_notes
+from agent.fast_path import FastPath, local_summary, render_summary_email
+from agent.item_index import ActionItemIndex, format_tracked_items
+from agent.models import AgentResult, RunOutput
+from agent.plans import PLAN_INPUTS, PlanTemplateStore, plan_inputs_for, template_key
+from agent.progress import ProgressEvents, attach_progress_hooks
+from agent.resilience import CircuitOpenError, ResilientCaller, is_retryable
+from agent.revisions import RevisionStore, diff_action_items, extract_incrementally, has_changes, item_identity
+from agent.scheduling import (BulkEventScheduler, IdempotencyIndex, LocalCalendarBackend, PortiaCalendarBackend,
+                              item_fingerprint)
+from agent.streaming import stream_extraction
+from agent.tracing import Tracer, attach_tracing_hooks
+from agent.utils import extract_final_output
+
+CONDENSED_NOTES_LABEL = "MEETING NOTES (pre-extracted action items and decisions)"
+NOTIFY_INSTRUCTION = "Draft and send a concise summary email to all attendees."
+DIGEST_NOTIFY_INSTRUCTION = ("Do NOT email anyone. Write a concise summary of the meeting as your final answer; "
+                             "it is sent to the attendees later in one digest with their other meetings.")
+DELTA_NOTIFY_INSTRUCTION = "Draft a short update email to all attendees describing only these changes."
+DIGEST_DELTA_NOTIFY_INSTRUCTION = ("Do NOT email anyone. Write a short update describing only these changes as your "
+                                   "final answer; it is sent to the attendees later in one digest with their other meetings.")
+
 
 class MeetingNotesAgent:
-    def __init__(self):
+    PROMPT_MODES = ("full", "condensed")
+
+    # The only tools the agent ever uses; loading just these keeps startup and planning prompts small
+    AGENT_TOOLS = ["portia:google:gmail:draft_email", "portia:google:gcalendar:create_event"]
+
+    def __init__(self, cache: Optional[ResultCache] = None, prompt_mode: Optional[str] = None, portia=None,
+                 scheduler: Optional[BulkEventScheduler] = None, tracer: Optional[Tracer] = None,
+                 aliases: Optional[Dict[str, List[str]]] = None, revisions: Optional[RevisionStore] = None,
+                 resilience: Optional[ResilientCaller] = None, plan_templates: Optional[PlanTemplateStore] = None,
+                 budget: Optional[TokenBudget] = None, timezone: Optional[str] = None,
+                 locale: Optional[str] = None, item_index: Optional[ActionItemIndex] = None,
+                 digests: Optional[DigestCoalescer] = None, fast_path: Optional[FastPath] = None,
+                 progress: Optional[ProgressEvents] = None):
         """
-        Initializes the Portia AI agent.
-        The agent is configured to use the tools available in the registry,
-        such as Google Calendar, Gmail, etc.
+        Initializes the meeting notes agent.
+        The Portia client (config, tool registry, LLM connection) is built lazily on
+        first use, so creating an agent is cheap; pass `portia` to supply one directly.
+        Pass a ResultCache to reuse summaries of identical submissions.
+        `prompt_mode` is "full" (send the raw notes) or "condensed" (send only the
+        locally pre-extracted action items); it defaults to the PROMPT_MODE env var.
+        With a BulkEventScheduler, deadline items are turned into calendar events in one
+        batched, idempotent call and the agent itself no longer uses the calendar tool.
+        All runs are traced into `tracer` (a fresh Tracer by default).
+        `aliases` maps group addresses to members (see agent.emails.load_alias_directory).
+        `revisions` stores processed meetings by id for reprocess() (in memory by default).
+        With a ResilientCaller, plan runs are rate limited, retried and circuit-broken, and
+        degraded upstreams can be answered from local extraction (see agent.resilience).
+        With a PlanTemplateStore, Portia plans once per prompt shape and later meetings run
+        the stored plan with their notes/attendees as plan inputs (see agent.plans).
+        `budget` trims prompts to a token budget and meters token usage and cost per run
+        (measurement only by default, see agent.budget).
+        Deadline phrases are resolved to dates locally before the prompt is built, relative
+        to today in `timezone` (AGENT_TIMEZONE, default the machine's local time) with
+        numeric dates read per `locale` (AGENT_LOCALE, default en_US; see agent.deadlines).
+        With an ActionItemIndex, items already open from earlier meetings are neither
+        scheduled nor announced again, and every successful run records its items there.
+        With a DigestCoalescer the agent only writes the summary; it is queued per attendee
+        and sent as one digest per person across meetings (see agent.digests).
+        With a FastPath, notes the local extractor fully understands are answered without
+        Portia: the summary is written locally, and only low-confidence notes, or ones that
+        still need the agent's calendar or Gmail tools, are escalated (see agent.fast_path).
+        Runs publish step-level progress events (plan created, steps, tool latency,
+        clarifications) to `progress` (a fresh ProgressEvents by default; see agent.progress).
         """
-        self.config = Config.from_default(
-            storage_class=StorageClass.CLOUD,
-            model="gemini-1.5-flash" , # Using a powerful and fast model
-            llm_provider=LLMProvider.GOOGLE
-        )
-        
-        # This registry gives the agent access to tools like calendar and email.
-        # Ensure your environment is authenticated with Google Cloud for these to work.
-        self.portia = Portia(
-            config=self.config,
-            tools=DefaultToolRegistry(self.config),
-            execution_hooks=CLIExecutionHooks(),
-        )
+        self.cache = cache
+        self.scheduler = scheduler
+        if scheduler is not None and scheduler.backend is None:
+            # Google Calendar through this agent's Portia client, created on first use
+            scheduler.backend = PortiaCalendarBackend(lambda: self.portia, resilience)
+        self.tracer = tracer or Tracer()
+        self.aliases = aliases
+        self.revisions = revisions or RevisionStore()
+        self.resilience = resilience
+        self.plan_templates = plan_templates
+        self.budget = budget or TokenBudget()
+        self.item_index = item_index
+        self.digests = digests
+        self.fast_path = fast_path
+        self.progress = progress or ProgressEvents()
+        self.prompt_mode = _check_prompt_mode(prompt_mode or os.getenv("PROMPT_MODE", "full"))
+        self.timezone = timezone or os.getenv("AGENT_TIMEZONE") or None
+        self.locale = locale or os.getenv("AGENT_LOCALE", "en_US")
+        self._portia = portia
+        self._portia_lock = threading.Lock()
+
+    @property
+    def portia(self):
+        """The Portia client, created on first access (thread-safe)."""
+        if self._portia is None:
+            with self._portia_lock:
+                if self._portia is None:
+                    tool_ids = list(self.AGENT_TOOLS)
+                    if self.scheduler is not None and isinstance(self.scheduler.backend, PortiaCalendarBackend):
+                        tool_ids += [tool for tool in PortiaCalendarBackend.TOOL_IDS if tool not in tool_ids]
+                    self._portia = build_portia_client(tool_ids, self.tracer, self.progress)
+        return self._portia
+
+    @property
+    def config(self):
+        return self.portia.config
+
+    def deadline_resolver(self) -> DeadlineResolver:
+        """Today's shared deadline resolver for the agent's timezone and locale."""
+        return resolver_for(today_in(self.timezone), self.timezone, self.locale)
 
-        # --- Add this debug line ---
-        api_key = os.getenv("GOOGLE_API_KEY")
-        print(f"--- DEBUG: GOOGLE_API_KEY loaded as: {api_key} ---")
-        # 
+    def flush_digests(self, force: bool = False) -> Dict:
+        """Sends the digests that are due (all queued ones with `force`); see agent.digests."""
+        if self.digests is None:
+            return {"sent": [], "backend_calls": 0}
+        return self.digests.flush(self._mail_backend(), force=force)
+
+    def _mail_backend(self) -> MailBackend:
+        return self.digests.backend or PortiaMailBackend(self.portia, self.resilience)
+
+    @contextmanager
+    def _run_events(self, root: Dict):
+        """Brackets a run with "run_started"/"run_finished" progress events."""
+        self.progress.emit("run_started", root["trace_id"])
+        try:
+            yield
+        except BaseException as e:
+            self.progress.emit("run_finished", root["trace_id"], error=str(e) or type(e).__name__)
+            raise
+        self.progress.emit("run_finished", root["trace_id"])
 
     # In agent/meeting_agent.py
 
-    def run_agent(self, raw_notes: str, attendees: List[str], context: str = "") -> Dict:
+    def run_agent(self, raw_notes: str, attendees: List[str], context: str = "",
+                  prompt_mode: Optional[str] = None, extract: Optional[Dict] = None) -> AgentResult:
         """
         Main method to process notes, create events, and send follow-ups in one go.
         Supports demo mode for testing without authentication.
+        `prompt_mode` overrides the agent-wide setting for this call.
+        Every stage is traced; the result carries the trace id and per-stage timings.
+        Returns an AgentResult (see agent.models), which also supports the old dict keys.
         """
-        
+        with self.tracer.span("agent.run", mode="sync") as root, self._run_events(root):
+            result = self._run_traced(raw_notes, attendees, context, prompt_mode, extract)
+        return self._attach_timings(result, root)
+
+    def _run_traced(self, raw_notes: str, attendees: List[str], context: str,
+                    prompt_mode: Optional[str], extract: Optional[Dict]) -> AgentResult:
+        prepared, error = self._prepare_run(raw_notes, attendees, context, prompt_mode, extract)
+        if error:
+            return error
+
+        cached = self._cache_lookup(prepared)
+        if cached:
+            return cached
+
+        try:
+            if self.scheduler is not None:
+                with self.tracer.span("calendar_batch"):
+                    prepared["calendar"] = self._schedule_events(prepared)
+            if self._routed_locally(prepared):
+                plan_run = self._local_run(prepared)
+            else:
+                print("DEBUG - About to call self.portia.run()")
+                with self.tracer.span("execute", demo_mode=prepared["demo_mode"]):
+                    plan_run = self._execute(prepared)
+            self._cache_store(prepared, plan_run)
+            return self._success_result(plan_run, prepared)
+        except Exception as e:
+            return self._error_result(e, prepared)
+
+    async def arun_agent(self, raw_notes: str, attendees: List[str], context: str = "",
+                         timeout: Optional[float] = None, prompt_mode: Optional[str] = None) -> AgentResult:
+        """
+        Asyncio counterpart of run_agent.
+        Uses Portia's native async API when available so many plan runs can be in
+        flight on one event loop; otherwise the blocking call runs in a worker thread.
+        Returns a failure result when `timeout` seconds elapse. Cancelling the awaiting
+        task propagates CancelledError to the caller as usual.
+        """
+        with self.tracer.span("agent.run", mode="async") as root, self._run_events(root):
+            result = await self._arun_traced(raw_notes, attendees, context, timeout, prompt_mode)
+        return self._attach_timings(result, root)
+
+    async def _arun_traced(self, raw_notes: str, attendees: List[str], context: str,
+                           timeout: Optional[float], prompt_mode: Optional[str]) -> AgentResult:
+        prepared, error = self._prepare_run(raw_notes, attendees, context, prompt_mode)
+        if error:
+            return error
+
+        cached = self._cache_lookup(prepared)
+        if cached:
+            return cached
+
+        try:
+            if self.scheduler is not None:
+                with self.tracer.span("calendar_batch"):
+                    prepared["calendar"] = await asyncio.to_thread(self._schedule_events, prepared)
+            if self._routed_locally(prepared):
+                plan_run = self._local_run(prepared)
+            else:
+                with self.tracer.span("execute", demo_mode=prepared["demo_mode"]):
+                    plan_run = await asyncio.wait_for(self._aexecute(prepared), timeout)
+            self._cache_store(prepared, plan_run)
+            return self._success_result(plan_run, prepared)
+        except asyncio.TimeoutError:
+            print(f"Agent run timed out after {timeout}s")
+            return AgentResult.failure(f"Agent run timed out after {timeout} seconds.",
+                                       "The agent took too long to respond. Please try again.",
+                                       timed_out=True)
+        except asyncio.CancelledError:
+            print("DEBUG - Agent run cancelled")
+            raise
+        except Exception as e:
+            return self._error_result(e, prepared)
+
+    def stream_agent(self, raw_notes: str, attendees: List[str], context: str = "",
+                     segment_chars: int = 4000, overlap_lines: int = 2,
+                     prompt_mode: str = "condensed") -> Iterator[Dict]:
+        """
+        Processes long transcripts in overlapping segments.
+        Yields {"type": "partial", ...} events as each segment is extracted locally
+        (new items plus the merged, de-duplicated totals), then a single
+        {"type": "final", "result": ...} event once the agent has run on the merged
+        condensed extract instead of the full transcript. Sending the whole transcript
+        takes an explicit prompt_mode="full", and is only bounded by PROMPT_TOKEN_BUDGET.
+        """
+        merged = None
+        for event in stream_extraction(raw_notes, segment_chars, overlap_lines):
+            merged = event["merged"]
+            yield {"type": "partial", **event}
+
+        result = self.run_agent(raw_notes, attendees, context, prompt_mode=prompt_mode, extract=merged)
+        yield {"type": "final", "result": result}
+
+    def reprocess(self, meeting_id: str, raw_notes: str, attendees: List[str], context: str = "") -> AgentResult:
+        """
+        Diff-aware run for notes that are edited and resubmitted under the same `meeting_id`.
+        Only sections that changed since the stored revision are re-extracted, and only
+        the created/updated/cancelled action items are acted on: with a scheduler the
+        calendar is reconciled in place, and the agent gets a short delta prompt.
+        Edits that change no action item (typos, chatter) reuse the previous summary
+        without any API call. The first submission of a meeting is a regular full run.
+        The result carries "delta", "revision" and the changed/reused section counts.
+        """
+        with self.tracer.span("agent.run", mode="incremental") as root, self._run_events(root):
+            result = self._reprocess_traced(meeting_id, raw_notes, attendees, context)
+        return self._attach_timings(result, root)
+
+    def _reprocess_traced(self, meeting_id: str, raw_notes: str, attendees: List[str], context: str) -> AgentResult:
+        with self.tracer.span("validate"):
+            valid_emails, error = self._validate_input(raw_notes, attendees)
+        if error:
+            return error
+
+        previous = self.revisions.get(meeting_id)
+        events = previous["events"] if previous else {}
+        if previous is not None and previous["version"] == 0:
+            previous = None  # Only the events of a failed first submission were stored: process it in full
+        with self.tracer.span("extract") as span:
+            extract, sections, changed = extract_incrementally(raw_notes, previous["sections"] if previous else None)
+            span["attributes"]["changed_sections"] = len(changed)
+        delta = diff_action_items(previous["items"] if previous else [], extract["action_items"])
+        details = {
+            "meeting_id": meeting_id,
+            "incremental": previous is not None,
+            "delta": delta,
+            "changed_sections": len(changed),
+            "reused_sections": len(sections) - len(changed),
+        }
+
+        if previous is not None and not has_changes(delta):
+            print("DEBUG - Edit did not change any action item, reusing the previous summary")
+            revision = self.revisions.save(meeting_id, raw_notes, sections, extract["action_items"], events,
+                                           previous["plan_id"], previous["final_output"])
+            result = AgentResult(
+                success=True,
+                summary=previous["final_output"] or "",
+                plan_id=previous["plan_id"],
+                timestamp=datetime.now().isoformat(),
+                demo_mode=os.getenv("DEMO_MODE", "").lower() == "true",
+                prompt_mode="delta",
+                extra={"calendar": None, "revision": revision, "unchanged": True, **details},
+            )
+            result.set_extract(extract)
+            return result
+
+        with self.tracer.span("prompt_build") as span:
+            if previous is None:
+                try:
+                    prepared = self._build_prepared(raw_notes, valid_emails, context, None, extract)
+                except PromptBudgetExceeded as e:
+                    return _budget_error(e)
+            else:
+                prepared = self._build_delta_prepared(raw_notes, valid_emails, context, extract, delta, changed)
+            span["attributes"]["prompt_chars"] = len(prepared["task"])
+            span["attributes"]["prompt_tokens"] = estimate_tokens(prepared["task"])
+
+        try:
+            if self.scheduler is not None:
+                with self.tracer.span("calendar_batch"):
+                    calendar = self.scheduler.reconcile(events, extract["action_items"], valid_emails)
+                events = calendar.pop("events")
+                prepared["calendar"] = calendar
+                # Persisted before the agent runs: a retry after a failure reconciles against these events
+                self.revisions.save_events(meeting_id, events)
+            with self.tracer.span("execute", demo_mode=prepared["demo_mode"]):
+                plan_run = self._execute(prepared)
+        except Exception as e:
+            # The revision itself is not stored, so the next submission is diffed against the last good one
+            return self._error_result(e, prepared)
+
+        revision = self.revisions.save(meeting_id, raw_notes, sections, extract["action_items"], events,
+                                       getattr(plan_run, "id", None), extract_final_output(plan_run))
+        result = self._success_result(plan_run, prepared)
+        result.extra.update(details, revision=revision, unchanged=False)
+        if self.item_index is not None and previous is not None:
+            result.extra["tracked"] = self._track_delta(delta, events, result.plan_id)
+        return result
+
+    def _track_delta(self, delta: Dict, events: Dict[str, Dict], source: Optional[str]) -> Dict[str, int]:
+        """
+        Keeps the item index in line with an edited meeting: created and changed items
+        are recorded (with their calendar event), and items removed from the notes, or
+        reassigned to someone else, close their earlier entry.
+        """
+        closed = 0
+        stale = delta["cancelled"] + [{**item, **item["previous"]} for item in delta["updated"]
+                                      if item["previous"]["owner"] != item.get("owner")]
+        for item in stale:
+            found = self.item_index.match(item)
+            if found is not None and self.item_index.close(found[0]["id"]):
+                closed += 1
+        changed = [{**item, "event_id": events.get(item_identity(item), {}).get("event_id") or item.get("event_id")}
+                   for item in delta["created"] + delta["updated"]]
+        counts = self.item_index.record(changed, source=source)
+        counts["closed"] = closed
+        return counts
+
+    def _build_delta_prepared(self, raw_notes: str, valid_emails: List[str], context: str,
+                              extract: Dict, delta: Dict, changed: List[str]) -> Dict:
+        """Prompt for an edited meeting: the current items, the changed sections and the item delta only."""
+        demo_mode = os.getenv("DEMO_MODE", "").lower() == "true"
+        resolver = self.deadline_resolver()
+        current_date = resolver.reference.isoformat()
+        resolve_deadlines(extract, resolver)
+
+        tools = [tool for tool in self.AGENT_TOOLS if "gcalendar" not in tool]
+        schedule_instruction = ("Calendar changes were already applied separately. "
+                                "Do NOT create, move or delete any calendar events yourself.")
+        if self.scheduler is None:
+            tools = list(self.AGENT_TOOLS)
+            schedule_instruction = ("Use your calendar tool to create events ONLY for NEW items with a deadline. "
+                                    "Do not recreate events for items that were already scheduled.")
+        notify_instruction = DELTA_NOTIFY_INSTRUCTION
+        if self.digests is not None:
+            tools = [tool for tool in tools if "gmail" not in tool]
+            notify_instruction = DIGEST_DELTA_NOTIFY_INSTRUCTION
+
+        change_lines = []
+        for item in delta["created"]:
+            change_lines.append(f"- NEW: {item['task']} (owner: {item.get('owner') or 'unassigned'}, "
+                                f"due: {item.get('deadline') or 'none'})")
+        for item in delta["updated"]:
+            old = item["previous"]
+            change_lines.append(f"- UPDATED: {item['task']} (owner: {old['owner'] or 'unassigned'} -> "
+                                f"{item.get('owner') or 'unassigned'}, due: {old['deadline'] or 'none'} -> "
+                                f"{item.get('deadline') or 'none'})")
+        for item in delta["cancelled"]:
+            change_lines.append(f"- CANCELLED: {item['task']}")
+        changes_block = "\n".join(change_lines)
+        changed_block = "\n\n".join(changed)
+
+        task = f"""
+        ROLE: You are a professional meeting assistant AI. The notes of a meeting you already processed
+        were edited. Act ONLY on what changed.
+
+        CONTEXT:
+        - Today's date is {current_date}. Use this to resolve relative dates like 'today', 'tomorrow', 'next week'.
+        - {context}
+        - DEMO MODE: {demo_mode}
+
+        CURRENT ACTION ITEMS AND DECISIONS:
+        ---
+        {format_condensed_notes(extract)}
+        ---
+
+        EDITED SECTIONS OF THE NOTES:
+        ---
+        {changed_block}
+        ---
+
+        ACTION ITEM CHANGES:
+        {changes_block}
+
+        MEETING ATTENDEES (email addresses):
+        - {', '.join(valid_emails)}
+
+        INSTRUCTIONS:
+        1.  **Schedule**: {schedule_instruction}
+        2.  **Notify**: {notify_instruction}
+        """
+        print(f"DEBUG - Delta task content length: {len(task)} characters")
+
+        return {
+            "task": task,
+            "tools": tools,
+            "raw_notes": raw_notes,
+            "valid_emails": valid_emails,
+            "demo_mode": demo_mode,
+            "prompt_mode": "delta",
+            "extract": extract,
+            "current_date": current_date,
+            "digest": self.digests is not None,
+        }
+
+    def _prepare_run(self, raw_notes: str, attendees: List[str], context: str,
+                     prompt_mode: Optional[str] = None,
+                     extract: Optional[Dict] = None) -> Tuple[Optional[Dict], Optional[AgentResult]]:
+        """
+        Validates the input and builds the task prompt.
+        A precomputed `extract` (e.g. merged from streamed segments) is used as-is
+        instead of re-extracting the whole notes.
+        Returns (prepared_run, None) on success or (None, error_result) on invalid input.
+        """
+        with self.tracer.span("validate"):
+            valid_emails, error = self._validate_input(raw_notes, attendees)
+        if error:
+            return None, error
+        with self.tracer.span("prompt_build") as span:
+            try:
+                prepared = self._build_prepared(raw_notes, valid_emails, context, prompt_mode, extract)
+            except PromptBudgetExceeded as e:
+                return None, _budget_error(e)
+            span["attributes"]["prompt_chars"] = len(prepared["task"])
+            span["attributes"]["prompt_tokens"] = estimate_tokens(prepared["task"])
+        root = self.tracer.current_span()
+        # First feedback for the user: what was found locally, long before the plan is ready
+        self.progress.emit("prepared", root["trace_id"] if root else None, prompt_mode=prepared["prompt_mode"],
+                           action_items=len(prepared["extract"]["action_items"]))
+        return prepared, None
+
+    def _validate_input(self, raw_notes: str, attendees: List[str]) -> Tuple[List[str], Optional[AgentResult]]:
+        """Returns (valid_emails, None), or ([], error_result) when the input is unusable."""
         # Input validation
         if not raw_notes or not raw_notes.strip():
-            return {
-                "success": False,
-                "error": "Meeting notes cannot be empty.",
-                "result": "Please provide valid meeting notes."
-            }
+            return [], AgentResult.failure("Meeting notes cannot be empty.",
+                                          "Please provide valid meeting notes.",
+                                          retryable=False)
         
         if not attendees:
-            return {
-                "success": False,
-                "error": "At least one attendee email is required.",
-                "result": "Please provide at least one attendee email address."
-            }
+            return [], AgentResult.failure("At least one attendee email is required.",
+                                          "Please provide at least one attendee email address.",
+                                          retryable=False)
         
-        # Validate email format for attendees
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        valid_emails = []
-        for email in attendees:
-            if re.match(email_pattern, email):
-                valid_emails.append(email)
-            else:
-                print(f"Warning: Invalid email format: {email}")
+        # Validate, normalize and de-duplicate attendees (expanding group aliases) in one pass
+        valid_emails, invalid = normalize_attendees(attendees, self.aliases)
+        if invalid:
+            shown = ", ".join(invalid[:5]) + (f" (+{len(invalid) - 5} more)" if len(invalid) > 5 else "")
+            print(f"Warning: {len(invalid)} invalid email address(es) skipped: {shown}")
         
         if not valid_emails:
-            return {
-                "success": False,
-                "error": "No valid email addresses provided.",
-                "result": "Please provide valid email addresses for attendees."
-            }
-        
+            return [], AgentResult.failure("No valid email addresses provided.",
+                                          "Please provide valid email addresses for attendees.",
+                                          retryable=False)
+        return valid_emails, None
+
+    def _build_prepared(self, raw_notes: str, valid_emails: List[str], context: str,
+                        prompt_mode: Optional[str], extract: Optional[Dict]) -> Dict:
+        """Builds the task prompt and everything the execution stages need."""
         # Check for demo mode
         demo_mode = os.getenv("DEMO_MODE", "").lower() == "true"
         
         # --- Get the current date to provide context to the agent ---
-        current_date = datetime.now().strftime("%Y-%m-%d")
+        resolver = self.deadline_resolver()
+        current_date = resolver.reference.isoformat()
 
-        task = f"""
+        # --- The local extraction, done once per run: every later stage and the result reuse it ---
+        extract = extract or extract_meeting_items(raw_notes)
+        resolve_deadlines(extract, resolver)
+
+        # --- Calendar events are either created by the agent or batched locally ---
+        tools = list(self.AGENT_TOOLS)
+        schedule_instruction = "For every action item with a deadline, use your calendar tool to create a Google Calendar event."
+        if self.scheduler is not None:
+            tools = [tool for tool in tools if "gcalendar" not in tool]
+            schedule_instruction = ("Calendar events for deadline items are created separately in one batch. "
+                                    "Do NOT create any calendar events yourself; just mention them in the summary.")
+        notify_instruction = NOTIFY_INSTRUCTION
+        if self.digests is not None:
+            tools = [tool for tool in tools if "gmail" not in tool]
+            notify_instruction = DIGEST_NOTIFY_INSTRUCTION
+
+        # --- Decide how much of the notes the model actually needs to see ---
+        prompt_mode = _check_prompt_mode(prompt_mode or self.prompt_mode)
+        notes_block = raw_notes
+        if prompt_mode == "condensed":
+            if extract["action_items"] or extract["decisions"]:
+                notes_block = format_condensed_notes(extract)
+            else:
+                # Nothing recognisable locally: let the model read everything
+                print("DEBUG - Local pre-extraction found nothing, falling back to full notes")
+                prompt_mode = "full"
+
+        # --- Items still open from earlier meetings are flagged instead of duplicated ---
+        tracked = None
+        tracked_block = ""
+        if self.item_index is not None:
+            classified = self.item_index.classify(extract["action_items"])
+            for item, entry in zip(extract["action_items"], classified):
+                item["tracked"] = entry["status"]
+                if entry["match"] is not None:
+                    item["event_id"] = entry["match"]["event_id"]  # Its calendar event, if it was scheduled
+            tracked = {status: sum(1 for entry in classified if entry["status"] == status)
+                       for status in ("new", "duplicate", "updated")}
+            repeated = [(item, entry) for item, entry in zip(extract["action_items"], classified)
+                        if entry["status"] != "new"]
+            tracked_block = format_tracked_items(repeated) if repeated else ""
+
+        # --- Fit the notes and attendee list into the prompt token budget ---
+        def condense() -> Optional[str]:
+            if extract["action_items"] or extract["decisions"]:
+                return format_condensed_notes(extract)
+            return None
+
+        # Full notes get a table of their deadline phrases and dates (condensed items carry theirs inline)
+        deadlines_block = ""
+        if prompt_mode == "full":
+            resolved = resolve_phrases(deadline_phrases(raw_notes), resolver)
+            deadlines_block = format_resolved_deadlines(resolved) if resolved else ""
+
+        overhead = estimate_tokens(_task_text(current_date, context, demo_mode, CONDENSED_NOTES_LABEL, "", "",
+                                              schedule_instruction, notify_instruction))
+        overhead += estimate_tokens(deadlines_block) + estimate_tokens(tracked_block)
+        fitted = self.budget.fit(notes_block, valid_emails, overhead, condense if prompt_mode == "full" else None)
+        notes_block = fitted["notes_block"]
+        if fitted["condensed"]:
+            prompt_mode = "condensed"
+            deadlines_block = ""
+        notes_block = "\n\n".join(block for block in (notes_block, deadlines_block, tracked_block) if block)
+        if fitted["steps"]:
+            print(f"DEBUG - Prompt trimmed to fit the token budget: {', '.join(fitted['steps'])}")
+        notes_label = CONDENSED_NOTES_LABEL if prompt_mode == "condensed" else "MEETING NOTES"
+
+        task = _task_text(current_date, context, demo_mode, notes_label, notes_block,
+                          fitted["attendees_text"], schedule_instruction, notify_instruction)
+        
+        print("🤖 Portia Agent is planning and executing the task...")
+        print(f"DEBUG - Task content length: {len(task)} characters, ~{estimate_tokens(task)} tokens ({prompt_mode} prompt)")
+        print(f"DEBUG - Valid emails: {valid_emails}")
+        print(f"DEBUG - Demo mode: {demo_mode}")
+
+        return {
+            "task": task,
+            "tools": tools,
+            "raw_notes": raw_notes,
+            "valid_emails": valid_emails,
+            "demo_mode": demo_mode,
+            "prompt_mode": prompt_mode,
+            "extract": extract,
+            "current_date": current_date,
+            "notes_block": notes_block,
+            "attendees_text": fitted["attendees_text"],
+            "trimmed": fitted["steps"],
+            "tokens_saved": fitted["tokens_saved"],
+            "tracked": tracked,
+            "template_task": _task_text("$current_date", context, demo_mode, notes_label, "$meeting_notes",
+                                        "$attendees", schedule_instruction, notify_instruction),
+            "digest": self.digests is not None,
+            # Everything besides the notes and attendees that changes what the agent is asked to do: the prompt's
+            # instructions (batched calendar, digests), its tools, the already tracked items, how the budget trims
+            # the prompt and whether the fast path answers instead
+            "cache_key": make_cache_key(raw_notes, valid_emails, context, current_date,
+                                        demo_mode=demo_mode, prompt_mode=prompt_mode, tools=sorted(tools),
+                                        instructions=_task_text("", context, demo_mode, notes_label, "", "",
+                                                                schedule_instruction, notify_instruction),
+                                        tracked=tracked_block,
+                                        budget=[self.budget.max_prompt_tokens, self.budget.max_attendees],
+                                        fast_path=[self.fast_path.threshold, self.fast_path.max_lines]
+                                        if self.fast_path is not None else None),
+        }
+
+    def _routed_locally(self, prepared: Dict) -> bool:
+        """Asks the fast path whether this run can skip Portia; the decision is kept in `prepared`."""
+        if self.fast_path is None:
+            return False
+        blockers = []
+        if not prepared["demo_mode"]:
+            # Outside demo mode the tools must really run; only local ones can stand in for the agent's
+            if self.scheduler is None and any(item.get("deadline") for item in prepared["extract"]["action_items"]):
+                blockers.append("calendar events need the agent")
+            if self.digests is None:
+                blockers.append("summary email needs the agent")
+        with self.tracer.span("fast_path") as span:
+            decision = self.fast_path.route(prepared["raw_notes"], prepared["extract"], blockers)
+            span["attributes"]["local"] = decision["local"]
+            span["attributes"]["confidence"] = decision["confidence"]
+        prepared["fast_path"] = decision
+        if not decision["local"]:
+            print(f"DEBUG - Fast path escalated to the agent: {'; '.join(decision['reasons']) or 'low confidence'}")
+        return decision["local"]
+
+    def _local_run(self, prepared: Dict) -> RunOutput:
+        """The fast path's stand-in for a plan run: a summary written from the local extraction."""
+        print(f"DEBUG - Fast path: handled locally (confidence {prepared['fast_path']['confidence']:.2f})")
+        return RunOutput(None, local_summary(prepared["extract"]))
+
+    def _schedule_events(self, prepared: Dict) -> Optional[Dict]:
+        """Creates calendar events for deadline items in one batch (skipping ones already created)."""
+        if self.scheduler is None:
+            return None
+        # Items already open from an earlier meeting (see agent.item_index) were scheduled back then: repeats
+        # are skipped, and a changed deadline moves the earlier event instead of creating a second one
+        items = [item for item in prepared["extract"]["action_items"] if item.get("tracked") != "duplicate"]
+        moved = {item["event_id"]: item for item in items
+                 if item.get("tracked") == "updated" and item.get("event_id") and item.get("deadline")}
+        fresh = [item for item in items if not (item.get("event_id") and item.get("event_id") in moved)]
+        calendar = self.scheduler.schedule(prepared["raw_notes"], fresh, prepared["valid_emails"])
+        for item in fresh:
+            item["event_id"] = calendar["event_ids"].get(item_fingerprint(item)) or item.get("event_id")
+        if moved:
+            calendar["updated"] = self.scheduler.update(moved, prepared["valid_emails"])
+            calendar["backend_calls"] += 1
+        print(f"DEBUG - Calendar batch: {len(calendar['created'])} created, {len(moved)} moved, "
+              f"{len(calendar['skipped'])} already existed")
+        return calendar
+
+    def _cache_lookup(self, prepared: Dict) -> Optional[Dict]:
+        """Returns a result built from the cache, or None on a miss (or with no cache configured)."""
+        if self.cache is None:
+            return None
+        with self.tracer.span("cache_lookup") as span:
+            entry = self.cache.get(prepared["cache_key"])
+            span["attributes"]["hit"] = entry is not None
+        if entry is None:
+            return None
+
+        print("DEBUG - Cache hit, reusing previous summary without re-running tools")
+        result = self._success_result(RunOutput(entry["plan_id"], entry["final_output"]), prepared, billable=False)
+        result.extra["cached"] = True
+        result.extra["cached_at"] = datetime.fromtimestamp(entry["created_at"]).isoformat()
+        return result
+
+    def _cache_store(self, prepared: Dict, plan_run) -> None:
+        if self.cache is None:
+            return
+        final_output = extract_final_output(plan_run)
+        if final_output:
+            self.cache.set(prepared["cache_key"], getattr(plan_run, "id", None), final_output)
+
+    def _execute(self, prepared: Dict):
+        """Runs the prepared task through Portia (or the demo simulation) and returns the plan run."""
+        if prepared["demo_mode"]:
+            # Simulate agent response for demo purposes
+            print("DEBUG - Running in demo mode (simulated response)")
+            # Optional artificial latency so batch runs can be load-tested offline
+            demo_latency = _demo_latency()
+            if demo_latency > 0:
+                time.sleep(demo_latency)
+            plan_run = _demo_plan_run(prepared["valid_emails"])
+            print("DEBUG - Demo mode simulation completed successfully")
+            return plan_run
+
+        # Real agent execution
+        if self._uses_plan_template(prepared):
+            plan = self._template_plan(prepared)
+            plan_run = self._call_upstream(self.portia.run_plan, plan,
+                                           end_user="meeting_organizer",
+                                           plan_run_inputs=plan_inputs_for(prepared))
+            print("DEBUG - self.portia.run_plan() completed successfully (cached plan template)")
+            return plan_run
+
+        plan_run = self._call_upstream(self.portia.run, prepared["task"],
+                                       end_user="meeting_organizer",
+                                       tools=prepared["tools"])
+        print("DEBUG - self.portia.run() completed successfully")
+        return plan_run
+
+    def _call_upstream(self, fn, *args, **kwargs):
+        if self.resilience is not None:
+            return self.resilience.call(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    def _uses_plan_template(self, prepared: Dict) -> bool:
+        return self.plan_templates is not None and "template_task" in prepared
+
+    def _template_plan(self, prepared: Dict):
+        """The cached plan for this prompt shape, planning (one LLM call) and storing it on a miss."""
+        key = template_key(prepared["template_task"], prepared["tools"])
+        with self.tracer.span("plan_template") as span:
+            plan = self.plan_templates.get(key, self.portia)
+            span["attributes"]["hit"] = plan is not None
+            if plan is None:
+                print("DEBUG - No plan template for these options yet, planning once")
+                plan = self._call_upstream(self.portia.plan, prepared["template_task"],
+                                           tools=prepared["tools"],
+                                           plan_inputs=PLAN_INPUTS)
+                self.plan_templates.set(key, plan)
+        return plan
+
+    async def _aexecute(self, prepared: Dict):
+        """Async version of _execute that never blocks the event loop."""
+        if prepared["demo_mode"]:
+            demo_latency = _demo_latency()
+            if demo_latency > 0:
+                await asyncio.sleep(demo_latency)
+            return _demo_plan_run(prepared["valid_emails"])
+
+        arun = getattr(self.portia, "arun", None)
+        if arun is not None and asyncio.iscoroutinefunction(arun) and not self._uses_plan_template(prepared):
+            if self.resilience is not None:
+                return await self.resilience.acall(arun, prepared["task"],
+                                                   end_user="meeting_organizer",
+                                                   tools=prepared["tools"])
+            return await arun(prepared["task"],
+                              end_user="meeting_organizer",
+                              tools=prepared["tools"])
+
+        # Older Portia releases are sync-only (and run_plan is sync): park the blocking call on a worker thread.
+        # Cancellation then stops the wait, but the thread finishes its current call.
+        return await asyncio.to_thread(self._execute, prepared)
+
+    def _attach_timings(self, result: AgentResult, root: Dict) -> AgentResult:
+        result.trace_id = root["trace_id"]
+        result.timings = self.tracer.timings(root["trace_id"])
+        return result
+
+    def _success_result(self, plan_run, prepared: Dict, billable: bool = True) -> AgentResult:
+        """
+        Reduces the plan run to plain data; no Portia object is kept in the result.
+        Billable runs (not cache hits) have their token usage measured and metered, and
+        their action items recorded in the item index. Runs handled by the fast path send
+        no prompt, so they are recorded but not metered.
+        """
+        summary = extract_final_output(plan_run)
+        result = AgentResult(
+            success=True,
+            summary=summary,
+            plan_id=getattr(plan_run, "id", None),
+            timestamp=datetime.now().isoformat(),
+            demo_mode=prepared["demo_mode"],
+            prompt_mode=prepared["prompt_mode"],
+            prompt_chars=len(prepared["task"]),
+        )
+        result.set_extract(prepared["extract"])
+        result.set_calendar(prepared.get("calendar"))
+        if prepared.get("tracked") is not None:
+            result.extra["tracked"] = prepared["tracked"]
+            if billable:
+                self.item_index.record(prepared["extract"]["action_items"], source=result.plan_id)
+        if prepared.get("digest") and billable:
+            result.extra["digest"] = self._queue_digest(prepared, summary)
+        fast_path = prepared.get("fast_path")
+        local = bool(fast_path and fast_path["local"])
+        if fast_path is not None:
+            result.extra["fast_path"] = fast_path
+        if billable and not local:
+            result.tokens = self.budget.measure(
+                prepared["task"], summary,
+                parts={"notes": prepared.get("notes_block", ""), "attendees": prepared.get("attendees_text", "")},
+                trimmed=prepared.get("trimmed"), tokens_saved=prepared.get("tokens_saved", 0),
+            )
+        if local:
+            # Nothing was sent to the model; the summary email is rendered locally as well
+            result.prompt_chars = 0
+            result.email_draft = render_summary_email(prepared["extract"], prepared["valid_emails"],
+                                                      prepared["current_date"])
+        # Drafts the agent creates live in Gmail; their text is not part of the plan run's output
+        return result
+
+    def _queue_digest(self, prepared: Dict, summary: str) -> Dict:
+        """Queues the summary for every attendee and sends the digests that are now due."""
+        extract = prepared["extract"]
+        meta = extract.get("context", {})
+        meeting = meta.get("title") or f"{meta.get('meeting_type', 'Meeting')} on {prepared['current_date']}"
+        # Items repeated unchanged from an earlier meeting were in that meeting's digest already
+        items = [item for item in extract["action_items"] if item.get("tracked") != "duplicate"]
+        queued = self.digests.add(prepared["valid_emails"], meeting, summary, items)
+        report = {"queued_for": queued, "sent": []}
+        if prepared["demo_mode"] and self.digests.backend is None:
+            return report  # Nothing to send through in demo mode; flush_digests() with a backend later
+        try:
+            report["sent"] = self.digests.flush(self._mail_backend())["sent"]
+        except Exception as e:
+            # The meeting itself succeeded; its digest stays queued for the next flush
+            print(f"Warning: sending digests failed, they stay queued: {e}")
+            report["error"] = str(e)
+        return report
+
+    def _error_result(self, e: Exception, prepared: Dict) -> AgentResult:
+        print(f"An error occurred: {e}")
+        error_msg = str(e)
+        demo_mode = prepared["demo_mode"]
+        degraded = isinstance(e, CircuitOpenError) or is_retryable(e)
+
+        if degraded and self.resilience is not None and self.resilience.fallback:
+            return self._fallback_result(e, prepared)
+        
+        # Check if this is an authentication error that can be handled in demo mode
+        if demo_mode and ("authentication" in error_msg.lower() or "oauth" in error_msg.lower()):
+            print("DEBUG - Authentication error in demo mode, providing simulated response")
+            return AgentResult(
+                success=True,
+                summary="DEMO MODE: Authentication would be required here for real Google Calendar and Gmail access. Agent identified action items in the meeting notes.",
+                plan_id="demo-auth-plan",
+                timestamp=datetime.now().isoformat(),
+                demo_mode=True,
+                extra={"auth_required": True},
+            )
+        
+        return AgentResult.failure(error_msg, f"Failed to process meeting notes: {error_msg}", retryable=degraded)
+
+    def _fallback_result(self, e: Exception, prepared: Dict) -> AgentResult:
+        """Answers from local extraction while the upstream is degraded; nothing is cached or sent."""
+        print(f"DEBUG - Upstream degraded ({e}), falling back to local extraction")
+        self.resilience.record_fallback()
+        extract = prepared["extract"]
+        summary = ("The AI service is temporarily unavailable, so no emails were drafted. "
+                   "Action items found locally:\n\n" + format_condensed_notes(extract))
+        result = AgentResult(
+            success=True,
+            summary=summary,
+            timestamp=datetime.now().isoformat(),
+            demo_mode=prepared["demo_mode"],
+            prompt_mode=prepared["prompt_mode"],
+            prompt_chars=len(prepared["task"]),
+            extra={"fallback": True, "degraded_reason": str(e)},
+        )
+        result.set_extract(extract)
+        result.set_calendar(prepared.get("calendar"))
+        return result
+
+    def run_batch(self, items: List[Dict], max_concurrency: int = 4) -> Dict:
+        """
+        Processes many meetings through run_agent on a bounded thread pool.
+        Each item is a dict with "notes" (or "raw_notes"), "attendees" (list or
+        comma-separated string) and an optional "context".
+        Results are returned in input order together with aggregate throughput stats.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        def process(index: int, item: Dict) -> AgentResult:
+            started = time.perf_counter()
+            try:
+                notes, attendees, context = _coerce_batch_item(item)
+                result = self.run_agent(notes, attendees, context)
+            except Exception as e:
+                # One bad meeting must not take down the whole batch
+                result = AgentResult.failure(str(e), f"Failed to process meeting notes: {e}")
+            result["index"] = index
+            result["duration"] = time.perf_counter() - started
+            return result
+
+        batch_start = time.perf_counter()
+        workers = min(max_concurrency, len(items)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meeting-batch") as pool:
+            # map() yields in submission order, so results line up with the input
+            results = list(pool.map(process, range(len(items)), items))
+        wall_time = time.perf_counter() - batch_start
+
+        return {"results": results, "stats": _batch_stats(results, workers, wall_time)}
+
+    async def arun_batch(self, items: List[Dict], max_concurrency: int = 16,
+                         timeout: Optional[float] = None) -> Dict:
+        """
+        Asyncio version of run_batch: overlaps up to `max_concurrency` arun_agent
+        calls on the running event loop. `timeout` applies to each meeting.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def process(index: int, item: Dict) -> AgentResult:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    notes, attendees, context = _coerce_batch_item(item)
+                    result = await self.arun_agent(notes, attendees, context, timeout=timeout)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result = AgentResult.failure(str(e), f"Failed to process meeting notes: {e}")
+                result["index"] = index
+                result["duration"] = time.perf_counter() - started
+                return result
+
+        batch_start = time.perf_counter()
+        results = await asyncio.gather(*(process(i, item) for i, item in enumerate(items)))
+        wall_time = time.perf_counter() - batch_start
+
+        workers = min(max_concurrency, len(items)) or 1
+        return {"results": list(results), "stats": _batch_stats(results, workers, wall_time)}
+
+
+def build_portia_client(tool_ids: List[str], tracer: Optional[Tracer] = None,
+                        progress: Optional[ProgressEvents] = None):
+    """
+    Creates a Portia client restricted to `tool_ids`.
+    The registry is filtered down to the tools the agent actually calls so the
+    planner is not handed the whole default catalogue. With a tracer, planning
+    and every tool call are recorded as spans; with `progress` as well, every
+    step also publishes progress events.
+    """
+    # Imported here so that importing this module (demo mode, tests, the CLI) stays fast
+    from portia import Config, Portia, StorageClass, LLMProvider
+    from portia.cli import CLIExecutionHooks
+    from portia.tool_registry import DefaultToolRegistry
+
+    config = Config.from_default(
+        storage_class=StorageClass.CLOUD,
+        model="gemini-1.5-flash" , # Using a powerful and fast model
+        llm_provider=LLMProvider.GOOGLE
+    )
+
+    # This registry gives the agent access to tools like calendar and email.
+    # Ensure your environment is authenticated with Google Cloud for these to work.
+    wanted = set(tool_ids)
+    tools = DefaultToolRegistry(config).filter_tools(lambda tool: tool.id in wanted)
+    hooks = CLIExecutionHooks()
+    if tracer is not None:
+        attach_tracing_hooks(hooks, tracer)
+        if progress is not None:
+            attach_progress_hooks(hooks, progress, tracer)
+    return Portia(
+        config=config,
+        tools=tools,
+        execution_hooks=hooks,
+    )
+
+
+def agent_components_from_env() -> Dict:
+    """
+    The agent's stores and options as configured by the environment, as keyword
+    arguments for MeetingNotesAgent / get_shared_agent(). The app and the job
+    workers both build their agent from this, so a queued run behaves like an
+    interactive one (same cache, calendar, revisions, digests, ...).
+    """
+    # Identical submissions reuse the previous summary; set RESULT_CACHE_DB to persist it on disk
+    cache = ResultCache(db_path=os.getenv("RESULT_CACHE_DB") or None)
+
+    # CALENDAR_BACKEND=google batches events into one Google Calendar run per meeting (through the agent's
+    # Portia client); CALENDAR_BACKEND=local into an offline JSON calendar. Unset, the agent creates them itself.
+    scheduler = None
+    calendar_backend = os.getenv("CALENDAR_BACKEND", "").lower()
+    if calendar_backend in ("local", "google"):
+        scheduler = BulkEventScheduler(
+            LocalCalendarBackend(os.getenv("LOCAL_CALENDAR_PATH", "local_calendar.json"))
+            if calendar_backend == "local" else None,
+            IdempotencyIndex(os.getenv("CALENDAR_INDEX_DB", "calendar_index.db")),
+        )
+    # ATTENDEE_ALIASES points at a JSON/CSV directory of group addresses to expand
+    aliases_path = os.getenv("ATTENDEE_ALIASES")
+    aliases = load_alias_directory(aliases_path) if aliases_path else None
+    # Meetings processed under a meeting id are kept here so edited notes are re-processed incrementally
+    revisions = RevisionStore(os.getenv("REVISIONS_DB", "revisions.db"))
+    # Rate limit, retries and circuit breaker around Portia (RATE_LIMIT_PER_MINUTE, MAX_RETRIES, ...)
+    resilience = ResilientCaller.from_env()
+    # PLAN_TEMPLATES_DB enables plan reuse: Portia plans once per options combination
+    templates_path = os.getenv("PLAN_TEMPLATES_DB")
+    plan_templates = PlanTemplateStore(templates_path) if templates_path else None
+    # PROMPT_TOKEN_BUDGET trims prompts; token usage and cost are metered either way
+    budget = TokenBudget.from_env()
+    # ITEM_INDEX_DB tracks open action items across meetings, so recurring items are not scheduled and mailed
+    # again; items that have not come up for ITEM_INDEX_MAX_AGE_DAYS (default 30) expire
+    item_index_path = os.getenv("ITEM_INDEX_DB")
+    item_index = ActionItemIndex(item_index_path, max_age_days=float(os.getenv("ITEM_INDEX_MAX_AGE_DAYS", "30"))) \
+        if item_index_path else None
+    # EMAIL_DIGEST_WINDOW_MINUTES sends one digest per attendee per window instead of an email per meeting;
+    # EMAIL_BACKEND=local drafts them into an offline JSON mailbox instead of Gmail
+    mailbox = LocalMailbox(os.getenv("LOCAL_MAILBOX_PATH", "local_mailbox.json")) \
+        if os.getenv("EMAIL_BACKEND", "").lower() == "local" else None
+    digests = DigestCoalescer.from_env(mailbox)
+    # FAST_PATH_CONFIDENCE answers simple, well-structured notes locally without calling the LLM
+    fast_path = FastPath.from_env()
+    return dict(cache=cache, scheduler=scheduler, aliases=aliases, revisions=revisions, resilience=resilience,
+                plan_templates=plan_templates, budget=budget, item_index=item_index, digests=digests,
+                fast_path=fast_path)
+
+
+_shared_agent: Optional[MeetingNotesAgent] = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_shared_agent(**kwargs) -> MeetingNotesAgent:
+    """
+    Returns the process-wide agent, creating it on first call.
+    Every caller (Streamlit sessions, batch workers, the CLI) shares one lazily
+    initialized Portia client instead of paying the cold-start cost each time.
+    Keyword arguments only apply to the first call.
+    """
+    global _shared_agent
+    if _shared_agent is None:
+        with _shared_agent_lock:
+            if _shared_agent is None:
+                _shared_agent = MeetingNotesAgent(**kwargs)
+    return _shared_agent
+
+
+def _budget_error(e: PromptBudgetExceeded) -> AgentResult:
+    """Failure for a prompt budget too small for the prompt template; retrying cannot help."""
+    return AgentResult.failure(str(e), "Raise PROMPT_TOKEN_BUDGET: the prompt cannot be trimmed enough to fit it.",
+                               retryable=False)
+
+
+def _coerce_batch_item(item: Dict) -> tuple:
+    """Normalizes a batch item into (raw_notes, attendees, context)."""
+    notes = item.get("notes", item.get("raw_notes", ""))
+    attendees: Union[str, List[str]] = item.get("attendees", [])
+    if isinstance(attendees, str):
+        attendees = [email.strip() for email in attendees.split(",") if email.strip()]
+    return notes, list(attendees), item.get("context", "")
+
+
+def _batch_stats(results: List[AgentResult], workers: int, wall_time: float) -> Dict:
+    """Aggregate throughput and latency numbers for a finished batch."""
+    durations = [r["duration"] for r in results]
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "max_concurrency": workers,
+        "wall_time": wall_time,
+        "throughput_per_sec": len(results) / wall_time if wall_time > 0 else 0.0,
+        "avg_latency": sum(durations) / len(durations) if durations else 0.0,
+        "max_latency": max(durations) if durations else 0.0,
+    }
+
+
+def _task_text(current_date: str, context: str, demo_mode: bool, notes_label: str, notes_block: str,
+               attendees: str, schedule_instruction: str, notify_instruction: str = NOTIFY_INSTRUCTION) -> str:
+    """The agent prompt. Plan templates call it with "$..." plan input names as the values."""
+    return f"""
         ROLE: You are a professional meeting assistant AI. Your goal is to process the meeting notes, 
         extract actionable items, schedule them in the calendar, and send a summary email.
 
@@ -86,84 +1053,38 @@ class MeetingNotesAgent:
         - {context}
         - DEMO MODE: {demo_mode}
 
-        MEETING NOTES:
+        {notes_label}:
         ---
-        {raw_notes}
+        {notes_block}
         ---
 
         MEETING ATTENDEES (email addresses):
-        - {', '.join(valid_emails)}
+        - {attendees}
 
         INSTRUCTIONS:
         1.  **Analyze**: Read the notes to identify all action items, owners, and deadlines.
-        2.  **Schedule**: For every action item with a deadline, use your calendar tool to create a Google Calendar event.
-        3.  **Summarize & Notify**: Draft and send a concise summary email to all attendees.
+        2.  **Schedule**: {schedule_instruction}
+        3.  **Summarize & Notify**: {notify_instruction}
 
         ---
        
         """
-        
-        print("🤖 Portia Agent is planning and executing the task...")
-        print(f"DEBUG - Task content length: {len(task)} characters")
-        print(f"DEBUG - Valid emails: {valid_emails}")
-        print(f"DEBUG - Demo mode: {demo_mode}")
-        
-        try:
-            print("DEBUG - About to call self.portia.run()")
-            
-            if demo_mode:
-                # Simulate agent response for demo purposes
-                print("DEBUG - Running in demo mode (simulated response)")
-                # Create a simulated plan run response
-                class MockPlanRun:
-                    def __init__(self):
-                        self.id = "demo-plan-12345"
-                        self.outputs = type('obj', (object,), {
-                            'final_output': f"DEMO MODE: Agent analyzed meeting notes and identified action items. Would create calendar events for deadlines and draft summary email to {', '.join(valid_emails)}."
-                        })()
-                
-                plan_run = MockPlanRun()
-                print("DEBUG - Demo mode simulation completed successfully")
-            else:
-                # Real agent execution
-                plan_run = self.portia.run(query=task,
-                                          end_user="meeting_organizer",
-                                          tools=["portia:google:gmail:draft_email", "portia:google:gcalendar:create_event"])
-                print("DEBUG - self.portia.run() completed successfully")
-            
-            return {
-                "success": True,
-                "result": plan_run, # Return the full plan_run object for formatting
-                "plan_id": plan_run.id if hasattr(plan_run, 'id') else None,
-                "timestamp": datetime.now().isoformat(),
-                "demo_mode": demo_mode
-            }
-            
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            error_msg = str(e)
-            
-            # Check if this is an authentication error that can be handled in demo mode
-            if demo_mode and ("authentication" in error_msg.lower() or "oauth" in error_msg.lower()):
-                print("DEBUG - Authentication error in demo mode, providing simulated response")
-                class MockPlanRun:
-                    def __init__(self):
-                        self.id = "demo-auth-error-12345"
-                        self.outputs = type('obj', (object,), {
-                            'final_output': f"DEMO MODE: Authentication would be required here for real Google Calendar and Gmail access. Agent identified action items in the meeting notes."
-                        })()
-                
-                return {
-                    "success": True,
-                    "result": MockPlanRun(),
-                    "plan_id": "demo-auth-plan",
-                    "timestamp": datetime.now().isoformat(),
-                    "demo_mode": True,
-                    "auth_required": True
-                }
-            
-            return {
-                "success": False,
-                "error": error_msg,
-                "result": f"Failed to process meeting notes: {error_msg}"
-            }
+
+
+def _check_prompt_mode(prompt_mode: str) -> str:
+    if prompt_mode not in MeetingNotesAgent.PROMPT_MODES:
+        raise ValueError(f"prompt_mode must be one of {MeetingNotesAgent.PROMPT_MODES}, got {prompt_mode!r}")
+    return prompt_mode
+
+
+def _demo_latency() -> float:
+    """Simulated agent latency for demo mode, from DEMO_LATENCY_SECONDS."""
+    return float(os.getenv("DEMO_LATENCY_SECONDS", "0") or 0)
+
+
+def _demo_plan_run(valid_emails: List[str]) -> RunOutput:
+    """Builds the simulated plan run returned in demo mode."""
+    return RunOutput(
+        "demo-plan-12345",
+        f"DEMO MODE: Agent analyzed meeting notes and identified action items. Would create calendar events for deadlines and draft summary email to {', '.join(valid_emails)}.",
+    )
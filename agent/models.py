@@ -0,0 +1,213 @@
+"""
+Typed result model for agent runs.
+
+AgentResult holds everything a run produced (summary, action items, decisions,
+calendar events, timings, token usage) as plain slotted dataclasses, so results can be
+cached, queued, stored and shipped between processes as JSON or msgpack without
+pickling Portia objects. The Portia plan run is reduced to a RunOutput (id +
+final text) once, at the boundary where the run finishes.
+
+The slotted dataclasses (@dataclass(slots=True)) need Python 3.10 or newer.
+
+For compatibility with code written against the old dict results, AgentResult
+also supports item access: result["success"], result.get("calendar"), and
+result["result"] (the RunOutput on success, the message on failure).
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass(slots=True)
+class RunOutput:
+    """What the rest of the app needs from a plan run: its id and final text."""
+    id: Optional[str]
+    final_output: str = ""
+
+    @property
+    def outputs(self) -> "RunOutput":
+        # Same `outputs.final_output` shape as Portia's PlanRun
+        return self
+
+
+@dataclass(slots=True)
+class ActionItem:
+    task: str
+    owner: Optional[str] = None
+    deadline: Optional[str] = None
+    line: str = ""
+    due_date: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ActionItem":
+        return cls(data["task"], data.get("owner"), data.get("deadline"), data.get("line", ""), data.get("due_date"))
+
+    def to_dict(self) -> Dict:
+        return {"task": self.task, "owner": self.owner, "deadline": self.deadline, "line": self.line,
+                "due_date": self.due_date}
+
+
+@dataclass(slots=True)
+class CalendarEvent:
+    """A calendar event touched by the run; `status` is created/updated/cancelled/skipped."""
+    title: str
+    deadline: Optional[str] = None
+    owner: Optional[str] = None
+    event_id: Optional[str] = None
+    status: str = "created"
+
+    @classmethod
+    def from_dict(cls, data: Dict, status: Optional[str] = None) -> "CalendarEvent":
+        return cls(data["title"], data.get("deadline"), data.get("owner"), data.get("event_id"),
+                   status or data.get("status", "created"))
+
+    def to_dict(self) -> Dict:
+        return {"title": self.title, "deadline": self.deadline, "owner": self.owner,
+                "event_id": self.event_id, "status": self.status}
+
+
+@dataclass(slots=True)
+class AgentResult:
+    success: bool
+    summary: str = ""
+    error: Optional[str] = None
+    message: str = ""
+    plan_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    demo_mode: bool = False
+    prompt_mode: Optional[str] = None
+    prompt_chars: int = 0
+    action_items: List[ActionItem] = field(default_factory=list)
+    decisions: List[str] = field(default_factory=list)
+    events: List[CalendarEvent] = field(default_factory=list)
+    # The summary email when it was rendered locally (fast path runs); agent drafts stay in Gmail
+    email_draft: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Estimated prompt/response tokens, per-stage split and cost (see agent.budget)
+    tokens: Dict[str, Any] = field(default_factory=dict)
+    trace_id: Optional[str] = None
+    # Path-specific details (calendar, cached, delta, revision, tracked, fast_path, index, timed_out, ...)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def failure(cls, error: str, message: str, **extra) -> "AgentResult":
+        return cls(success=False, error=error, message=message, extra=extra)
+
+    @property
+    def output(self) -> RunOutput:
+        return RunOutput(self.plan_id, self.summary)
+
+    def set_extract(self, extract: Optional[Dict]) -> None:
+        """Fills action items and decisions from a local extraction result."""
+        if extract:
+            self.action_items = [ActionItem.from_dict(item) for item in extract.get("action_items", [])]
+            self.decisions = list(extract.get("decisions", []))
+
+    def set_calendar(self, calendar: Optional[Dict]) -> None:
+        """Keeps the scheduler's report and flattens it into typed events."""
+        self.extra["calendar"] = calendar
+        if not calendar:
+            return
+        self.events = [
+            CalendarEvent.from_dict(event, status)
+            for key, status in (("created", "created"), ("updated", "updated"),
+                                ("cancelled", "cancelled"), ("skipped", "skipped"))
+            for event in calendar.get(key, [])
+        ]
+
+    # --- Serialization ---
+
+    def to_dict(self) -> Dict:
+        """Plain, JSON/msgpack-ready record."""
+        record = {
+            "success": self.success,
+            "summary": self.summary if self.success else self.message,
+            "error": self.error,
+            "plan_id": self.plan_id,
+            "timestamp": self.timestamp,
+            "demo_mode": self.demo_mode,
+            "prompt_mode": self.prompt_mode,
+            "prompt_chars": self.prompt_chars,
+            "action_items": [item.to_dict() for item in self.action_items],
+            "decisions": list(self.decisions),
+            "events": [event.to_dict() for event in self.events],
+            "email_draft": self.email_draft,
+            "timings": dict(self.timings),
+            "tokens": dict(self.tokens),
+            "trace_id": self.trace_id,
+        }
+        record.update(self.extra)
+        return record
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> "AgentResult":
+        data = dict(record)
+        success = bool(data.pop("success"))
+        summary = data.pop("summary", "") or ""
+        return cls(
+            success=success,
+            summary=summary if success else "",
+            message="" if success else summary,
+            error=data.pop("error", None),
+            plan_id=data.pop("plan_id", None),
+            timestamp=data.pop("timestamp", None),
+            demo_mode=data.pop("demo_mode", False),
+            prompt_mode=data.pop("prompt_mode", None),
+            prompt_chars=data.pop("prompt_chars", 0),
+            action_items=[ActionItem.from_dict(item) for item in data.pop("action_items", [])],
+            decisions=data.pop("decisions", []),
+            events=[CalendarEvent.from_dict(event) for event in data.pop("events", [])],
+            email_draft=data.pop("email_draft", None),
+            timings=data.pop("timings", {}),
+            tokens=data.pop("tokens", {}),
+            trace_id=data.pop("trace_id", None),
+            extra=data,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), default=str, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "AgentResult":
+        return cls.from_dict(json.loads(text))
+
+    def to_msgpack(self) -> bytes:
+        import msgpack  # Optional dependency, only needed for the binary format
+
+        return msgpack.packb(self.to_dict(), default=str, use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> "AgentResult":
+        import msgpack
+
+        return cls.from_dict(msgpack.unpackb(payload, raw=False))
+
+    # --- Read/write access by the old dict keys ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "result":
+            return self.output if self.success else self.message
+        if key in _FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELDS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key == "result" or key in _FIELDS or key in self.extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+
+_FIELDS = frozenset(AgentResult.__dataclass_fields__) - {"extra"}
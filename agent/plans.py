@@ -0,0 +1,111 @@
+"""
+Plan template reuse.
+
+The plan Portia builds for a meeting (analyze -> create events -> draft email)
+depends on the context instructions and options, not on the notes themselves.
+So the agent plans once per (context, tools, prompt mode, ...) combination with
+the notes, attendees and date as plan inputs, persists the plan, and runs later
+meetings with `run_plan` and just those inputs substituted. That saves one
+LLM planning round trip per run.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Plan inputs referenced as $name in the template prompt
+PLAN_INPUTS = [
+    {"name": "$meeting_notes", "description": "The meeting notes (or their pre-extracted action items)"},
+    {"name": "$attendees", "description": "Comma-separated attendee email addresses"},
+    {"name": "$current_date", "description": "Today's date, YYYY-MM-DD"},
+]
+
+
+def template_key(template_task: str, tools: List[str]) -> str:
+    """Identity of a plan template: the parametrized prompt plus the tools it may use."""
+    payload = json.dumps({"task": " ".join(template_task.split()), "tools": sorted(tools)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def plan_inputs_for(prepared: Dict) -> Dict[str, str]:
+    """Values substituted into the template for one meeting."""
+    return {
+        "$meeting_notes": prepared["notes_block"],
+        "$attendees": prepared["attendees_text"],
+        "$current_date": prepared["current_date"],
+    }
+
+
+def serialize_plan(plan) -> str:
+    """Portia plans are pydantic models; anything else must offer the same method."""
+    return plan.model_dump_json()
+
+
+def load_plan(portia, plan_json: str):
+    """Rebuilds a persisted plan. Clients may provide `load_plan` themselves (e.g. FakePortia)."""
+    loader = getattr(portia, "load_plan", None)
+    if loader is not None:
+        return loader(plan_json)
+    from portia import Plan  # Lazy, like every other portia import
+
+    return Plan.model_validate_json(plan_json)
+
+
+class PlanTemplateStore:
+    """
+    Persisted plan templates keyed by template_key(), with an in-memory map of the
+    hydrated plan objects. Use ":memory:" for a throwaway store.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._plans: Dict[str, object] = {}
+        self._counters = {"hits": 0, "misses": 0}
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS plan_templates ("
+            "key TEXT PRIMARY KEY, plan_id TEXT, plan_json TEXT NOT NULL, "
+            "created_at TEXT NOT NULL, uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+
+    def get(self, key: str, portia) -> Optional[object]:
+        """The plan for `key` (hydrating it from disk on first use), or None."""
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                row = self._db.execute("SELECT plan_json FROM plan_templates WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    plan = load_plan(portia, row[0])
+                    self._plans[key] = plan
+            if plan is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._db.execute("UPDATE plan_templates SET uses = uses + 1 WHERE key = ?", (key,))
+            self._db.commit()
+            return plan
+
+    def set(self, key: str, plan) -> None:
+        with self._lock:
+            self._plans[key] = plan
+            self._db.execute(
+                "INSERT OR REPLACE INTO plan_templates (key, plan_id, plan_json, created_at, uses) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (key, str(getattr(plan, "id", "")), serialize_plan(plan), datetime.now().isoformat()),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._db.execute("DELETE FROM plan_templates")
+            self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["templates"] = self._db.execute("SELECT COUNT(*) FROM plan_templates").fetchone()[0]
+        return stats
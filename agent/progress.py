@@ -0,0 +1,284 @@
+"""
+Step-level progress events from agent runs.
+
+A Portia run is one blocking call that can take tens of seconds, and
+CLIExecutionHooks only prints to stdout. attach_progress_hooks() turns
+Portia's execution hooks into events on a ProgressEvents hub, and the agent
+adds its own (run started, notes extracted locally, run finished):
+
+    run_started, prepared, plan_created, step_started, tool_finished,
+    step_finished, clarification_needed, run_finished
+
+Every event is a plain dict with its "type", the run's trace id and
+"elapsed_ms" since the run started. Consumers get their own thread-safe queue:
+
+- listen() collects the events of the runs started inside the `with` block
+  (including on threads started with its context), so a UI sees only its run;
+- subscribe() sees every run, which is how ProgressMetrics aggregates
+  time to first feedback and step and tool latency, and tracks the steps
+  running right now.
+"""
+import contextvars
+import queue
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+from agent.tracing import Tracer, percentile
+
+# Events buffered per subscriber before new ones are dropped (the producer never blocks)
+SUBSCRIBER_QUEUE_SIZE = 10000
+
+_listener: contextvars.ContextVar = contextvars.ContextVar("progress_listener", default=None)
+
+
+class ProgressEvents:
+    """
+    Fans progress events out to per-run listeners and to subscribers. Thread-safe;
+    emitting never blocks, a full subscriber queue drops the event and counts it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: List[queue.Queue] = []
+        self._starts: Dict[str, float] = {}
+        self.dropped = 0
+
+    @contextmanager
+    def listen(self) -> Iterator[queue.Queue]:
+        """
+        Yields a queue receiving the events of runs started in this context. Worker
+        threads must run in a copy of it (contextvars.copy_context(), asyncio.to_thread).
+        """
+        events: queue.Queue = queue.Queue()
+        token = _listener.set(events)
+        try:
+            yield events
+        finally:
+            _listener.reset(token)
+
+    def subscribe(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> queue.Queue:
+        """A queue receiving every run's events until unsubscribe()."""
+        events: queue.Queue = queue.Queue(maxsize)
+        with self._lock:
+            self._subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue) -> None:
+        with self._lock:
+            if events in self._subscribers:
+                self._subscribers.remove(events)
+
+    def emit(self, kind: str, trace_id: Optional[str] = None, **fields) -> Dict:
+        """Publishes one event; "run_started"/"run_finished" bound the run's elapsed time."""
+        now = time.perf_counter()
+        with self._lock:
+            if kind == "run_started":
+                self._starts[trace_id] = now
+            started = self._starts.pop(trace_id, None) if kind == "run_finished" else self._starts.get(trace_id)
+            subscribers = list(self._subscribers)
+        event = {"type": kind, "trace_id": trace_id, "time": time.time(),
+                 "elapsed_ms": (now - started) * 1000.0 if started is not None else None, **fields}
+
+        listener = _listener.get()
+        if listener is not None:
+            listener.put(event)
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+        return event
+
+
+def attach_progress_hooks(hooks, progress: ProgressEvents, tracer: Tracer):
+    """
+    Adds progress events to a Portia ExecutionHooks object, keeping any callbacks
+    it already has (e.g. the tracing hooks). Events carry the trace id of the
+    span the run executes in.
+    """
+    step_starts: Dict[tuple, float] = {}
+    tool_starts: Dict[tuple, float] = {}
+    previous = {name: getattr(hooks, name, None) for name in (
+        "before_plan_run", "before_step_execution", "after_step_execution",
+        "before_tool_call", "after_tool_call", "after_plan_run")}
+
+    def emit(kind: str, **fields) -> None:
+        span = tracer.current_span()
+        progress.emit(kind, span["trace_id"] if span else None, **fields)
+
+    def step_index(plan_run, step, plan=None) -> Optional[int]:
+        index = getattr(plan_run, "current_step_index", None)
+        if index is None and plan is not None:
+            steps = list(getattr(plan, "steps", []) or [])
+            index = steps.index(step) if step in steps else None
+        return index
+
+    def step_name(step) -> str:
+        return str(getattr(step, "tool_id", None) or getattr(step, "task", None) or step)
+
+    def clarification(result, plan_run, source: str):
+        # Hooks may return a Clarification to pause the run for user input
+        if result is not None:
+            emit("clarification_needed", plan_run_id=str(plan_run.id), source=source,
+                 guidance=str(getattr(result, "user_guidance", result)))
+        return result
+
+    def before_plan_run(plan, plan_run):
+        steps = list(getattr(plan, "steps", []) or [])
+        emit("plan_created", plan_id=str(getattr(plan, "id", "")), plan_run_id=str(plan_run.id),
+             steps=[getattr(step, "task", None) or str(step) for step in steps])
+        if previous["before_plan_run"]:
+            previous["before_plan_run"](plan, plan_run)
+
+    def before_step_execution(plan, plan_run, step):
+        index = step_index(plan_run, step, plan)
+        step_starts[(str(plan_run.id), id(step))] = time.perf_counter()
+        emit("step_started", plan_run_id=str(plan_run.id), step=index, name=step_name(step),
+             total=len(getattr(plan, "steps", []) or []))
+        return previous["before_step_execution"](plan, plan_run, step) if previous["before_step_execution"] else None
+
+    def after_step_execution(plan, plan_run, step, output):
+        started = step_starts.pop((str(plan_run.id), id(step)), None)
+        emit("step_finished", plan_run_id=str(plan_run.id), step=step_index(plan_run, step, plan),
+             name=step_name(step),
+             duration_ms=(time.perf_counter() - started) * 1000.0 if started is not None else None)
+        if previous["after_step_execution"]:
+            previous["after_step_execution"](plan, plan_run, step, output)
+
+    def before_tool_call(tool, args, plan_run, step):
+        tool_starts[(str(plan_run.id), id(step))] = time.perf_counter()
+        result = previous["before_tool_call"](tool, args, plan_run, step) if previous["before_tool_call"] else None
+        return clarification(result, plan_run, tool.id)
+
+    def after_tool_call(tool, output, plan_run, step):
+        started = tool_starts.pop((str(plan_run.id), id(step)), None)
+        if started is not None:
+            emit("tool_finished", plan_run_id=str(plan_run.id), tool=tool.id,
+                 latency_ms=(time.perf_counter() - started) * 1000.0)
+        result = previous["after_tool_call"](tool, output, plan_run, step) if previous["after_tool_call"] else None
+        return clarification(result, plan_run, tool.id)
+
+    def after_plan_run(plan, plan_run, output):
+        if "NEED_CLARIFICATION" in str(getattr(plan_run, "state", "")).upper():
+            outstanding = getattr(plan_run, "get_outstanding_clarifications", lambda: [])()
+            for pending in outstanding or [None]:
+                emit("clarification_needed", plan_run_id=str(plan_run.id), source="plan_run",
+                     guidance=str(getattr(pending, "user_guidance", "") or ""))
+        if previous["after_plan_run"]:
+            previous["after_plan_run"](plan, plan_run, output)
+
+    hooks.before_plan_run = before_plan_run
+    hooks.before_step_execution = before_step_execution
+    hooks.after_step_execution = after_step_execution
+    hooks.before_tool_call = before_tool_call
+    hooks.after_tool_call = after_tool_call
+    hooks.after_plan_run = after_plan_run
+    return hooks
+
+
+class ProgressMetrics:
+    """
+    Consumes a ProgressEvents subscription on a daemon thread and keeps the
+    latest `max_samples` latencies per metric, plus the steps still running.
+    """
+
+    def __init__(self, progress: ProgressEvents, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._events = progress.subscribe()
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Counter = Counter()
+        self._awaiting_feedback: set = set()
+        self._running: Dict[tuple, Dict] = {}
+        self._thread = threading.Thread(target=self._consume, name="progress-metrics", daemon=True)
+        self._thread.start()
+
+    def wait(self) -> None:
+        """Blocks until every event emitted so far has been aggregated."""
+        self._events.join()
+
+    def _consume(self) -> None:
+        while True:
+            event = self._events.get()
+            try:
+                self._observe(event)
+            finally:
+                self._events.task_done()
+
+    def _observe(self, event: Dict) -> None:
+        kind, trace_id = event["type"], event["trace_id"]
+        with self._lock:
+            self._counts[kind] += 1
+            if kind == "run_started":
+                self._awaiting_feedback.add(trace_id)
+                return
+            if trace_id in self._awaiting_feedback and event["elapsed_ms"] is not None:
+                self._awaiting_feedback.discard(trace_id)
+                self._add("first_feedback", event["elapsed_ms"])
+            if kind == "plan_created" and event["elapsed_ms"] is not None:
+                self._add("time_to_plan", event["elapsed_ms"])
+            elif kind == "step_started":
+                self._running[(trace_id, event["plan_run_id"], event["step"])] = {
+                    "name": event["name"], "step": event["step"], "started": event["time"]}
+            elif kind == "step_finished":
+                self._running.pop((trace_id, event["plan_run_id"], event["step"]), None)
+                if event["duration_ms"] is not None:
+                    self._add(f"step:{event['name']}", event["duration_ms"])
+            elif kind == "tool_finished":
+                self._add(f"tool:{event['tool']}", event["latency_ms"])
+            elif kind == "run_finished":
+                self._awaiting_feedback.discard(trace_id)
+                for key in [key for key in self._running if key[0] == trace_id]:
+                    del self._running[key]
+                if event["elapsed_ms"] is not None:
+                    self._add("run", event["elapsed_ms"])
+
+    def _add(self, name: str, value: float) -> None:
+        self._samples.setdefault(name, deque(maxlen=self.max_samples)).append(value)
+
+    def running(self) -> List[Dict]:
+        """Steps in flight right now, slowest first, with how long they have been running."""
+        now = time.time()
+        with self._lock:
+            running = [dict(step, running_ms=(now - step["started"]) * 1000.0) for step in self._running.values()]
+        return sorted(running, key=lambda step: step["running_ms"], reverse=True)
+
+    def stats(self) -> Dict:
+        """Event counts and, per metric, count and p50/p95/max latency in milliseconds."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            counts = dict(self._counts)
+        return {
+            "events": counts,
+            "clarifications": counts.get("clarification_needed", 0),
+            "latency": {
+                name: {"count": len(values), "p50_ms": percentile(values, 50),
+                       "p95_ms": percentile(values, 95), "max_ms": max(values)}
+                for name, values in sorted(samples.items())
+            },
+        }
+
+
+def describe_event(event: Dict) -> Optional[str]:
+    """One line of user-facing progress text for an event (None for events not worth showing)."""
+    kind = event["type"]
+    at = f" ({event['elapsed_ms'] / 1000:.1f}s)" if event.get("elapsed_ms") is not None else ""
+    if kind == "prepared":
+        found = event.get("action_items")
+        return f"📝 Found {found} action item(s) locally{at}" if found is not None else f"📝 Notes prepared{at}"
+    if kind == "plan_created":
+        return f"🗺️ Plan ready with {len(event['steps'])} step(s){at}"
+    if kind == "step_started":
+        number = f"{event['step'] + 1}/{event['total']}" if event.get("step") is not None else ""
+        return f"▶️ Step {number}: {event['name']}{at}"
+    if kind == "step_finished" and event.get("duration_ms") is not None:
+        return f"✅ {event['name']} done in {event['duration_ms'] / 1000:.1f}s"
+    if kind == "tool_finished":
+        return f"🔧 {event['tool']} took {event['latency_ms'] / 1000:.1f}s"
+    if kind == "clarification_needed":
+        return f"❓ Clarification needed: {event.get('guidance') or 'the agent is waiting for input'}"
+    return None
@@ -0,0 +1,348 @@
+"""
+Rate limiting, retries and circuit breaking around upstream (Portia/Gemini/Google) calls.
+
+    caller = ResilientCaller(limiter=TokenBucket(rate=1.0, capacity=5), breaker=CircuitBreaker())
+    agent = MeetingNotesAgent(resilience=caller)
+
+Every plan run first takes a token from the bucket (shared across processes when
+the bucket has a db_path), retryable errors (quota, 429/5xx, timeouts) are
+retried with exponential backoff and full jitter, and after repeated failures
+the circuit opens so calls fail fast until the upstream recovers. With
+`fallback=True` the agent answers from local extraction while the circuit is open.
+"""
+import asyncio
+import contextlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+RETRYABLE_MARKERS = ("429", "quota", "rate limit", "resource has been exhausted", "resource_exhausted",
+                     "timeout", "timed out", "503", "502", "500 ", "unavailable", "connection reset",
+                     "temporarily")
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when no rate-limit token became available within the wait budget."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Quota, throttling, timeout and transient server errors are worth retrying; auth and input errors are not."""
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, rng: random.Random) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(max_delay, base * 2^attempt))."""
+    return rng.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second up to `capacity`.
+    In memory it is shared by all threads of the process; with `db_path` the
+    bucket state lives in SQLite and is shared by every process using that file.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, db_path: Optional[str] = None,
+                 name: str = "portia"):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.db_path = db_path
+        self.name = name
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        if db_path:
+            with contextlib.closing(self._connect()) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS token_buckets ("
+                           "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+                db.execute("INSERT OR IGNORE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                           (name, self.capacity, time.time()))
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` if available and returns 0, otherwise returns the seconds to wait before retrying."""
+        if self.db_path:
+            return self._reserve_shared(tokens)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None, sleep: Callable = time.sleep) -> float:
+        """Blocks until `tokens` are taken; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return waited
+            if timeout is not None and waited + wait > timeout:
+                raise RateLimitTimeout(f"No rate-limit token within {timeout}s")
+            sleep(wait)
+            waited += wait
+
+    async def aacquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> float:
+        waited = 0.0
+        while True:
+            wait = self.reserve(tokens)
+            if wait <= 0:
+                return waited
+            if timeout is not None and waited + wait > timeout:
+                raise RateLimitTimeout(f"No rate-limit token within {timeout}s")
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def _reserve_shared(self, tokens: float) -> float:
+        # closing(): a sqlite3 connection used as a context manager is not closed on exit
+        with contextlib.closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                stored, updated = db.execute("SELECT tokens, updated_at FROM token_buckets WHERE name = ?",
+                                             (self.name,)).fetchone()
+                now = time.time()
+                available = min(self.capacity, stored + max(0.0, now - updated) * self.rate)
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+                db.execute("UPDATE token_buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                           (available, now, self.name))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return wait
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and rejects calls
+    for `reset_timeout` seconds; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self, reserve: bool = True) -> bool:
+        """
+        Whether a call may go upstream now. In half-open state this takes the single
+        trial slot, which the caller must give back through record_success(),
+        record_failure() or release(); `reserve=False` only checks.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = reserve
+                return True
+            return False
+
+    def release(self) -> None:
+        """Gives back the trial slot without a verdict (the call never reached upstream, or was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+    def _current_state(self) -> str:
+        # Caller holds the lock
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+
+class ResilientCaller:
+    """
+    Wraps upstream calls with the rate limiter, retries and circuit breaker and
+    keeps counters (calls, retries, throttle wait, failures, short circuits,
+    fallbacks) for sizing concurrency against quotas.
+    """
+
+    def __init__(self, limiter: Optional[TokenBucket] = None, breaker: Optional[CircuitBreaker] = None,
+                 max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 acquire_timeout: Optional[float] = 60.0, fallback: bool = True,
+                 sleep: Callable = time.sleep, seed: Optional[int] = None):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.fallback = fallback
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "successes": 0, "retries": 0, "failures": 0, "short_circuited": 0,
+                          "throttled": 0, "throttle_wait_s": 0.0, "fallbacks": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResilientCaller":
+        """
+        RATE_LIMIT_PER_MINUTE (unset: no limiter), RATE_LIMIT_BURST, RATE_LIMIT_DB (share the
+        bucket across processes), MAX_RETRIES, BREAKER_THRESHOLD, BREAKER_RESET_SECONDS and
+        DEGRADED_FALLBACK ("false" to return failures instead of local results).
+        """
+        limiter = None
+        per_minute = os.getenv("RATE_LIMIT_PER_MINUTE")
+        if per_minute:
+            rate = float(per_minute) / 60.0
+            burst = float(os.getenv("RATE_LIMIT_BURST", "0")) or None
+            limiter = TokenBucket(rate, burst, db_path=os.getenv("RATE_LIMIT_DB") or None)
+        breaker = CircuitBreaker(int(os.getenv("BREAKER_THRESHOLD", "5")),
+                                 float(os.getenv("BREAKER_RESET_SECONDS", "30")))
+        return cls(limiter, breaker, max_retries=int(os.getenv("MAX_RETRIES", "3")),
+                   fallback=os.getenv("DEGRADED_FALLBACK", "true").lower() != "false")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Calls `fn(*args, **kwargs)` under the rate limit, retrying retryable errors."""
+        attempt = 0
+        while True:
+            # Wait for the rate limit before taking the breaker's trial slot, so a throttling
+            # timeout cannot leave the slot taken
+            self._check_circuit()
+            if self.limiter is not None:
+                self._count_wait(self.limiter.acquire(timeout=self.acquire_timeout, sleep=self._sleep))
+            self._before_attempt()
+            recorded = False
+            try:
+                result = fn(*args, **kwargs)
+                recorded = True
+                self._after_success()
+                return result
+            except Exception as e:
+                recorded = True
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                if not recorded:
+                    self._release_trial()
+            self._sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable, *args, **kwargs):
+        """Async version of call() for coroutine functions such as Portia.arun."""
+        attempt = 0
+        while True:
+            self._check_circuit()
+            if self.limiter is not None:
+                self._count_wait(await self.limiter.aacquire(timeout=self.acquire_timeout))
+            self._before_attempt()
+            recorded = False
+            try:
+                result = await fn(*args, **kwargs)
+                recorded = True
+                self._after_success()
+                return result
+            except Exception as e:
+                recorded = True
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                # Cancellation (or any other BaseException) says nothing about upstream health
+                if not recorded:
+                    self._release_trial()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def record_fallback(self) -> None:
+        self._bump("fallbacks")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["circuit"] = self.breaker.state if self.breaker is not None else "disabled"
+        return stats
+
+    def _check_circuit(self, reserve: bool = False) -> None:
+        if self.breaker is not None and not self.breaker.allow(reserve):
+            self._bump("short_circuited")
+            raise CircuitOpenError("Upstream is degraded (circuit breaker open); failing fast")
+
+    def _before_attempt(self) -> None:
+        self._check_circuit(reserve=True)
+        self._bump("calls")
+
+    def _release_trial(self) -> None:
+        # For exits with no verdict; recording a success or failure already frees the trial slot
+        if self.breaker is not None:
+            self.breaker.release()
+
+    def _after_success(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_success()
+        self._bump("successes")
+
+    def _after_failure(self, error: Exception, attempt: int) -> Optional[float]:
+        """Records the failure; returns the backoff delay when the call should be retried."""
+        retryable = is_retryable(error)
+        if self.breaker is not None:
+            # Only upstream health problems count towards opening the circuit; any other
+            # error means the upstream answered
+            if retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        if not retryable or attempt >= self.max_retries:
+            self._bump("failures")
+            return None
+        self._bump("retries")
+        with self._lock:
+            return backoff_delay(attempt, self.base_delay, self.max_delay, self._random)
+
+    def _count_wait(self, waited: float) -> None:
+        if waited > 0:
+            with self._lock:
+                self._counters["throttled"] += 1
+                self._counters["throttle_wait_s"] += waited
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
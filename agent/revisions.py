@@ -0,0 +1,179 @@
+"""
+Incremental re-processing of edited meeting notes.
+
+Each processed meeting is stored under a caller-chosen meeting id together with
+the per-section extraction results, the resulting action items and the calendar
+events created for them. When the notes are resubmitted, only sections whose
+content changed are re-extracted, and the action items are diffed against the
+previous revision so only created/updated/cancelled items are acted on.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from agent.cache import normalize_notes
+from agent.extraction import extract_meeting_items
+from agent.streaming import ActionItemMerger, item_key
+
+
+def item_identity(item: Dict) -> str:
+    """
+    Identity of an action item across revisions: its normalized task text without
+    the deadline phrase, so "specs by Monday" -> "specs by Tuesday" is an update
+    of the same item rather than a new one.
+    """
+    task = item["task"]
+    deadline = item.get("deadline")
+    if deadline:
+        task = re.sub(r'\b(?:by|due|on|before|until)?\s*' + re.escape(deadline), " ", task, flags=re.IGNORECASE)
+    return item_key(task)
+
+
+def split_sections(raw_notes: str) -> List[str]:
+    """
+    Blank-line separated blocks of the notes, whitespace-normalized. A block that
+    ends in a header line ("Action items:") is kept together with the next one so
+    bulleted sections are extracted with their header.
+    """
+    sections: List[str] = []
+    pending = ""
+    for block in raw_notes.replace("\r\n", "\n").split("\n\n"):
+        block = normalize_notes(block)
+        if not block:
+            continue
+        if pending:
+            block = pending + "\n" + block
+            pending = ""
+        if block.endswith(":"):
+            pending = block
+            continue
+        sections.append(block)
+    if pending:
+        sections.append(pending)
+    return sections
+
+
+def section_hash(section: str) -> str:
+    return hashlib.sha1(section.encode("utf-8")).hexdigest()
+
+
+def extract_incrementally(raw_notes: str, previous_sections: Optional[Dict[str, Dict]] = None) -> Tuple[Dict, Dict[str, Dict], List[str]]:
+    """
+    Extracts action items section by section, reusing the stored extract of every
+    section that is unchanged since the previous revision.
+    Returns (merged extract, {section hash: extract}, changed sections).
+    """
+    previous_sections = previous_sections or {}
+    merger = ActionItemMerger()
+    extracts: Dict[str, Dict] = {}
+    changed: List[str] = []
+    for section in split_sections(raw_notes):
+        digest = section_hash(section)
+        extract = previous_sections.get(digest)
+        if extract is None:
+            extract = extract_meeting_items(section)
+            changed.append(section)
+        extracts[digest] = extract
+        merger.add(extract)
+    return merger.as_extract(), extracts, changed
+
+
+def diff_action_items(previous: List[Dict], current: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Compares two action item lists by item_identity().
+    Items whose owner or deadline changed are "updated" and carry the old values
+    under "previous".
+    """
+    before = {item_identity(item): item for item in previous}
+    after = {item_identity(item): item for item in current}
+
+    created = [item for key, item in after.items() if key not in before]
+    cancelled = [item for key, item in before.items() if key not in after]
+    updated = []
+    for key, item in after.items():
+        old = before.get(key)
+        if old is not None and (old.get("owner"), old.get("deadline")) != (item.get("owner"), item.get("deadline")):
+            updated.append({**item, "previous": {"owner": old.get("owner"), "deadline": old.get("deadline")}})
+    return {"created": created, "updated": updated, "cancelled": cancelled}
+
+
+def has_changes(delta: Dict[str, List[Dict]]) -> bool:
+    return any(delta.get(kind) for kind in ("created", "updated", "cancelled"))
+
+
+class RevisionStore:
+    """SQLite map of meeting id -> latest processed revision. Use ":memory:" for a throwaway store."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meeting_revisions ("
+            "meeting_id TEXT PRIMARY KEY, version INTEGER NOT NULL, notes TEXT NOT NULL, "
+            "sections TEXT NOT NULL, items TEXT NOT NULL, events TEXT NOT NULL, "
+            "plan_id TEXT, final_output TEXT, updated_at TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, meeting_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, notes, sections, items, events, plan_id, final_output, updated_at "
+                "FROM meeting_revisions WHERE meeting_id = ?",
+                (meeting_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "meeting_id": meeting_id,
+            "version": row[0],
+            "notes": row[1],
+            "sections": json.loads(row[2]),
+            "items": json.loads(row[3]),
+            "events": json.loads(row[4]),
+            "plan_id": row[5],
+            "final_output": row[6],
+            "updated_at": row[7],
+        }
+
+    def save(self, meeting_id: str, notes: str, sections: Dict[str, Dict], items: List[Dict],
+             events: Dict[str, Dict], plan_id: Optional[str], final_output: Optional[str]) -> int:
+        """Stores a new revision of the meeting and returns its version number."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version FROM meeting_revisions WHERE meeting_id = ?", (meeting_id,)
+            ).fetchone()
+            version = (row[0] if row else 0) + 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO meeting_revisions "
+                "(meeting_id, version, notes, sections, items, events, plan_id, final_output, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (meeting_id, version, notes, json.dumps(sections), json.dumps(items, default=str),
+                 json.dumps(events, default=str), plan_id, final_output, datetime.now().isoformat()),
+            )
+            self._db.commit()
+        return version
+
+    def save_events(self, meeting_id: str, events: Dict[str, Dict]) -> None:
+        """
+        Stores the calendar event map on its own, as soon as the calendar has been changed,
+        so a run that fails afterwards cannot lose track of the events it created. A meeting
+        with no revision yet gets a placeholder version 0 holding only the events.
+        """
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE meeting_revisions SET events = ?, updated_at = ? WHERE meeting_id = ?",
+                (json.dumps(events, default=str), datetime.now().isoformat(), meeting_id),
+            ).rowcount
+            if not updated:
+                self._db.execute(
+                    "INSERT INTO meeting_revisions "
+                    "(meeting_id, version, notes, sections, items, events, plan_id, final_output, updated_at) "
+                    "VALUES (?, 0, '', '{}', '[]', ?, NULL, NULL, ?)",
+                    (meeting_id, json.dumps(events, default=str), datetime.now().isoformat()),
+                )
+            self._db.commit()
@@ -0,0 +1,296 @@
+"""
+Batched calendar event creation with local de-duplication.
+
+Instead of letting the agent issue one calendar tool call per action item, the
+deadline items are collected up front and submitted to a calendar backend in a
+single batch. An idempotency index (notes hash + item fingerprint -> event id)
+makes re-running the same notes skip events that were already created.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from agent.cache import normalize_notes
+from agent.revisions import item_identity
+from agent.streaming import item_key
+from agent.utils import run_tool_batch
+
+
+def notes_fingerprint(raw_notes: str) -> str:
+    """Stable hash of the notes, ignoring whitespace-only differences."""
+    return hashlib.sha256(normalize_notes(raw_notes).encode("utf-8")).hexdigest()
+
+
+def item_fingerprint(item: Dict) -> str:
+    """Identity of an action item: its normalized task text plus owner."""
+    owner = (item.get("owner") or "").strip().lower()
+    return hashlib.sha1(f"{item_key(item['task'])}|{owner}".encode("utf-8")).hexdigest()
+
+
+class CalendarBackend(ABC):
+    """Interface for calendar backends. Every method must handle a whole batch in one call."""
+
+    @abstractmethod
+    def create_events(self, events: List[Dict]) -> List[str]:
+        """Creates all events and returns their ids, in the same order."""
+
+    @abstractmethod
+    def update_events(self, events: Dict[str, Dict]) -> None:
+        """Replaces the details of existing events, given as {event_id: event}."""
+
+    @abstractmethod
+    def cancel_events(self, event_ids: List[str]) -> None:
+        """Deletes the given events."""
+
+
+class LocalCalendarBackend(CalendarBackend):
+    """
+    Offline stand-in calendar. Events live in memory and, when `path` is given,
+    are persisted to a JSON file so runs can be inspected afterwards.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.events: Dict[str, Dict] = {}
+        self.batch_calls = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.events = json.load(f)
+
+    def create_events(self, events: List[Dict]) -> List[str]:
+        with self._lock:
+            self.batch_calls += 1
+            ids = []
+            for event in events:
+                event_id = f"local-{uuid.uuid4().hex[:12]}"
+                self.events[event_id] = {**event, "created_at": datetime.now().isoformat()}
+                ids.append(event_id)
+            self._save()
+        return ids
+
+    def update_events(self, events: Dict[str, Dict]) -> None:
+        with self._lock:
+            self.batch_calls += 1
+            for event_id, event in events.items():
+                created_at = self.events.get(event_id, {}).get("created_at")
+                self.events[event_id] = {**event, "created_at": created_at, "updated_at": datetime.now().isoformat()}
+            self._save()
+
+    def cancel_events(self, event_ids: List[str]) -> None:
+        with self._lock:
+            self.batch_calls += 1
+            for event_id in event_ids:
+                self.events.pop(event_id, None)
+            self._save()
+
+    def _save(self) -> None:
+        if self.path:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.events, f, indent=2, default=str)
+
+
+class PortiaCalendarBackend(CalendarBackend):
+    """
+    Google Calendar through Portia. The whole batch goes out as one plan run
+    restricted to the calendar tool, so the planner runs once per meeting
+    instead of once per item. `portia` is the client, or a function returning
+    it so the client is only created on first use; runs go through `resilience`
+    (a ResilientCaller) when given and raise PlanRunFailed unless they complete.
+    Event ids are the ones the calendar tool reported. An event the tool gave no
+    id for is returned as "" so it is not created again; it cannot be updated or
+    cancelled later.
+    """
+
+    TOOL_ID = "portia:google:gcalendar:create_event"
+    MODIFY_TOOL_ID = "portia:google:gcalendar:modify_event"
+    DELETE_TOOL_ID = "portia:google:gcalendar:delete_event"
+    TOOL_IDS = [TOOL_ID, MODIFY_TOOL_ID, DELETE_TOOL_ID]
+
+    def __init__(self, portia, resilience=None):
+        self.portia = portia
+        self.resilience = resilience
+
+    def create_events(self, events: List[Dict]) -> List[str]:
+        lines = [
+            f"{i + 1}. Title: {event['title']} | Due: {event.get('due_date') or event.get('deadline')} "
+            f"| Attendees: {', '.join(event.get('attendees', []))}"
+            for i, event in enumerate(events)
+        ]
+        query = (
+            "Create exactly one Google Calendar event for each of the following items, "
+            "in order, and nothing else:\n" + "\n".join(lines)
+        )
+        event_ids = run_tool_batch(self._client(), query, [self.TOOL_ID], len(events), self.resilience)
+        return [event_id or "" for event_id in event_ids]
+
+    def update_events(self, events: Dict[str, Dict]) -> None:
+        lines = [
+            f"{i + 1}. Event {event_id} -> Title: {event['title']} | Due: {event.get('due_date') or event.get('deadline')}"
+            for i, (event_id, event) in enumerate((event_id, event) for event_id, event in events.items() if event_id)
+        ]
+        if lines:
+            query = "Update each of the following Google Calendar events, and nothing else:\n" + "\n".join(lines)
+            run_tool_batch(self._client(), query, [self.MODIFY_TOOL_ID], resilience=self.resilience)
+
+    def cancel_events(self, event_ids: List[str]) -> None:
+        event_ids = [event_id for event_id in event_ids if event_id]
+        if event_ids:
+            query = "Delete each of the following Google Calendar events, and nothing else:\n" + "\n".join(event_ids)
+            run_tool_batch(self._client(), query, [self.DELETE_TOOL_ID], resilience=self.resilience)
+
+    def _client(self):
+        return self.portia() if callable(self.portia) else self.portia
+
+
+class IdempotencyIndex:
+    """SQLite map of (notes hash, item fingerprint) -> event id. Use ":memory:" for a throwaway index."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS calendar_events ("
+            "notes_hash TEXT NOT NULL, item_fingerprint TEXT NOT NULL, event_id TEXT NOT NULL, "
+            "created_at TEXT NOT NULL, PRIMARY KEY (notes_hash, item_fingerprint))"
+        )
+        self._db.commit()
+
+    def lookup(self, notes_hash: str, fingerprints: List[str]) -> Dict[str, str]:
+        """Returns {fingerprint: event_id} for the fingerprints already scheduled."""
+        if not fingerprints:
+            return {}
+        placeholders = ",".join("?" * len(fingerprints))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT item_fingerprint, event_id FROM calendar_events "
+                f"WHERE notes_hash = ? AND item_fingerprint IN ({placeholders})",
+                [notes_hash, *fingerprints],
+            ).fetchall()
+        return dict(rows)
+
+    def record(self, notes_hash: str, event_ids: Dict[str, str]) -> None:
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO calendar_events (notes_hash, item_fingerprint, event_id, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(notes_hash, fp, event_id, now) for fp, event_id in event_ids.items()],
+            )
+            self._db.commit()
+
+
+class BulkEventScheduler:
+    """
+    Collects deadline items and creates the missing calendar events in a single backend call.
+    Without a backend, the agent it is given to fills in Google Calendar through its own Portia client.
+    """
+
+    def __init__(self, backend: Optional[CalendarBackend] = None, index: Optional[IdempotencyIndex] = None):
+        self.backend = backend
+        self.index = index or IdempotencyIndex()
+
+    def schedule(self, raw_notes: str, action_items: List[Dict], attendees: List[str]) -> Dict:
+        """
+        Creates events for every action item with a deadline that has not been
+        scheduled for these notes before. Returns created/skipped events, the
+        event id of every deadline item ({item fingerprint: event id}) and the
+        number of backend calls made (0 or 1).
+        """
+        notes_hash = notes_fingerprint(raw_notes)
+        candidates = {}
+        for item in action_items:
+            if item.get("deadline"):
+                candidates.setdefault(item_fingerprint(item), item)
+
+        existing = self.index.lookup(notes_hash, list(candidates))
+        pending = [(fp, item) for fp, item in candidates.items() if fp not in existing]
+
+        created, created_ids = [], {}
+        if pending:
+            events = [self._to_event(item, attendees) for _, item in pending]
+            event_ids = self.backend.create_events(events)
+            created_ids = {fp: event_id for (fp, _), event_id in zip(pending, event_ids)}
+            self.index.record(notes_hash, created_ids)
+            created = [{**event, "event_id": event_id} for event, event_id in zip(events, event_ids)]
+
+        skipped = [
+            {**self._to_event(candidates[fp], attendees), "event_id": event_id}
+            for fp, event_id in existing.items()
+        ]
+        return {"created": created, "skipped": skipped, "event_ids": {**existing, **created_ids},
+                "backend_calls": 1 if pending else 0}
+
+    def update(self, items: Dict[str, Dict], attendees: List[str]) -> List[Dict]:
+        """Moves existing events, given as {event_id: action item}, to the items' details in one backend call."""
+        events = {event_id: self._to_event(item, attendees) for event_id, item in items.items()}
+        if events:
+            self.backend.update_events(events)
+        return [{**event, "event_id": event_id} for event_id, event in events.items()]
+
+    def reconcile(self, previous_events: Dict[str, Dict], action_items: List[Dict], attendees: List[str]) -> Dict:
+        """
+        Brings the events of an edited meeting in line with its current action items.
+        `previous_events` maps item identities (see agent.revisions) to the events created for the previous
+        revision. New deadline items are created, items whose owner or deadline
+        changed are updated in place, and events for removed items (or items that
+        lost their deadline) are cancelled, with at most one backend call each.
+        Returns the delta plus the new {item identity: event} map to store.
+        """
+        desired = {}
+        for item in action_items:
+            if item.get("deadline"):
+                desired.setdefault(item_identity(item), self._to_event(item, attendees))
+
+        to_create = [(key, event) for key, event in desired.items() if key not in previous_events]
+        to_update = {
+            key: {**event, "event_id": previous_events[key]["event_id"]}
+            for key, event in desired.items()
+            if key in previous_events and (previous_events[key].get("owner"), previous_events[key].get("deadline"))
+            != (event["owner"], event["deadline"])
+        }
+        to_cancel = {key: event for key, event in previous_events.items() if key not in desired}
+
+        events = {key: event for key, event in previous_events.items() if key in desired}
+        calls = 0
+        created = []
+        if to_create:
+            event_ids = self.backend.create_events([event for _, event in to_create])
+            calls += 1
+            for (key, event), event_id in zip(to_create, event_ids):
+                events[key] = {**event, "event_id": event_id}
+                created.append(events[key])
+        if to_update:
+            self.backend.update_events({event["event_id"]: event for event in to_update.values()})
+            calls += 1
+            events.update(to_update)
+        if to_cancel:
+            self.backend.cancel_events([event["event_id"] for event in to_cancel.values()])
+            calls += 1
+
+        return {
+            "created": created,
+            "updated": list(to_update.values()),
+            "cancelled": list(to_cancel.values()),
+            "skipped": [event for key, event in events.items() if key in previous_events and key not in to_update],
+            "events": events,
+            "backend_calls": calls,
+        }
+
+    @staticmethod
+    def _to_event(item: Dict, attendees: List[str]) -> Dict:
+        owner = item.get("owner")
+        return {
+            "title": item["task"] if not owner else f"{item['task']} ({owner})",
+            "owner": owner,
+            "deadline": item.get("deadline"),
+            "due_date": item.get("due_date"),
+            "attendees": list(attendees),
+            "description": item.get("line", item["task"]),
+        }
@@ -0,0 +1,127 @@
+"""
+Streaming, chunked processing for very long transcripts.
+
+Notes are split into overlapping line-based segments. Each segment is run through
+the local extractor as soon as it is produced, and the items are merged and
+de-duplicated incrementally so callers (e.g. the Streamlit UI) can render partial
+results while later segments are still being processed.
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, Union
+
+from agent.extraction import extract_meeting_items
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def split_into_segments(notes: Union[str, Iterable[str]], max_chars: int = 4000, overlap_lines: int = 2) -> Iterator[str]:
+    """
+    Yields segments of at most ~max_chars characters, cut on line boundaries.
+    The last `overlap_lines` lines of a segment are repeated at the start of the
+    next one so items that straddle a boundary are not lost.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    current: List[str] = []
+    size = 0
+    for line in _iter_lines(notes):
+        if current and size + len(line) + 1 > max_chars:
+            yield "\n".join(current)
+            current = current[-overlap_lines:] if overlap_lines else []
+            size = sum(len(kept) + 1 for kept in current)
+        current.append(line)
+        size += len(line) + 1
+
+    if current:
+        yield "\n".join(current)
+
+
+def item_key(task: str) -> str:
+    """Normalized form of an action item used for de-duplication across segments."""
+    return _NON_WORD.sub(" ", task.lower()).strip()
+
+
+class ActionItemMerger:
+    """
+    Accumulates extraction results from many segments, dropping duplicates
+    (e.g. lines repeated by the segment overlap) and filling in owners or
+    deadlines that only a later occurrence carried.
+    """
+
+    def __init__(self):
+        self.context: Dict = {}
+        self.action_items: List[Dict] = []
+        self.decisions: List[str] = []
+        self.emails: List[str] = []
+        self._items_by_key: Dict[str, Dict] = {}
+        self._seen_decisions = set()
+        self._seen_emails = set()
+
+    def add(self, extract: Dict) -> Dict:
+        """Merges one segment's extract; returns only what was new in it."""
+        if not self.context:
+            self.context = dict(extract.get("context", {}))
+
+        new_items = []
+        for item in extract.get("action_items", []):
+            key = item_key(item["task"])
+            existing = self._items_by_key.get(key)
+            if existing is None:
+                merged = dict(item)
+                self._items_by_key[key] = merged
+                self.action_items.append(merged)
+                new_items.append(merged)
+            else:
+                existing["owner"] = existing.get("owner") or item.get("owner")
+                existing["deadline"] = existing.get("deadline") or item.get("deadline")
+
+        new_decisions = []
+        for decision in extract.get("decisions", []):
+            key = item_key(decision)
+            if key not in self._seen_decisions:
+                self._seen_decisions.add(key)
+                self.decisions.append(decision)
+                new_decisions.append(decision)
+
+        for email in extract.get("emails", []):
+            if email.lower() not in self._seen_emails:
+                self._seen_emails.add(email.lower())
+                self.emails.append(email)
+
+        return {"action_items": new_items, "decisions": new_decisions}
+
+    def as_extract(self) -> Dict:
+        """The merged result in the same shape as extract_meeting_items()."""
+        return {
+            "context": self.context,
+            "action_items": list(self.action_items),
+            "decisions": list(self.decisions),
+            "emails": list(self.emails),
+        }
+
+
+def stream_extraction(notes: Union[str, Iterable[str]], max_chars: int = 4000, overlap_lines: int = 2) -> Iterator[Dict]:
+    """
+    Generator over per-segment progress. Each event holds the segment index,
+    the newly found items and the merged totals so far.
+    """
+    merger = ActionItemMerger()
+    for index, segment in enumerate(split_into_segments(notes, max_chars, overlap_lines)):
+        new = merger.add(extract_meeting_items(segment))
+        yield {
+            "segment": index,
+            "segment_chars": len(segment),
+            "new_action_items": new["action_items"],
+            "new_decisions": new["decisions"],
+            "merged": merger.as_extract(),
+        }
+
+
+def _iter_lines(notes: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Lines from a string or any iterable of lines (e.g. an open file)."""
+    lines: Iterable[str] = notes.splitlines() if isinstance(notes, str) else notes
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            yield line
@@ -0,0 +1,202 @@
+"""
+Lightweight per-stage tracing for agent runs.
+
+Spans are recorded as plain dicts using OpenTelemetry field names (trace_id,
+span_id, parent_span_id, start/end time in unix nanoseconds, attributes, status)
+so they can be exported as OTLP-style JSON or JSONL without pulling in the
+OpenTelemetry SDK. The Tracer also aggregates latency percentiles per span name.
+"""
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Tracer:
+    """
+    Records finished spans in a bounded ring buffer.
+    Thread-safe; parent/child links follow the current context, so spans opened
+    inside Portia execution hooks nest under the run that triggered them.
+    """
+
+    def __init__(self, max_spans: int = 10000, service_name: str = "meeting-notes-agent"):
+        self.service_name = service_name
+        self._spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict]:
+        """Times the enclosed block as a span. Yields the span so attributes can be added."""
+        parent = _current_span.get()
+        span = {
+            "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+            "span_id": os.urandom(8).hex(),
+            "parent_span_id": parent["span_id"] if parent else None,
+            "name": name,
+            "start_time_unix_nano": time.time_ns(),
+            "attributes": dict(attributes),
+            "status": "OK",
+        }
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span["status"] = "ERROR"
+            span["attributes"]["error"] = str(e) or type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span, started)
+
+    def record(self, name: str, start_time_unix_nano: int, end_time_unix_nano: int,
+               status: str = "OK", **attributes) -> Dict:
+        """Adds an already-measured span (e.g. from execution hooks) under the current span."""
+        parent = _current_span.get()
+        span = {
+            "trace_id": parent["trace_id"] if parent else os.urandom(16).hex(),
+            "span_id": os.urandom(8).hex(),
+            "parent_span_id": parent["span_id"] if parent else None,
+            "name": name,
+            "start_time_unix_nano": start_time_unix_nano,
+            "end_time_unix_nano": end_time_unix_nano,
+            "duration_ms": (end_time_unix_nano - start_time_unix_nano) / 1e6,
+            "attributes": dict(attributes),
+            "status": status,
+        }
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    def current_span(self) -> Optional[Dict]:
+        return _current_span.get()
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id is not None:
+            spans = [s for s in spans if s["trace_id"] == trace_id]
+        return spans
+
+    def timings(self, trace_id: str) -> Dict[str, float]:
+        """Total milliseconds per span name within one trace."""
+        totals: Dict[str, float] = {}
+        for span in self.spans(trace_id):
+            totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration_ms"]
+        return totals
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per span name: count, p50/p95/p99 and max latency in milliseconds."""
+        durations: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        for span in self.spans():
+            durations.setdefault(span["name"], []).append(span["duration_ms"])
+            if span["status"] == "ERROR":
+                errors[span["name"]] = errors.get(span["name"], 0) + 1
+        return {
+            name: {
+                "count": len(values),
+                "errors": errors.get(name, 0),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+                "max_ms": max(values),
+            }
+            for name, values in sorted(durations.items())
+        }
+
+    def to_otlp_json(self) -> Dict:
+        """Spans in the OTLP/JSON layout accepted by OpenTelemetry collectors."""
+        def attribute_list(attributes: Dict) -> List[Dict]:
+            return [{"key": k, "value": {"stringValue": str(v)}} for k, v in attributes.items()]
+
+        otlp_spans = [
+            {
+                "traceId": s["trace_id"],
+                "spanId": s["span_id"],
+                "parentSpanId": s["parent_span_id"] or "",
+                "name": s["name"],
+                "startTimeUnixNano": str(s["start_time_unix_nano"]),
+                "endTimeUnixNano": str(s["end_time_unix_nano"]),
+                "attributes": attribute_list(s["attributes"]),
+                "status": {"code": 2 if s["status"] == "ERROR" else 1},
+            }
+            for s in self.spans()
+        ]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attribute_list({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "agent.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+
+    def export_jsonl(self, path: str) -> int:
+        """Appends all buffered spans to a JSONL file; returns how many were written."""
+        spans = self.spans()
+        with open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+        return len(spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def _finish(self, span: Dict, started: float) -> None:
+        span["duration_ms"] = (time.perf_counter() - started) * 1000.0
+        span["end_time_unix_nano"] = span["start_time_unix_nano"] + int(span["duration_ms"] * 1e6)
+        with self._lock:
+            self._spans.append(span)
+
+
+def attach_tracing_hooks(hooks, tracer: Tracer):
+    """
+    Adds planning and per-tool-call spans to a Portia ExecutionHooks object,
+    keeping any callbacks it already has.
+    Planning is measured from the start of the enclosing span until Portia
+    starts the plan run; each tool call becomes a "tool:<tool id>" span.
+    """
+    tool_starts: Dict[tuple, int] = {}
+    previous_before_plan = getattr(hooks, "before_plan_run", None)
+    previous_before_tool = getattr(hooks, "before_tool_call", None)
+    previous_after_tool = getattr(hooks, "after_tool_call", None)
+
+    def before_plan_run(plan, plan_run):
+        parent = tracer.current_span()
+        if parent is not None:
+            tracer.record("planning", parent["start_time_unix_nano"], time.time_ns(),
+                          plan_id=str(getattr(plan, "id", "")), steps=len(getattr(plan, "steps", []) or []))
+        if previous_before_plan:
+            previous_before_plan(plan, plan_run)
+
+    def before_tool_call(tool, args, plan_run, step):
+        tool_starts[(str(plan_run.id), id(step))] = time.time_ns()
+        return previous_before_tool(tool, args, plan_run, step) if previous_before_tool else None
+
+    def after_tool_call(tool, output, plan_run, step):
+        started = tool_starts.pop((str(plan_run.id), id(step)), None)
+        if started is not None:
+            tracer.record(f"tool:{tool.id}", started, time.time_ns(),
+                          plan_run_id=str(plan_run.id), step=getattr(step, "task", ""))
+        return previous_after_tool(tool, output, plan_run, step) if previous_after_tool else None
+
+    hooks.before_plan_run = before_plan_run
+    hooks.before_tool_call = before_tool_call
+    hooks.after_tool_call = after_tool_call
+    return hooks
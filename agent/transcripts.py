@@ -0,0 +1,191 @@
+"""
+Transcript file input (.txt, .vtt, .srt).
+
+Files are read once, from a memory map when given a path or from any binary
+stream (e.g. a Streamlit upload), in blocks of about 1 MB cut on cue (blank
+line) boundaries, and each block is cleaned as a whole: WebVTT headers and
+NOTE/STYLE blocks, cue numbers and identifiers, timestamp lines, inline markup
+and speaker tags are dropped, and caption lines repeated by rolling subtitles
+are collapsed. Only the cleaned text is kept, up to
+`max_chars`, so peak memory stays bounded however large the file is.
+"""
+import mmap
+import os
+import re
+from typing import BinaryIO, Dict, Iterator, Optional, Union
+
+TRANSCRIPT_FORMATS = ("txt", "vtt", "srt")
+DEFAULT_MAX_CHARS = 1_000_000
+BLOCK_BYTES = 1 << 20
+
+# WebVTT blocks that are not cues
+_VTT_HEADERS = ("WEBVTT", "NOTE", "STYLE", "REGION")
+# Line-start patterns match the preceding "\n" (blocks are cleaned with one prepended) rather than
+# using ^ with re.MULTILINE: a literal first character lets the regex engine skip ahead quickly
+_TIMING = r"(?:\d+:)?\d{1,2}:\d{2}(?:[.,]\d{1,3})?"
+_VOICE_TAG = re.compile(r"<v(?:\.[\w.-]+)?[ \t]+([^>\n]+)>")
+_LEADING_VOICE_TAG = re.compile(r"\n([ \t]*)<v(?:\.[\w.-]+)?[ \t]+([^>\n]+)>")
+# Caption styling tags, inline karaoke timestamps and SSA-style {\an8} overrides (not "<name@host>")
+_MARKUP = re.compile(r"[<{](?:/?(?:c|i|b|u|v|ruby|rt|lang|font)(?:[. \t][^>\n]*)?>|\d+:\d{2}[^>\n]*>|\\[^}\n]*\})",
+                     re.IGNORECASE)
+# "Speaker 1:", "SPEAKER_02:" and ">> " in any format
+_GENERIC_SPEAKER = r"[ \t]*(?:>>[ \t]*|(?i:speaker)[ _]?\d+[ \t]*:[ \t]*)"
+_CAPTION_GENERIC_SPEAKER = re.compile(rf"\n{_GENERIC_SPEAKER}")
+# ...plus "Sarah Lee:" and "- " in caption formats, one label per line ("SPEAKER_01: Action: ..." keeps "Action:")
+_CAPTION_SPEAKER = re.compile(
+    rf"\n(?:{_GENERIC_SPEAKER}|[ \t]*(?:-[ \t]+)?[A-Z][\w'.-]*(?:[ \t]+[A-Z][\w'.-]*){{0,2}}[ \t]*:[ \t]+)")
+# Plain notes keep "Name:" prefixes ("Action: ...", "Sarah's Updates:") and bullets; only a leading
+# [00:01:02], (01:02) or bare 00:01:02 (with seconds, so "9:30 standup" is kept) and generic labels go
+_TEXT_PREFIX = re.compile(
+    rf"\n[ \t]*(?:(?:[\[(]{_TIMING}[\])]|\d+:\d{{2}}:\d{{2}}(?:[.,]\d{{1,3}})?)[ \t]*[-–]?[ \t]*(?:{_GENERIC_SPEAKER})?"
+    rf"|{_GENERIC_SPEAKER})")
+
+
+def detect_format(name: Optional[str], first_line: str = "") -> str:
+    """Transcript format from the file name, falling back to the first line."""
+    extension = os.path.splitext(name or "")[1].lower().lstrip(".")
+    if extension in TRANSCRIPT_FORMATS:
+        return extension
+    if first_line.lstrip("﻿").startswith("WEBVTT"):
+        return "vtt"
+    return "srt" if first_line.strip().isdigit() or "-->" in first_line else "txt"
+
+
+def iter_blocks(source: Union[str, BinaryIO], block_bytes: int = BLOCK_BYTES) -> Iterator[bytes]:
+    """
+    Blocks of about `block_bytes` of a file path (memory-mapped) or a binary stream,
+    each ending after a blank line (a cue boundary) or at least a line break.
+    """
+    if not isinstance(source, str):
+        carry = b""
+        while True:
+            chunk = source.read(block_bytes)
+            if not chunk:
+                break
+            data = carry + chunk
+            end = _cut(data, len(data), True, block_bytes)
+            if end:
+                yield data[:end]
+            carry = data[end:]
+        if carry:
+            yield carry
+        return
+
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start, size = 0, len(mapped)
+            while start < size:
+                end = _cut(mapped, start + block_bytes, False, block_bytes) if start + block_bytes < size else size
+                yield mapped[start:end]
+                start = end
+
+
+def iter_transcript_lines(source: Union[str, BinaryIO], fmt: Optional[str] = None,
+                          keep_speakers: bool = False, block_bytes: int = BLOCK_BYTES) -> Iterator[str]:
+    """
+    Cleaned text lines of a transcript, reading the input once.
+    `fmt` is "txt", "vtt" or "srt" (detected from the path or first line when None).
+    With `keep_speakers`, WebVTT voice tags become "Name: " prefixes and caption
+    speaker names are kept; generic labels like "Speaker 1:" are always dropped.
+    """
+    previous = None
+    for number, block in enumerate(iter_blocks(source, block_bytes)):
+        text = block.decode("utf-8", errors="replace")
+        if number == 0:
+            text = text.lstrip("﻿")
+            name = source if isinstance(source, str) else getattr(source, "name", None)
+            fmt = fmt or detect_format(name, text.split("\n", 1)[0])
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        for line in _clean_block(text, fmt, keep_speakers).split("\n"):
+            line = line.strip()
+            if line and line != previous:
+                previous = line
+                yield line
+
+
+def clean_transcript(source: Union[str, BinaryIO], fmt: Optional[str] = None, max_chars: Optional[int] = None,
+                     keep_speakers: bool = False) -> Dict:
+    """
+    Reads and cleans a whole transcript, keeping at most `max_chars` characters of text
+    (MAX_TRANSCRIPT_CHARS, default 1,000,000) in whole lines, or a prefix of the first
+    line if even that is longer. Returns {"text", "lines", "truncated"}.
+    """
+    if max_chars is None:
+        max_chars = int(os.getenv("MAX_TRANSCRIPT_CHARS", DEFAULT_MAX_CHARS))
+    parts = []
+    size = 0
+    truncated = False
+    for line in iter_transcript_lines(source, fmt, keep_speakers):
+        if size + len(line) + 1 > max_chars:
+            truncated = True
+            if not parts and max_chars > 0:
+                parts.append(line[:max_chars])
+            break
+        parts.append(line)
+        size += len(line) + 1
+    return {"text": "\n".join(parts), "lines": len(parts), "truncated": truncated}
+
+
+def _clean_block(text: str, fmt: str, keep_speakers: bool) -> str:
+    if fmt not in ("vtt", "srt"):
+        return _TEXT_PREFIX.sub("\n", "\n" + text)
+    # Cues are separated by blank lines; everything up to the end of the "-->" timing line
+    # is the cue number/identifier and timing
+    headers = _VTT_HEADERS if fmt == "vtt" else ()
+    kept = [""]
+    for cue in text.split("\n\n"):
+        cue = cue.lstrip("\n")
+        if not cue or cue.startswith(headers):
+            continue
+        arrow = cue.find("-->")
+        if arrow != -1:
+            end = cue.find("\n", arrow)
+            if end == -1:
+                continue
+            cue = cue[end + 1:]
+        kept.append(cue)
+    text = "\n".join(kept)
+    if "<" in text or "{" in text:
+        if keep_speakers:
+            text = _LEADING_VOICE_TAG.sub(r"\n\1\2: ", text)
+        text = _MARKUP.sub("", _VOICE_TAG.sub("", text))
+    return (_CAPTION_GENERIC_SPEAKER if keep_speakers else _CAPTION_SPEAKER).sub("\n", text)
+
+
+def _cut(data, position: int, backwards: bool, span: int) -> int:
+    """
+    Block end just past a blank line: the last one before `position` when `backwards`
+    (streams), else the first within `span` after it (memory maps). Without one it
+    falls back to a line break; backwards only once `data` has grown past 4 spans.
+    Text with no line break at all is cut after `span` bytes (backwards) or at
+    `position`, on a UTF-8 character boundary, so a block never grows without bound.
+    Backwards, 0 means "read more first".
+    """
+    if backwards:
+        found = data.rfind(b"\n\n", 0, position)
+        if found == -1:
+            found = data.rfind(b"\n\r\n", 0, position)
+    else:
+        found = data.find(b"\n\n", position, position + span)
+        if found == -1:
+            found = data.find(b"\n\r\n", position, position + span)
+    if found != -1:
+        return data.find(b"\n", found + 1) + 1
+    if backwards:
+        if len(data) <= 4 * span:
+            return 0
+        found = data.rfind(b"\n", 0, position)
+        return found + 1 if found != -1 else _char_boundary(data, span)
+    found = data.find(b"\n", position, position + span)
+    return found + 1 if found != -1 else _char_boundary(data, position)
+
+
+def _char_boundary(data, position: int) -> int:
+    """`position`, moved back over UTF-8 continuation bytes so no character is split."""
+    start = position
+    while position > 0 and start - position < 3 and data[position] & 0xC0 == 0x80:
+        position -= 1
+    return position if position > 0 else start
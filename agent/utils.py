@@ -1,49 +1,11 @@
 from datetime import datetime, timedelta
+import json
 import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
-# def parse_meeting_context(text: str) -> Dict:
-#     """Extract meeting metadata from notes"""
-    
-#     context = {
-#         "date": None,
-#         "attendees": [],
-#         "meeting_type": "General Meeting",
-#         "duration": None
-#     }
-    
-#     # Extract dates
-#     date_patterns = [
-#         r'\b(\d{1,2}/\d{1,2}/\d{4})\b',
-#         r'\b(\d{1,2}-\d{1,2}-\d{4})\b',
-#         r'\b(today|yesterday|tomorrow)\b'
-#     ]
-    
-#     for pattern in date_patterns:
-#         match = re.search(pattern, text.lower())
-#         if match:
-#             context["date"] = match.group(1)
-#             break
-    
-#     # Extract attendees (simple email detection)
-#     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-#     context["attendees"] = re.findall(email_pattern, text)
-    
-#     # Detect meeting type
-#     meeting_types = {
-#         "standup": ["standup", "daily", "scrum"],
-#         "review": ["review", "retrospective", "retro"],
-#         "planning": ["planning", "roadmap", "strategy"],
-#         "interview": ["interview", "hiring", "candidate"]
-#     }
-    
-#     text_lower = text.lower()
-#     for meeting_type, keywords in meeting_types.items():
-#         if any(keyword in text_lower for keyword in keywords):
-#             context["meeting_type"] = meeting_type.title() + " Meeting"
-#             break
-    
-#     return context
+from agent.models import AgentResult, RunOutput
+
+# parse_meeting_context now lives in agent/extraction.py alongside the action item pre-pass.
 
 # def format_action_items(raw_output: str) -> Dict:
 #     """Parse and format agent output for display"""
@@ -121,24 +83,108 @@ from typing import Dict, List, Optional
 
 # In agent/utils.py
 
-from portia import PlanRun
+
+def extract_final_output(plan_run) -> str:
+    """
+    Pulls the agent's final summary text out of a plan run (Portia's PlanRun,
+    FakePlanRun or RunOutput). Returns an empty string when no output is available.
+    Called once per run, when the plan run is reduced to an AgentResult.
+    """
+    if isinstance(plan_run, RunOutput):
+        return plan_run.final_output
+    # The final output is nested in plan_run.outputs.final_output
+    outputs = getattr(plan_run, "outputs", None)
+    final_summary = getattr(outputs, "final_output", None)
+    # Portia wraps outputs in a value object; unwrap it to plain text
+    final_summary = getattr(final_summary, "value", final_summary)
+    return str(final_summary) if final_summary else ""
+
+
+class PlanRunFailed(Exception):
+    """Raised when a plan run ends in any state but COMPLETE (failed, waiting for clarification)."""
+
+
+def plan_run_state(plan_run) -> str:
+    """The plan run's state name ("COMPLETE", "FAILED", "NEED_CLARIFICATION", ...), "" when it has none."""
+    state = getattr(plan_run, "state", None)
+    # PlanRunState is a str enum; str() would give "PlanRunState.COMPLETE"
+    return str(getattr(state, "value", state) or "").upper()
+
+
+# "id": "r-1234", id: 5f2c..., Draft ID = abc_9 in plain-text tool output
+_ID_PATTERN = re.compile(r"\b(?:draft|event)?[ _]?id\b[\"']?\s*[:=]\s*[\"']?([A-Za-z0-9_\-]{4,})", re.IGNORECASE)
+
+
+def tool_output_ids(plan_run) -> List[str]:
+    """
+    Ids reported by the tool steps of a plan run (Gmail draft ids, Calendar
+    event ids), in step order. Dict outputs contribute their top-level "id";
+    text outputs are scanned for "id: ..." style mentions.
+    """
+    outputs = getattr(getattr(plan_run, "outputs", None), "step_outputs", None) or {}
+    ids: List[str] = []
+    for output in outputs.values():
+        _collect_ids(getattr(output, "value", output), ids)
+    return ids
+
+
+def _collect_ids(value, ids: List[str]) -> None:
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            ids.extend(_ID_PATTERN.findall(value))
+            return
+        if isinstance(parsed, (dict, list)):
+            _collect_ids(parsed, ids)
+    elif isinstance(value, dict):
+        # A draft's nested message has an id of its own; only the outer one names the created object
+        if isinstance(value.get("id"), str):
+            ids.append(value["id"])
+        else:
+            for nested in value.values():
+                _collect_ids(nested, ids)
+    elif isinstance(value, (list, tuple)):
+        for nested in value:
+            _collect_ids(nested, ids)
+
+
+def run_tool_batch(portia, query: str, tools: List[str], count: int = 0, resilience=None) -> List[Optional[str]]:
+    """
+    Runs `query` as one plan run restricted to `tools`, through `resilience`
+    (a ResilientCaller) when given, and returns the ids of the `count` objects
+    it created, in order. Raises PlanRunFailed unless the run completed; ids the
+    tools did not report are None.
+    """
+    call = resilience.call if resilience is not None else (lambda fn, *args, **kwargs: fn(*args, **kwargs))
+    plan_run = call(portia.run, query, end_user="meeting_organizer", tools=tools)
+    state = plan_run_state(plan_run)
+    if state != "COMPLETE":
+        raise PlanRunFailed(f"Plan run {plan_run.id} ended in state {state or 'unknown'}")
+    ids = tool_output_ids(plan_run)
+    if count and len(ids) != count:
+        print(f"DEBUG: plan run {plan_run.id} reported {len(ids)} id(s) for {count} object(s)")
+    return (ids + [None] * count)[:count]
+
+
+def serialize_result(result: Union[AgentResult, Dict]) -> Dict:
+    """JSON/msgpack-friendly record of a run result, e.g. for JSONL output or the job queue."""
+    if isinstance(result, AgentResult):
+        return result.to_dict()
+    record = {k: v for k, v in result.items() if k != "result"}
+    record["summary"] = result.get("result", "")
+    return record
 
 
-def format_agent_run_for_display(plan_run) -> str:
+def format_agent_run_for_display(result: Union[AgentResult, RunOutput]) -> str:
     """
-    Parses the agent's execution plan and creates a user-friendly
-    Markdown summary of the actions taken.
+    Creates a user-friendly Markdown summary of an agent run from its
+    AgentResult (or the RunOutput in result["result"]).
     """
-    if not plan_run:
+    if not result:
         return "The agent did not return a valid plan."
 
-    final_summary = ""
-    # The final output is often nested in plan_run.outputs.final_output
-    if hasattr(plan_run, 'outputs') and hasattr(plan_run.outputs, 'final_output'):
-        final_summary = plan_run.outputs.final_output
-    # Sometimes it's directly on the object
-    elif hasattr(plan_run, 'final_output'):
-        final_summary = plan_run.final_output
+    final_summary = result.summary if isinstance(result, AgentResult) else result.final_output
 
     if final_summary:
         markdown_output = "## ✅ Agent Task Completed!\n\n"
@@ -1,5 +1,9 @@
+import contextvars
+import json
+import os
+import queue
 import streamlit as st
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pytz
 from dotenv import load_dotenv
@@ -8,7 +12,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # --- Imports for the new, unified agent ---
-from agent.meeting_agent import MeetingNotesAgent
+from agent.meeting_agent import agent_components_from_env, get_shared_agent
+from agent.digests import start_flush_timer
+from agent.emails import extract_emails, split_attendees
+from agent.history import HistoryStore
+from agent.jobs import JobQueue, start_workers
+from agent.progress import ProgressMetrics, describe_event
+from agent.transcripts import TRANSCRIPT_FORMATS, clean_transcript
 from agent.utils import create_sample_notes, format_agent_run_for_display # <-- Updated imports
 
 # Page configuration (remains the same)
@@ -40,6 +50,157 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def load_agent():
+    """Process-wide agent shared by all sessions; its Portia client is built on first use."""
+    # Stores and options come from the environment (see agent_components_from_env), the same as for job workers
+    components = agent_components_from_env()
+    agent = get_shared_agent(**components)
+    # Due digests also go out on a timer (EMAIL_DIGEST_FLUSH_SECONDS), starting with whatever a restart left queued.
+    # Demo mode has nothing to send them through unless EMAIL_BACKEND=local.
+    digests = components["digests"]
+    if digests is not None and (digests.backend is not None or os.getenv("DEMO_MODE", "").lower() != "true"):
+        start_flush_timer(agent.flush_digests, float(os.getenv("EMAIL_DIGEST_FLUSH_SECONDS", "60")))
+    return agent
+
+
+@st.cache_resource
+def load_progress_metrics():
+    """Aggregates every session's progress events: time to first feedback, step and tool latency."""
+    return ProgressMetrics(load_agent().progress)
+
+
+@st.cache_resource
+def load_job_queue():
+    """Background queue; JOB_WORKERS > 0 also starts that many worker processes with the app."""
+    db_path = os.getenv("JOB_QUEUE_DB", "jobs.db")
+    queue = JobQueue(db_path)
+    workers = int(os.getenv("JOB_WORKERS", "0"))
+    if workers > 0:
+        start_workers(workers, db_path)
+    return queue
+
+
+@st.cache_resource
+def load_history():
+    """Run history shared by all sessions and kept across restarts (HISTORY_DB, HISTORY_RETENTION_DAYS)."""
+    return HistoryStore(
+        os.getenv("HISTORY_DB", "history.db"),
+        max_age_days=float(os.getenv("HISTORY_RETENTION_DAYS", "90")),
+    )
+
+
+HISTORY_PAGE_SIZE = 20
+
+
+def render_history_panel(history):
+    """One page of runs plus totals; both come straight from SQL."""
+    if history.count() == 0:
+        return
+    with st.expander("📊 Processing History", expanded=False):
+        attendee = st.text_input("Filter by attendee email", key="history_attendee").strip() or None
+        stats = history.stats(attendee)
+        runs_col, rate_col, time_col, length_col = st.columns(4)
+        runs_col.metric("Runs", stats["total"])
+        rate_col.metric("Success Rate", f"{stats['success_rate']:.0%}")
+        time_col.metric("Avg Time", f"{stats['avg_processing_time'] or 0:.1f}s")
+        length_col.metric("Avg Input", f"{stats['avg_input_length'] or 0:,.0f} chars")
+
+        pages = max(1, -(-stats["total"] // HISTORY_PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="history_page") - 1
+        rows = history.page(page, HISTORY_PAGE_SIZE, attendee=attendee)
+        for row in rows:
+            row["timestamp"] = datetime.fromtimestamp(row.pop("created_at")).strftime("%Y-%m-%d %H:%M:%S")
+            row["success"] = bool(row["success"])
+            row["cached"] = bool(row["cached"])
+        st.dataframe(rows, use_container_width=True)
+        st.caption(f"Page {page + 1} of {pages}")
+
+
+def render_jobs_panel(queue):
+    """Status, progress and results of the background jobs submitted from this session."""
+    job_ids = st.session_state.job_ids
+    if not job_ids:
+        return
+    header_col, button_col = st.columns([4, 1])
+    header_col.subheader("🗂️ Background Jobs")
+    button_col.button("🔄 Refresh", key="refresh_jobs")  # Any click reruns the script and re-polls
+    counts = queue.stats()
+    st.caption(f"Queue: {counts['queued']} queued · {counts['running']} running · "
+               f"{counts['succeeded']} done · {counts['failed']} failed")
+
+    icons = {"queued": "⏳", "running": "⚙️", "succeeded": "✅", "failed": "❌"}
+    for job_id in reversed(job_ids):
+        job = queue.get(job_id)
+        if job is None:
+            continue
+        label = (f"{icons.get(job['status'], '')} {job['status'].title()} · "
+                 f"submitted {datetime.fromtimestamp(job['created_at']).strftime('%H:%M:%S')} · "
+                 f"attempt {job['attempts']}/{job['max_attempts']}")
+        with st.expander(label, expanded=job["status"] == "succeeded"):
+            st.caption(job["progress"] or "")
+            if job["status"] == "succeeded" and job["result"]:
+                st.markdown(job["result"].get("summary", ""))
+            elif job["error"]:
+                st.error(job["error"])
+
+
+# Notes longer than this are processed segment by segment with partial results
+LONG_NOTES_CHARS = 8000
+
+
+def run_streaming(meeting_notes, attendees, context_instructions, prompt_mode, progress_container):
+    """Runs the streaming pipeline, rendering merged action items after every segment."""
+    partial_container = st.empty()
+    agent_result = None
+    agent = st.session_state.agent
+    if agent.budget.max_prompt_tokens is None:
+        # A whole long transcript in one unbounded prompt can overflow the model's context
+        prompt_mode = "condensed"
+    for event in agent.stream_agent(meeting_notes, attendees, context_instructions, prompt_mode=prompt_mode):
+        if event["type"] == "partial":
+            merged = event["merged"]
+            progress_container.info(
+                f"🔎 Scanned segment {event['segment'] + 1} · {len(merged['action_items'])} action items so far. "
+                "The agent will run once the whole transcript is scanned."
+            )
+            lines = ["### ⏳ Action items found so far"]
+            for item in merged["action_items"]:
+                owner = item.get("owner") or "unassigned"
+                deadline = item.get("deadline") or "no deadline"
+                lines.append(f"- {item['task']} _(owner: {owner}, due: {deadline})_")
+            partial_container.markdown("\n".join(lines))
+        else:
+            progress_container.info("🤖 Agent is creating events and drafting the summary...")
+            agent_result = event["result"]
+    partial_container.empty()
+    return agent_result
+
+
+PROGRESS_LINES = 8
+
+
+def run_with_progress(progress_container, **kwargs):
+    """Runs the agent on a worker thread and shows its progress events as they arrive."""
+    agent = st.session_state.agent
+    with agent.progress.listen() as events, ThreadPoolExecutor(max_workers=1) as pool:
+        # The worker runs in a copy of this context, so only this run's events reach `events`
+        future = pool.submit(contextvars.copy_context().run, agent.run_agent, **kwargs)
+        lines = []
+        while True:
+            try:
+                event = events.get(timeout=0.2)
+            except queue.Empty:
+                if future.done():
+                    break
+                continue
+            line = describe_event(event)
+            if line:
+                lines.append(line)
+                progress_container.info("\n\n".join(lines[-PROGRESS_LINES:]))
+        return future.result()
+
+
 def main():
     # Header (remains the same)
     st.markdown("""
@@ -52,14 +213,15 @@ def main():
     
     # --- Simplified session state ---
     if 'agent' not in st.session_state:
-        st.session_state.agent = MeetingNotesAgent() # <-- Only the agent is needed now
-    if "processing_history" not in st.session_state:
-        st.session_state.processing_history = []
+        st.session_state.agent = load_agent() # <-- One shared agent for every session
+        load_progress_metrics()  # Subscribed before the first run so no events are missed
     if "auth_required" not in st.session_state:
         st.session_state.auth_required = False
     if "auth_url" not in st.session_state:
         st.session_state.auth_url = ""
-        
+    if "job_ids" not in st.session_state:
+        st.session_state.job_ids = []
+
     
     # In app.py
 
@@ -70,6 +232,96 @@ def main():
         st.subheader("Actions to Perform")
         create_calendar_events = st.checkbox("Create Calendar Events", value=True, help="Agent will use its tools to create Google Calendar events for items with deadlines.")
         send_emails = st.checkbox("Send Follow-up Email", value=False, help="Agent will draft and send a summary email to attendees.")
+
+        st.subheader("🧠 Prompt Mode")
+        prompt_mode = st.radio(
+            "Notes sent to the model",
+            options=["full", "condensed"],
+            format_func=lambda mode: "Full notes" if mode == "full" else "Condensed (local pre-extraction)",
+            help="Condensed mode extracts owners, deadlines and decisions locally and only sends that extract to the model. "
+                 "Long transcripts are always condensed unless PROMPT_TOKEN_BUDGET bounds the full prompt.",
+        )
+        run_in_background = st.toggle(
+            "Run in background",
+            value=False,
+            help="Queue the run for a worker process (python -m agent.jobs worker) instead of waiting for it here.",
+        )
+
+        st.subheader("♻️ Result Cache")
+        cache_stats = st.session_state.agent.cache.stats()
+        cache_col1, cache_col2 = st.columns(2)
+        cache_col1.metric("Hits", cache_stats["hits"])
+        cache_col2.metric("Misses", cache_stats["misses"])
+        st.caption(f"Hit rate: {cache_stats['hit_rate']:.0%} · {cache_stats['size']} cached results")
+        if st.session_state.agent.plan_templates is not None:
+            plan_stats = st.session_state.agent.plan_templates.stats()
+            st.caption(f"Plan templates: {plan_stats['templates']} stored · {plan_stats['hits']} runs skipped planning")
+        if st.button("Clear cache"):
+            st.session_state.agent.cache.clear()
+            st.rerun()
+
+        if st.session_state.agent.resilience is not None:
+            st.subheader("🚦 Upstream")
+            upstream = st.session_state.agent.resilience.stats()
+            up_col1, up_col2 = st.columns(2)
+            up_col1.metric("Retries", upstream["retries"])
+            up_col2.metric("Fallbacks", upstream["fallbacks"])
+            st.caption(f"Circuit {upstream['circuit']} · {upstream['calls']} calls · "
+                       f"{upstream['short_circuited']} failed fast · throttled {upstream['throttle_wait_s']:.1f}s")
+
+        st.subheader("🪙 Tokens")
+        usage = st.session_state.agent.budget.stats()
+        token_col1, token_col2 = st.columns(2)
+        token_col1.metric("Tokens", f"{usage['prompt_tokens'] + usage['response_tokens']:,}")
+        token_col2.metric("Cost", f"{usage['cost']:.4f}")
+        st.caption(f"~{usage['avg_prompt_tokens']:.0f} prompt tokens/run · {usage['trimmed_runs']} runs trimmed · "
+                   f"{usage['tokens_saved']:,} tokens saved · task prompt and final output only; planner and "
+                   f"tool-step calls come on top")
+
+        if st.session_state.agent.fast_path is not None:
+            st.subheader("⚡ Fast Path")
+            routing = st.session_state.agent.fast_path.stats()
+            fast_col1, fast_col2 = st.columns(2)
+            fast_col1.metric("Handled locally", f"{routing['local_rate']:.0%}")
+            fast_col2.metric("Escalated", routing["escalated"])
+            st.caption(f"{routing['local']} of {routing['runs']} runs skipped the LLM · "
+                       f"avg confidence {routing['avg_confidence']:.2f}")
+            for reason, count in routing["escalation_reasons"].items():
+                st.caption(f"↗ {reason}: {count}")
+
+        if st.session_state.agent.digests is not None:
+            st.subheader("📬 Email Digests")
+            digest_stats = st.session_state.agent.digests.stats()
+            digest_col1, digest_col2 = st.columns(2)
+            digest_col1.metric("Queued", digest_stats["pending"])
+            digest_col2.metric("Emails saved", digest_stats["emails_saved"])
+            st.caption(f"{digest_stats['pending_recipients']} recipients waiting · "
+                       f"{digest_stats['digests_sent']} digests sent in {digest_stats['backend_calls']} batches")
+            if st.button("Send digests now", disabled=not digest_stats["pending"]):
+                st.session_state.agent.flush_digests(force=True)
+                st.rerun()
+
+        st.subheader("📌 Open Action Items")
+        item_index = st.session_state.agent.item_index
+        if item_index is None:
+            st.caption("Set ITEM_INDEX_DB to track open action items across meetings.")
+        else:
+            index_stats = item_index.stats()
+            st.caption(f"{index_stats['open']} open items · {index_stats['duplicates']} repeats skipped · "
+                       f"{index_stats['updates']} updated · {index_stats['expired']} expired")
+            owner = st.text_input("Open items for owner:", placeholder="Sarah")
+            if owner:
+                open_items = item_index.open_items(owner)
+                for item in open_items:
+                    due = item["due_date"] or item["deadline"] or "no deadline"
+                    item_col, done_col = st.columns([4, 1])
+                    item_col.markdown(f"- {item['task']} · due {due} · seen {item['occurrences']}x")
+                    # Closed items stop matching, so the next meeting mentioning them tracks them afresh
+                    if done_col.button("Done", key=f"close_item_{item['id']}"):
+                        item_index.close(item["id"])
+                        st.rerun()
+                if not open_items:
+                    st.caption("No open items.")
         
 
 
@@ -80,9 +332,7 @@ def main():
         for i, sample in enumerate(sample_notes):
             if st.button(f"Load: {sample['title']}", key=f"sample_{i}"):
                 st.session_state.sample_notes = sample['notes']
-                import re
-                emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', sample['notes'])
-                st.session_state.sample_emails = ", ".join(emails)
+                st.session_state.sample_emails = ", ".join(extract_emails(sample['notes']))
                 st.rerun()
 
           # --- Main content area (mostly the same) ---
@@ -90,6 +340,18 @@ def main():
     
     with col1:
         st.subheader("📋 Input Meeting Notes")
+        uploaded = st.file_uploader("Or upload a transcript (.txt, .vtt, .srt):", type=list(TRANSCRIPT_FORMATS))
+        if uploaded is not None and st.session_state.get("uploaded_file_id") != uploaded.file_id:
+            # Clean it line by line (timestamps, cue numbers, speaker tags) into capped notes text
+            transcript = clean_transcript(uploaded)
+            st.session_state.uploaded_file_id = uploaded.file_id
+            st.session_state.upload_info = (f"Loaded {uploaded.name}: {transcript['lines']:,} lines"
+                                            + (" (truncated to MAX_TRANSCRIPT_CHARS)" if transcript["truncated"] else ""))
+            st.session_state.sample_notes = transcript["text"]
+            st.session_state.sample_emails = ", ".join(extract_emails(transcript["text"]))
+            st.rerun()
+        if uploaded is not None and st.session_state.get("upload_info"):
+            st.caption(st.session_state.upload_info)
         default_text = st.session_state.get('sample_notes', '')
         meeting_notes = st.text_area(
             "Paste your meeting notes here:",
@@ -103,6 +365,11 @@ def main():
             value=default_emails,
             placeholder="sarah@company.com, john@company.com"
         )
+        meeting_id = st.text_input(
+            "Meeting ID (optional):",
+            placeholder="weekly-sync-2025-03-04",
+            help="Resubmitting edited notes under the same ID only acts on the items that changed.",
+        ).strip()
     
     with col2:
         st.subheader("🚀 Processing")
@@ -119,7 +386,7 @@ def main():
 
     # --- New, Unified Processing Logic ---
     if process_button:
-        attendees = [email.strip() for email in attendee_emails.split(',')]
+        attendees = split_attendees(attendee_emails)
         
         # Build dynamic instructions for the agent based on UI controls
         context_instructions = "Please perform the following actions:\n"
@@ -131,18 +398,41 @@ def main():
             # If not sending an email, ask it to draft one so the user can see it
             context_instructions += "- Draft a concise summary email that includes the key decisions and action items.\n"
 
+    if process_button and run_in_background:
+        # --- Background: hand the run to the job queue and return immediately ---
+        job_id = load_job_queue().submit({
+            "notes": meeting_notes,
+            "attendees": attendees,
+            "context": context_instructions,
+            "prompt_mode": prompt_mode,
+            "meeting_id": meeting_id or None,
+        })
+        st.session_state.job_ids.append(job_id)
+        st.success(f"📨 Queued as job {job_id[:8]}. Use Refresh below to check on it.")
+
+    elif process_button:
         # Create a progress container to show agent activity
         progress_container = st.empty()
         progress_container.info("🤖 Agent is analyzing notes, forming a plan, and executing, this may take a while please be patient")
         
         start_time = datetime.now()
         
-        # --- Single, powerful call to the agent ---
-        agent_result = st.session_state.agent.run_agent(
-            raw_notes=meeting_notes,
-            attendees=attendees,
-            context=context_instructions,
-        )
+        if meeting_id:
+            # --- Known meeting: only re-process what changed since the last submission ---
+            agent_result = st.session_state.agent.reprocess(meeting_id, meeting_notes, attendees, context_instructions)
+        elif len(meeting_notes) > LONG_NOTES_CHARS:
+            # --- Long transcript: stream segments and show items as they are found ---
+            agent_result = run_streaming(meeting_notes, attendees, context_instructions, prompt_mode,
+                                         progress_container)
+        else:
+            # --- Single, powerful call to the agent, with its steps shown as they happen ---
+            agent_result = run_with_progress(
+                progress_container,
+                raw_notes=meeting_notes,
+                attendees=attendees,
+                context=context_instructions,
+                prompt_mode=prompt_mode,
+            )
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -153,25 +443,73 @@ def main():
         if agent_result["success"]:
             st.markdown('<div class="success-banner">✅ Agent has completed its tasks!</div>', unsafe_allow_html=True)
             
-            st.metric("Processing Time", f"{processing_time:.1f}s")
+            time_col, prompt_col = st.columns(2)
+            time_col.metric("Processing Time", f"{processing_time:.1f}s")
+            tokens = agent_result.get("tokens") or {}
+            prompt_col.metric("Prompt Size", f"{agent_result.get('prompt_chars', 0):,} chars",
+                              delta=f"~{tokens.get('total_tokens', 0):,} tokens" if tokens else None,
+                              delta_color="off",
+                              help=f"{agent_result.get('prompt_mode', 'full')} prompt"
+                                   + (f", trimmed: {', '.join(tokens['trimmed'])}" if tokens.get("trimmed") else ""))
+            if agent_result.get("fallback"):
+                st.warning("⚠️ The AI service is degraded, so these action items come from local extraction only. "
+                           "No calendar events or emails were created by the agent.")
+            fast_path = agent_result.get("fast_path")
+            if fast_path and fast_path["local"]:
+                st.info(f"⚡ Handled locally without calling the AI (confidence {fast_path['confidence']:.0%}).")
+            if agent_result.get("cached"):
+                st.info(f"♻️ Served from cache (first processed {agent_result['cached_at']}). "
+                        "No calendar events or emails were re-created.")
             
+            delta = agent_result.get("delta")
+            if agent_result.get("unchanged"):
+                st.info(f"✏️ Revision {agent_result['revision']} of {agent_result['meeting_id']}: no action item changed, "
+                        "previous summary reused without calling the agent.")
+            elif delta and agent_result.get("incremental"):
+                st.info(f"✏️ Revision {agent_result['revision']} of {agent_result['meeting_id']}: "
+                        f"{len(delta['created'])} new, {len(delta['updated'])} updated, "
+                        f"{len(delta['cancelled'])} cancelled action items "
+                        f"({agent_result['changed_sections']} edited sections, {agent_result['reused_sections']} reused)")
+
+            calendar = agent_result.get("calendar")
+            if calendar and (calendar.get("updated") or calendar.get("cancelled")):
+                st.markdown(f"📅 **Calendar:** {len(calendar['created'])} created, {len(calendar['updated'])} updated, "
+                            f"{len(calendar['cancelled'])} cancelled")
+            elif calendar:
+                st.markdown(f"📅 **Calendar:** {len(calendar['created'])} events created, "
+                            f"{len(calendar['skipped'])} already existed (skipped)")
+                for event in calendar["created"]:
+                    st.markdown(f"- {event['title']} — due {event['deadline']}")
+
             # Use the formatter from utils.py to create a beautiful output
-            display_output = format_agent_run_for_display(agent_result["result"])
+            with st.session_state.agent.tracer.span("format"):
+                display_output = format_agent_run_for_display(agent_result)
             st.markdown("---")
             st.markdown("## 📋 Agent Action Summary")
             st.markdown(display_output)
 
             # Save to history
-            st.session_state.processing_history.append({
-                "timestamp": datetime.now(),
-                "processing_time": processing_time,
-                "input_length": len(meeting_notes),
-                "result": display_output # Save the formatted output
-            })
+            load_history().record(
+                processing_time=processing_time,
+                input_length=len(meeting_notes),
+                success=True,
+                attendees=attendees,
+                plan_id=agent_result.get("plan_id"),
+                prompt_mode=agent_result.get("prompt_mode"),
+                summary=display_output,
+                cached=bool(agent_result.get("cached")),
+            )
 
         else:
             # Check if authentication is required
             error_msg = agent_result["error"]
+            load_history().record(
+                processing_time=processing_time,
+                input_length=len(meeting_notes),
+                success=False,
+                attendees=attendees,
+                error=error_msg,
+            )
             if "OAuth required for google" in error_msg or "authentication" in error_msg.lower():
                 # Extract the authentication URL from the error message
                 import re
@@ -193,13 +531,33 @@ def main():
             else:
                 st.error(f"❌ Agent failed: {error_msg}")
 
-    # History expander (can remain the same)
-    if st.session_state.processing_history:
-        with st.expander("📊 Processing History", expanded=False):
-            # Your history display logic can go here
-            history_df = pd.DataFrame(st.session_state.processing_history)
-            st.dataframe(history_df[['timestamp', 'processing_time', 'input_length']])
+    render_jobs_panel(load_job_queue())
+
+    # Latency breakdown across all runs in this process
+    latency_stats = st.session_state.agent.tracer.stats()
+    if latency_stats:
+        with st.expander("⏱️ Latency Metrics", expanded=False):
+            st.caption("Per-stage latency in milliseconds. Tool spans show Google API time, "
+                       "planning shows LLM time, everything else is local.")
+            st.dataframe([{"stage": name, **values} for name, values in latency_stats.items()],
+                         use_container_width=True)
+            progress_metrics = load_progress_metrics()
+            live = progress_metrics.stats()["latency"]
+            if live:
+                st.caption("From progress events: time to first feedback, time until the plan is ready, "
+                           "and latency per plan step and tool call.")
+                st.dataframe([{"metric": name, **values} for name, values in live.items()],
+                             use_container_width=True)
+            for step in progress_metrics.running():
+                st.caption(f"⏳ Running now: {step['name']} for {step['running_ms'] / 1000:.1f}s")
+            st.download_button(
+                "Download spans (OTLP JSON)",
+                data=json.dumps(st.session_state.agent.tracer.to_otlp_json(), indent=2),
+                file_name="agent_spans.json",
+                mime="application/json",
+            )
 
+    render_history_panel(load_history())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
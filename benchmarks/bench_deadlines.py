@@ -0,0 +1,81 @@
+"""
+Deadline resolution benchmark.
+
+Resolves --phrases deadline phrases drawn from a realistic mix (weekdays, "EOD
+Friday", "next week", explicit dates in several spellings) three ways:
+python-dateutil's fuzzy parser on every phrase, a fresh DeadlineResolver (each
+distinct phrase worked out once) and the shared resolver whose memoized table
+is already warm, as it is for every meeting after the first one of the day.
+Reports phrases per second for each.
+
+    python benchmarks/bench_deadlines.py --phrases 10000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.append('.')
+
+from dateutil import parser as date_parser
+
+from agent.deadlines import DeadlineResolver, resolver_for
+
+PHRASES = [
+    "today", "tomorrow", "ASAP", "EOD", "EOD Friday", "end of day Monday", "Friday", "this Thursday",
+    "next Tuesday", "Wed", "end of week", "next week", "end of next week", "end of the month", "next month",
+    "March 15th", "Jan 31st", "December 1", "15/3", "3/4", "2026-11-02", "the 20th", "Oct 30",
+]
+
+
+def naive(phrases, reference: date):
+    """Baseline: fuzzy-parse every phrase from scratch (no table, and relative phrases are not understood)."""
+    default = datetime(reference.year, reference.month, reference.day)
+    resolved = 0
+    for phrase in phrases:
+        try:
+            date_parser.parse(phrase, fuzzy=True, default=default)
+            resolved += 1
+        except (ValueError, OverflowError):
+            pass
+    return resolved
+
+
+def memoized(phrases, resolver: DeadlineResolver):
+    return sum(1 for phrase in phrases if resolver.resolve(phrase) is not None)
+
+
+def rate(fn, count: int):
+    started = time.perf_counter()
+    resolved = fn()
+    elapsed = time.perf_counter() - started
+    return count / elapsed, resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=10000)
+    parser.add_argument("--timezone", default="America/New_York")
+    parser.add_argument("--locale", default="en_US")
+    args = parser.parse_args()
+
+    random.seed(0)
+    phrases = [random.choice(PHRASES) for _ in range(args.phrases)]
+    reference = date.today()
+
+    naive_rate, naive_resolved = rate(lambda: naive(phrases, reference), len(phrases))
+    cold_rate, cold_resolved = rate(lambda: memoized(phrases, DeadlineResolver(reference, args.timezone, args.locale)),
+                                    len(phrases))
+    shared = resolver_for(reference, args.timezone, args.locale)
+    memoized(PHRASES, shared)
+    warm_rate, warm_resolved = rate(lambda: memoized(phrases, shared), len(phrases))
+
+    print(f"phrases:                    {len(phrases):,} ({len(PHRASES)} distinct)")
+    print(f"dateutil fuzzy parse:       {naive_rate:12,.0f} phrases/s  ({naive_resolved:,} parsed, no relative dates)")
+    print(f"DeadlineResolver (cold):    {cold_rate:12,.0f} phrases/s  ({cold_resolved:,} resolved)")
+    print(f"shared resolver (warm):     {warm_rate:12,.0f} phrases/s  ({warm_resolved:,} resolved)")
+
+
+if __name__ == "__main__":
+    main()
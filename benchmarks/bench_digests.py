@@ -0,0 +1,95 @@
+"""
+Email digest coalescing benchmark.
+
+Simulates a day of --meetings meetings among --people people (each meeting
+has 3-8 of them) through the agent backed by agent.fake_backend.FakePortia,
+once drafting a summary email per meeting and once with a DigestCoalescer
+that sends one digest per person at the end of the day through the same fake
+Portia. Reports Gmail drafts, the plan runs that drafted them, emails received
+per person and wall time.
+
+    python benchmarks/bench_digests.py --meetings 100 --people 40 --tool-latency 0.02
+"""
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.append('.')
+
+from agent.digests import DigestCoalescer, PortiaMailBackend
+from agent.fake_backend import FakePortia
+from agent.meeting_agent import MeetingNotesAgent
+
+GMAIL = "portia:google:gmail:draft_email"
+
+
+class CountingPortia(FakePortia):
+    """FakePortia that counts the plan runs allowed to draft email."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gmail_runs = 0
+
+    def run(self, query, end_user=None, tools=None, **kwargs):
+        self.gmail_runs += GMAIL in (tools or [])
+        return super().run(query, end_user=end_user, tools=tools, **kwargs)
+
+
+def make_day(meetings: int, people: int):
+    rng = random.Random(0)
+    emails = [f"person{i}@company.com" for i in range(people)]
+    day = []
+    for number in range(meetings):
+        attendees = rng.sample(emails, rng.randint(3, 8))
+        owner = attendees[0].split("@")[0].capitalize()
+        notes = (f"Project sync #{number}\n\nAction: {owner} will send the status report by Friday.\n"
+                 f"Decision: keep the current vendor for project {number}.")
+        day.append((notes, attendees))
+    return day
+
+
+def simulate(day, digests: bool, llm_latency: float, tool_latency: float):
+    portia = CountingPortia(llm_latency=llm_latency, tool_latency=tool_latency)
+    coalescer = DigestCoalescer(PortiaMailBackend(portia), window_seconds=24 * 3600) if digests else None
+    agent = MeetingNotesAgent(portia=portia, digests=coalescer)
+    received = Counter()
+    drafts = 0
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # The agent's DEBUG output
+        for notes, attendees in day:
+            agent.run_agent(notes, attendees)
+            if not digests:
+                drafts += 1  # One summary email to all attendees
+                received.update(attendees)
+        if digests:
+            for sent in agent.flush_digests(force=True)["sent"]:
+                drafts += 1
+                received[sent["to"]] += 1
+    elapsed = time.perf_counter() - started
+    return {"drafts": drafts, "gmail_runs": portia.gmail_runs, "plan_runs": portia.calls,
+            "per_person": sum(received.values()) / max(1, len(received)),
+            "max_per_person": max(received.values()), "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=100)
+    parser.add_argument("--people", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Simulated latency per tool call")
+    args = parser.parse_args()
+
+    day = make_day(args.meetings, args.people)
+    for label, digests in (("email per meeting", False), ("daily digests", True)):
+        stats = simulate(day, digests, args.llm_latency, args.tool_latency)
+        print(f"{label:18}  gmail drafts {stats['drafts']:4} from {stats['gmail_runs']:3} plan runs "
+              f"({stats['plan_runs']} runs in total)  emails/person {stats['per_person']:4.1f} "
+              f"(max {stats['max_per_person']})  {stats['seconds']:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
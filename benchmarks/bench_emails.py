@@ -0,0 +1,77 @@
+"""
+Attendee validation benchmark at distribution-list scale.
+
+Compares the old per-address loop (uncompiled re.match, no de-duplication) with
+agent.emails.normalize_attendees on a synthetic list with duplicates, mixed
+case, display names, invalid entries and group aliases.
+
+    python benchmarks/bench_emails.py --count 100000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+sys.path.append('.')
+
+from agent.emails import normalize_attendees
+
+
+def build_addresses(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    domains = ["company.com", "client.com", "example.org", "sub.dept.company.co.uk"]
+    addresses = []
+    for i in range(count):
+        base = f"user{rng.randint(0, count // 2)}@{rng.choice(domains)}"  # ~2x duplicates
+        roll = rng.random()
+        if roll < 0.1:
+            addresses.append(base.upper())
+        elif roll < 0.15:
+            addresses.append(f"User {i} <{base}>")
+        elif roll < 0.18:
+            addresses.append(f"not-an-email-{i}")
+        elif roll < 0.19:
+            addresses.append("eng-all@company.com")
+        else:
+            addresses.append(f"  {base} ")
+    aliases = {"eng-all@company.com": [f"eng{i}@company.com" for i in range(200)]}
+    return addresses, aliases
+
+
+def legacy(addresses):
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    valid = []
+    for email in addresses:
+        if re.match(email_pattern, email):
+            valid.append(email)
+    return valid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    addresses, aliases = build_addresses(args.count)
+
+    def best_of(fn):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    old_time, old_valid = best_of(lambda: legacy(addresses))
+    new_time, (new_valid, invalid) = best_of(lambda: normalize_attendees(addresses, aliases))
+
+    print(f"addresses:            {args.count:,}")
+    print(f"legacy loop:          {old_time * 1000:8.1f} ms  -> {len(old_valid):,} 'valid' (duplicates kept, no aliases)")
+    print(f"normalize_attendees:  {new_time * 1000:8.1f} ms  -> {len(new_valid):,} unique valid, {len(invalid):,} invalid")
+    print(f"throughput:           {args.count / new_time:,.0f} addresses/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Local fast path benchmark.
+
+Runs --meetings synthetic meetings, of which --structured is the share written
+as "Action: ... by <date>" lines and the rest as free-form notes with open
+questions, through the agent backed by agent.fake_backend.FakePortia. It runs
+them once without and once with a FastPath, with calendar events batched
+locally and summaries queued as digests. Reports the share of runs handled
+locally, plan runs made and latency per run.
+
+    python benchmarks/bench_fast_path.py --meetings 200 --structured 0.6 --llm-latency 0.2
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+from agent.digests import DigestCoalescer, LocalMailbox
+from agent.fake_backend import FakePortia
+from agent.fast_path import FastPath
+from agent.meeting_agent import MeetingNotesAgent
+from agent.scheduling import BulkEventScheduler, LocalCalendarBackend
+
+OWNERS = ["Sarah", "John", "Mike", "Priya", "Alex"]
+TASKS = ["send the status report", "book the venue", "review the contract", "update the roadmap",
+         "fix the login bug", "prepare the demo environment"]
+DEADLINES = ["Friday", "next week", "March 10th", "end of month", "tomorrow"]
+
+
+def make_meetings(meetings: int, structured: float):
+    rng = random.Random(0)
+    day = []
+    for number in range(meetings):
+        items = [(rng.choice(OWNERS), rng.choice(TASKS), rng.choice(DEADLINES)) for _ in range(rng.randint(1, 4))]
+        if rng.random() < structured:
+            lines = [f"Project sync #{number}", "", "Action Items:"]
+            lines += [f"Action: {owner} will {task} by {deadline}." for owner, task, deadline in items]
+            lines += ["", f"Decision: keep the current plan for project {number}."]
+        else:
+            lines = [f"Project sync #{number}", "Went over where things stand, some concerns about scope."]
+            lines += [f"{owner} mentioned we might {task}, maybe by {deadline}?" for owner, task, deadline in items]
+            lines += ["Need to figure out who talks to the client."]
+        day.append(("\n".join(lines), ["team@company.com", "lead@company.com"]))
+    return day
+
+
+def simulate(day, fast: bool, llm_latency: float, tool_latency: float):
+    portia = FakePortia(llm_latency=llm_latency, tool_latency=tool_latency)
+    agent = MeetingNotesAgent(portia=portia, scheduler=BulkEventScheduler(LocalCalendarBackend()),
+                              digests=DigestCoalescer(LocalMailbox(), window_seconds=24 * 3600),
+                              fast_path=FastPath() if fast else None)
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):  # The agent's DEBUG output
+        for notes, attendees in day:
+            started = time.perf_counter()
+            agent.run_agent(notes, attendees)
+            latencies.append(time.perf_counter() - started)
+    stats = agent.fast_path.stats() if fast else {"local_rate": 0.0, "escalation_reasons": {}}
+    latencies.sort()
+    return {"plan_runs": portia.calls, "local_rate": stats["local_rate"], "reasons": stats["escalation_reasons"],
+            "mean_ms": statistics.mean(latencies) * 1000, "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+            "seconds": sum(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=200)
+    parser.add_argument("--structured", type=float, default=0.6, help="Share of meetings with structured notes")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Simulated latency per LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    day = make_meetings(args.meetings, args.structured)
+    for label, fast in (("agent only", False), ("with fast path", True)):
+        stats = simulate(day, fast, args.llm_latency, args.tool_latency)
+        print(f"{label:15}  handled locally {stats['local_rate']:5.0%}  plan runs {stats['plan_runs']:4}  "
+              f"mean {stats['mean_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  total {stats['seconds']:6.2f} s")
+        for reason, count in stats["reasons"].items():
+            print(f"{'':17}escalated: {reason} ({count})")
+
+
+if __name__ == "__main__":
+    main()
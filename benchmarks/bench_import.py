@@ -0,0 +1,69 @@
+"""
+Import-time benchmark based on `python -X importtime`.
+
+Runs each module import in a fresh interpreter, reports the cumulative import
+time and the slowest dependencies, and exits non-zero if any module exceeds its
+budget or pulls in a heavy dependency that should be imported lazily.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget-ms 300 --top 10
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = ["agent.meeting_agent", "agent.utils", "agent.extraction", "agent.cache", "agent.streaming"]
+
+# Packages that must only be imported when actually used
+LAZY_PACKAGES = ["portia", "pandas", "streamlit", "google"]
+
+
+def measure_import(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Imports `module` in a fresh interpreter.
+    Returns (cumulative ms, [(dependency, cumulative ms)], eagerly loaded lazy packages).
+    """
+    check = f"import sys, {module}; print(','.join(p for p in {LAZY_PACKAGES!r} if p in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True, check=True,
+    )
+
+    timings: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if not parts[1].strip().isdigit():
+            continue  # header line
+        name = parts[2].strip()
+        timings[name] = int(parts[1]) / 1000.0
+
+    total = timings.get(module, 0.0)
+    deps = sorted(((name, ms) for name, ms in timings.items() if name != module), key=lambda x: -x[1])
+    eager = [p for p in proc.stdout.strip().split(",") if p]
+    return total, deps, eager
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Maximum cumulative import time per module")
+    parser.add_argument("--top", type=int, default=5, help="How many of the slowest dependencies to show")
+    args = parser.parse_args()
+
+    failed = False
+    for module in MODULES:
+        total, deps, eager = measure_import(module)
+        status = "ok" if total <= args.budget_ms and not eager else "FAIL"
+        failed = failed or status == "FAIL"
+        print(f"{module:<24} {total:8.1f} ms  [{status}]")
+        for name, ms in deps[:args.top]:
+            print(f"    {name:<40} {ms:8.1f} ms")
+        if eager:
+            print(f"    eagerly imported: {', '.join(eager)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
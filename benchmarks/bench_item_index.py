@@ -0,0 +1,99 @@
+"""
+Cross-meeting action item index benchmark.
+
+Fills an ActionItemIndex with --items synthetic open items spread over --owners
+owners, then looks up --queries reworded items (half repeats, half unseen)
+with the MinHash/LSH index and with a linear scan that computes the Jaccard
+similarity against every open item. Also times "open items for owner X"
+against filtering the whole list. Reports microseconds per lookup.
+
+    python benchmarks/bench_item_index.py --items 20000
+"""
+import argparse
+import random
+import sys
+import time
+
+sys.path.append('.')
+
+from agent.item_index import ActionItemIndex, jaccard, owner_key, shingles
+from agent.revisions import item_identity
+
+VERBS = ["send", "review", "update", "fix", "write", "prepare", "schedule", "finalize", "draft", "book"]
+OBJECTS = ["budget report", "login bug", "release notes", "client demo", "vendor contract", "roadmap",
+           "onboarding docs", "pricing page", "security audit", "team offsite", "hiring plan", "test plan"]
+QUALIFIERS = ["for Q{n}", "for project {n}", "v{n}", "for region {n}", "batch {n}"]
+
+
+def synthetic_item(rng: random.Random, owners: int) -> dict:
+    owner = f"Owner{rng.randrange(owners)}"
+    task = (f"{owner} will {rng.choice(VERBS)} the {rng.choice(OBJECTS)} "
+            f"{rng.choice(QUALIFIERS).format(n=rng.randrange(1000))}")
+    return {"task": task, "owner": owner, "deadline": None}
+
+
+def reword(item: dict) -> dict:
+    """The same item as a later meeting might phrase it."""
+    task = item["task"].replace(" will ", " to ").replace(" the ", " ")
+    return dict(item, task=task)
+
+
+def linear_match(items, item, threshold):
+    features = shingles(item_identity(item))
+    best = None
+    for tracked in items:
+        if owner_key(tracked["owner"]) != owner_key(item["owner"]):
+            continue
+        similarity = jaccard(features, shingles(tracked["identity"]))
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (tracked, similarity)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--owners", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = ActionItemIndex()
+    started = time.perf_counter()
+    stored = [synthetic_item(rng, args.owners) for _ in range(args.items)]
+    index.record(stored)
+    build = time.perf_counter() - started
+    items = index.open_items()
+
+    queries = [reword(rng.choice(stored)) if i % 2 == 0 else synthetic_item(rng, args.owners)
+               for i in range(args.queries)]
+
+    started = time.perf_counter()
+    indexed = [index.match(query) for query in queries]
+    indexed_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+    scan_queries = queries[:max(1, min(len(queries), 50))]
+    started = time.perf_counter()
+    scanned = [linear_match(items, query, index.threshold) for query in scan_queries]
+    scan_us = (time.perf_counter() - started) / len(scan_queries) * 1e6
+    agree = sum(1 for a, b in zip(indexed, scanned) if (a is None) == (b is None))
+
+    owner = "Owner7"
+    started = time.perf_counter()
+    for _ in range(100):
+        by_owner = index.open_items(owner)
+    owner_us = (time.perf_counter() - started) / 100 * 1e6
+    started = time.perf_counter()
+    filtered = [item for item in items if owner_key(item["owner"]) == owner_key(owner)]
+    filter_us = (time.perf_counter() - started) * 1e6
+
+    print(f"open items:            {len(items):,} ({args.items:,} recorded in {build:.1f} s)")
+    print(f"linear Jaccard scan:   {scan_us:10,.1f} us/lookup")
+    print(f"MinHash/LSH index:     {indexed_us:10,.1f} us/lookup  "
+          f"({sum(1 for m in indexed if m)} of {len(queries)} matched; {agree}/{len(scan_queries)} agree with the scan)")
+    print(f"open items for owner:  {owner_us:10,.1f} us (index, {len(by_owner)} items)  vs  "
+          f"{filter_us:,.1f} us (filtering all, {len(filtered)} items)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Progress events benchmark.
+
+Runs --runs meetings through the agent backed by agent.fake_backend.FakePortia
+with progress hooks attached, on worker threads the way the Streamlit app
+does, and measures when the user first sees something: the first event
+(notes extracted locally), the plan being ready, the first finished step,
+and the final result, which is all a blocking run_agent() call shows. Also
+reports what publishing the events costs per run with no simulated latency.
+
+    python benchmarks/bench_progress.py --runs 20 --llm-latency 1.0 --tool-latency 0.5
+"""
+import argparse
+import contextlib
+import contextvars
+import io
+import queue
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append('.')
+
+from agent.fake_backend import FakePortia
+from agent.meeting_agent import MeetingNotesAgent
+from agent.progress import ProgressEvents, ProgressMetrics, attach_progress_hooks
+from agent.tracing import Tracer, attach_tracing_hooks
+from agent.utils import create_sample_notes
+
+ATTENDEES = ["sarah@company.com", "john.doe@company.com"]
+
+
+class Hooks:
+    pass
+
+
+def make_agent(llm_latency: float, tool_latency: float, progress: bool) -> MeetingNotesAgent:
+    tracer, events = Tracer(), ProgressEvents()
+    hooks = attach_tracing_hooks(Hooks(), tracer)
+    if progress:
+        attach_progress_hooks(hooks, events, tracer)
+    portia = FakePortia(llm_latency=llm_latency, tool_latency=tool_latency, execution_hooks=hooks)
+    return MeetingNotesAgent(portia=portia, tracer=tracer, progress=events, prompt_mode="condensed")
+
+
+def timed_run(agent: MeetingNotesAgent, notes: str) -> dict:
+    """Seconds from submitting until each kind of feedback, as seen by a listening UI thread."""
+    seen = {}
+    started = time.perf_counter()
+    with agent.progress.listen() as events, ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(contextvars.copy_context().run, agent.run_agent, notes, ATTENDEES)
+        while not (future.done() and events.empty()):
+            try:
+                event = events.get(timeout=0.01)
+            except queue.Empty:
+                continue
+            seen.setdefault("first event", time.perf_counter() - started)
+            if event["type"] in ("plan_created", "step_finished"):
+                seen.setdefault(event["type"], time.perf_counter() - started)
+        future.result()
+    seen["result"] = time.perf_counter() - started
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--tool-latency", type=float, default=0.5)
+    parser.add_argument("--overhead-runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    samples = [sample["notes"] for sample in create_sample_notes()]
+    agent = make_agent(args.llm_latency, args.tool_latency, progress=True)
+    metrics = ProgressMetrics(agent.progress)
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):  # The agent's DEBUG output
+        for run in range(args.runs):
+            results.append(timed_run(agent, samples[run % len(samples)]))
+    metrics.wait()
+
+    print(f"{args.runs} runs, llm latency {args.llm_latency}s, tool latency {args.tool_latency}s")
+    for label, key in (("first feedback (local items)", "first event"), ("plan ready", "plan_created"),
+                       ("first step finished", "step_finished"), ("final result (blocking call)", "result")):
+        values = [result[key] for result in results if key in result]
+        print(f"  {label:30} median {statistics.median(values):7.3f} s")
+    steps = {name: values for name, values in metrics.stats()["latency"].items() if name.startswith(("step:", "tool:"))}
+    slowest = max(steps, key=lambda name: steps[name]["p95_ms"])
+    print(f"  {'slowest step/tool (p95)':30} {slowest} {steps[slowest]['p95_ms']:.0f} ms")
+
+    for progress in (False, True):
+        agent = make_agent(0.0, 0.0, progress)
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for run in range(args.overhead_runs):
+                agent.run_agent(samples[run % len(samples)], ATTENDEES)
+            elapsed = time.perf_counter() - started
+        label = "with progress hooks" if progress else "tracing only"
+        print(f"  {label:30} {elapsed / args.overhead_runs * 1e6:7.0f} us/run (no simulated latency)")
+
+
+if __name__ == "__main__":
+    main()
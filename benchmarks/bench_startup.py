@@ -0,0 +1,59 @@
+"""
+Startup benchmark: per-session agent construction vs. the shared lazy client.
+
+Simulates N Streamlit sessions opening the page. The "per-session" numbers
+rebuild Config, the full DefaultToolRegistry and Portia for every session (the
+old app.py behaviour); the "shared" numbers go through get_shared_agent(), which
+builds one client restricted to the two tools the agent uses.
+
+Needs portia-ai installed and the usual PORTIA_API_KEY / GOOGLE_API_KEY in .env:
+    python benchmarks/bench_startup.py --sessions 20
+"""
+import argparse
+import sys
+import time
+
+sys.path.append('.')
+
+from dotenv import load_dotenv
+
+
+def per_session(sessions: int) -> float:
+    from portia import Config, LLMProvider, Portia, StorageClass
+    from portia.cli import CLIExecutionHooks
+    from portia.tool_registry import DefaultToolRegistry
+
+    start = time.perf_counter()
+    for _ in range(sessions):
+        config = Config.from_default(storage_class=StorageClass.CLOUD, model="gemini-1.5-flash",
+                                     llm_provider=LLMProvider.GOOGLE)
+        Portia(config=config, tools=DefaultToolRegistry(config), execution_hooks=CLIExecutionHooks())
+    return time.perf_counter() - start
+
+
+def shared(sessions: int) -> float:
+    from agent.meeting_agent import get_shared_agent
+
+    start = time.perf_counter()
+    for _ in range(sessions):
+        agent = get_shared_agent()
+        agent.portia  # First access builds the client, later sessions reuse it
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10)
+    args = parser.parse_args()
+    load_dotenv()
+
+    old = per_session(args.sessions)
+    new = shared(args.sessions)
+    print(f"sessions:            {args.sessions}")
+    print(f"per-session startup: {old:.3f}s total, {old / args.sessions * 1000:.1f} ms/session")
+    print(f"shared lazy client:  {new:.3f}s total, {new / args.sessions * 1000:.1f} ms/session")
+    print(f"speedup:             {old / new if new else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
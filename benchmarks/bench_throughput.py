@@ -0,0 +1,163 @@
+"""
+Offline throughput benchmark for MeetingNotesAgent.
+
+Runs synthetic meeting corpora built from create_sample_notes() and
+templates/example_notes.txt through the agent, backed by FakePortia instead of
+Gemini/Google. Reports throughput, per-meeting latency percentiles, per-stage
+span percentiles and peak memory, and can fail on regressions against a saved
+baseline:
+
+    python benchmarks/bench_throughput.py --sizes 50,200 --concurrency 8 \\
+        --llm-latency 0.05 --tool-latency 0.02 --failure-rate 0.02
+    python benchmarks/bench_throughput.py --save-baseline bench_baseline.json
+    python benchmarks/bench_throughput.py --baseline bench_baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.append('.')
+
+from agent.fake_backend import FakePortia
+from agent.meeting_agent import MeetingNotesAgent
+from agent.plans import PlanTemplateStore
+from agent.tracing import Tracer, attach_tracing_hooks, percentile
+from agent.utils import create_sample_notes
+
+CHATTER = [
+    "We spent a few minutes catching up on the weekend.",
+    "Someone's microphone was muted for a while.",
+    "General discussion about the office move, nothing decided.",
+    "Quick detour into last sprint's retro themes.",
+]
+NAMES = ["Sarah", "John", "Mike", "Priya", "Chen", "Alex", "Jennifer", "Omar"]
+
+
+def build_corpus(size: int, length_factor: int = 1, seed: int = 7) -> List[Dict]:
+    """
+    Synthetic meetings: each picks a base template, adds `length_factor` rounds
+    of chatter and extra action items, and gets 2-8 attendees.
+    """
+    rng = random.Random(seed)
+    templates = [sample["notes"] for sample in create_sample_notes()]
+    with open("templates/example_notes.txt", encoding="utf-8") as f:
+        templates.append(f.read())
+
+    corpus = []
+    for i in range(size):
+        lines = [rng.choice(templates).strip(), ""]
+        for _ in range(length_factor):
+            lines.append(rng.choice(CHATTER))
+            owner = rng.choice(NAMES)
+            lines.append(f"{owner} will follow up on item {rng.randint(1, 999)} by Friday.")
+        attendees = [f"{name.lower()}@company.com" for name in rng.sample(NAMES, rng.randint(2, 8))]
+        corpus.append({"id": f"meeting-{i}", "notes": "\n".join(lines), "attendees": attendees})
+    return corpus
+
+
+def run_once(items: List[Dict], args) -> Dict:
+    tracer = Tracer()
+    fake = FakePortia(
+        llm_latency=args.llm_latency, tool_latency=args.tool_latency, failure_rate=args.failure_rate,
+        jitter=args.jitter, seed=args.seed,
+        execution_hooks=attach_tracing_hooks(SimpleNamespace(), tracer),
+    )
+    plan_templates = PlanTemplateStore() if args.plan_templates else None
+    agent = MeetingNotesAgent(portia=fake, tracer=tracer, prompt_mode=args.prompt_mode, plan_templates=plan_templates)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    if args.mode == "async":
+        batch = asyncio.run(agent.arun_batch(items, max_concurrency=args.concurrency))
+    else:
+        batch = agent.run_batch(items, max_concurrency=args.concurrency)
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations = [r["duration"] * 1000 for r in batch["results"]]
+    return {
+        "meetings": len(items),
+        "succeeded": batch["stats"]["succeeded"],
+        "failed": batch["stats"]["failed"],
+        "wall_s": wall,
+        "throughput_per_s": len(items) / wall if wall else 0.0,
+        "p50_ms": percentile(durations, 50),
+        "p95_ms": percentile(durations, 95),
+        "p99_ms": percentile(durations, 99),
+        "peak_mem_mb": peak / (1024 * 1024),
+        "stages": {name: round(stats["p95_ms"], 3) for name, stats in tracer.stats().items()},
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (fractional) in throughput, p95 or memory."""
+    problems = []
+    for size, current in results.items():
+        base = baseline.get(size)
+        if not base:
+            continue
+        if current["throughput_per_s"] < base["throughput_per_s"] * (1 - tolerance):
+            problems.append(f"{size}: throughput {current['throughput_per_s']:.1f}/s < baseline {base['throughput_per_s']:.1f}/s")
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{size}: p95 {current['p95_ms']:.1f}ms > baseline {base['p95_ms']:.1f}ms")
+        if current["peak_mem_mb"] > base["peak_mem_mb"] * (1 + tolerance):
+            problems.append(f"{size}: peak memory {current['peak_mem_mb']:.1f}MB > baseline {base['peak_mem_mb']:.1f}MB")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20,100", help="Comma-separated corpus sizes (meetings per run)")
+    parser.add_argument("--length-factor", type=int, default=3, help="Extra chatter/action rounds per meeting")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--prompt-mode", choices=["full", "condensed"], default="full")
+    parser.add_argument("--plan-templates", action="store_true", help="Plan once and reuse the plan for every meeting")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Simulated planning latency (s)")
+    parser.add_argument("--tool-latency", type=float, default=0.01, help="Simulated latency per tool call (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--save-baseline", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a saved baseline and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        items = build_corpus(size, args.length_factor, args.seed)
+        results[str(size)] = run_once(items, args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'meetings':>8} {'ok':>5} {'fail':>5} {'wall s':>8} {'mtg/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+        for r in results.values():
+            print(f"{r['meetings']:>8} {r['succeeded']:>5} {r['failed']:>5} {r['wall_s']:>8.2f} {r['throughput_per_s']:>8.1f} "
+                  f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['peak_mem_mb']:>8.2f}")
+        last = list(results.values())[-1]
+        print("stage p95 (ms): " + ", ".join(f"{k}={v}" for k, v in last["stages"].items()))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Large transcript upload benchmark.
+
+Writes a synthetic WebVTT transcript of --size-mb megabytes (cue numbers,
+timestamps, voice tags, repeated caption lines) and compares reading it whole
+and cleaning it with per-line regex passes against agent.transcripts.clean_transcript,
+which memory-maps the file, cleans it in one pass and caps the kept text.
+Reports time, MB/s and peak Python heap (tracemalloc).
+
+    python benchmarks/bench_transcripts.py --size-mb 50
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append('.')
+
+from agent.transcripts import clean_transcript
+
+SPEAKERS = ["Sarah Lee", "John", "Mike Chen", "Jennifer"]
+PHRASES = [
+    "I will send the budget by Friday.",
+    "Let's move the launch to next month.",
+    "Mike will fix the login bug by Tuesday.",
+    "Can everyone hear me?",
+    "We decided to keep the current vendor.",
+]
+
+
+def write_transcript(path: str, size_mb: int) -> int:
+    target = size_mb * 1024 * 1024
+    written = 0
+    cue = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\nKind: captions\n\n")
+        while written < target:
+            lines = []
+            for _ in range(1000):
+                cue += 1
+                start = cue * 2
+                speaker = SPEAKERS[cue % len(SPEAKERS)]
+                text = PHRASES[(cue // 2) % len(PHRASES)]  # Every line appears twice (rolling captions)
+                lines.append(f"{cue}\n{_ts(start)} --> {_ts(start + 2)} align:start\n<v {speaker}>{text}</v>\n")
+            block = "\n".join(lines) + "\n"
+            f.write(block)
+            written += len(block)
+    return os.path.getsize(path)
+
+
+def _ts(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000"
+
+
+def naive(path: str) -> str:
+    """Whole file in memory, then one regex pass per kind of markup."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    lines = text.splitlines()
+    lines = [line for line in lines if "-->" not in line]
+    lines = [line for line in lines if not line.strip().isdigit()]
+    lines = [re.sub(r"<[^>]+>", "", line) for line in lines]
+    lines = [line for line in lines if line.strip() and line != "WEBVTT" and not line.startswith("Kind:")]
+    return "\n".join(lines)
+
+
+def measure(fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--max-chars", type=int, default=1_000_000, help="Cap on the cleaned text kept")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transcript.vtt")
+        size = write_transcript(path, args.size_mb)
+        mb = size / (1024 * 1024)
+
+        old_time, old_peak, old_text = measure(lambda: naive(path))
+        new_time, new_peak, result = measure(lambda: clean_transcript(path, max_chars=args.max_chars))
+        # Throughput of the cleaning pass itself, without the cap stopping it early
+        full_time, full_peak, full = measure(lambda: clean_transcript(path, max_chars=size))
+
+    print(f"input:                {mb:,.1f} MB")
+    print(f"read + regex passes:  {old_time:6.2f} s  {mb / old_time:6.1f} MB/s  peak {old_peak / 2**20:7.1f} MB"
+          f"  -> {len(old_text):,} chars")
+    print(f"clean_transcript:     {new_time:6.2f} s  {'':>11}  peak {new_peak / 2**20:7.1f} MB"
+          f"  -> {len(result['text']):,} chars (truncated: {result['truncated']})")
+    print(f"  uncapped:           {full_time:6.2f} s  {mb / full_time:6.1f} MB/s  peak {full_peak / 2**20:7.1f} MB"
+          f"  -> {len(full['text']):,} chars, {full['lines']:,} lines")
+
+
+if __name__ == "__main__":
+    main()
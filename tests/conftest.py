@@ -0,0 +1,16 @@
+import pytest
+
+import agent.meeting_agent
+
+
+@pytest.fixture(autouse=True)
+def _no_demo_mode(monkeypatch):
+    """test_demo_mode.py flips DEMO_MODE on for the whole process; keep these tests on the real path."""
+    monkeypatch.delenv("DEMO_MODE", raising=False)
+    monkeypatch.delenv("DEMO_LATENCY_SECONDS", raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_shared_agent(monkeypatch):
+    """get_shared_agent() builds one agent per process; don't let one test's agent leak into the next."""
+    monkeypatch.setattr(agent.meeting_agent, "_shared_agent", None)
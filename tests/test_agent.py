@@ -43,8 +43,13 @@
 
 # In tests/test_agent.py
 
+import asyncio
+
 import pytest
-from agent.meeting_agent import MeetingNotesAgent
+from agent.cache import ResultCache
+from agent.fake_backend import FakePortia
+from agent.meeting_agent import MeetingNotesAgent, get_shared_agent
+from agent.scheduling import BulkEventScheduler, LocalCalendarBackend
 
 # --- Test Data (from your example_notes.txt) ---
 
@@ -123,4 +128,456 @@ def test_agent_with_real_examples(mocker, notes_data, attendees_data, expected_k
     agent_task_prompt = call_args[0] # The first argument passed to portia.run()
     
     for keyword in expected_keywords:
-        assert keyword in agent_task_prompt
\ No newline at end of file
+        assert keyword in agent_task_prompt
+
+def test_run_batch_preserves_input_order(mocker):
+    """Batch results come back in input order with aggregate stats."""
+    agent = MeetingNotesAgent()
+    mock_run = mocker.patch.object(agent.portia, 'run')
+
+    class FakePlanRun:
+        def __init__(self):
+            self.outputs = self
+            self.final_output = "Mocked: Actions completed successfully."
+            self.id = "mock_plan_123"
+    mock_run.return_value = FakePlanRun()
+
+    items = [
+        {"notes": standup_notes, "attendees": standup_attendees},
+        {"notes": "", "attendees": standup_attendees},  # invalid: empty notes
+        {"notes": client_notes, "attendees": ", ".join(client_attendees), "context": "Test context"},
+    ]
+    batch = agent.run_batch(items, max_concurrency=2)
+
+    assert [r["index"] for r in batch["results"]] == [0, 1, 2]
+    assert [r["success"] for r in batch["results"]] == [True, False, True]
+    assert batch["stats"]["total"] == 3
+    assert batch["stats"]["succeeded"] == 2
+    assert batch["stats"]["failed"] == 1
+    assert mock_run.call_count == 2
+
+
+def test_arun_agent_returns_failure_on_timeout(monkeypatch):
+    """arun_agent gives up after the timeout instead of blocking the event loop."""
+    monkeypatch.setenv("DEMO_MODE", "true")
+    monkeypatch.setenv("DEMO_LATENCY_SECONDS", "1")
+    agent = MeetingNotesAgent()
+
+    result = asyncio.run(agent.arun_agent(standup_notes, standup_attendees, timeout=0.05))
+
+    assert result["success"] is False
+    assert result["timed_out"] is True
+
+
+def test_arun_batch_overlaps_runs(monkeypatch):
+    """Demo runs with simulated latency overlap on one event loop."""
+    monkeypatch.setenv("DEMO_MODE", "true")
+    monkeypatch.setenv("DEMO_LATENCY_SECONDS", "0.1")
+    agent = MeetingNotesAgent()
+    items = [{"notes": standup_notes, "attendees": standup_attendees}] * 10
+
+    batch = asyncio.run(agent.arun_batch(items, max_concurrency=10))
+
+    assert batch["stats"]["succeeded"] == 10
+    assert batch["stats"]["wall_time"] < 0.5
+
+
+def test_cache_hit_skips_portia(mocker):
+    """A repeated submission is answered from the cache without re-running tools."""
+    agent = MeetingNotesAgent(cache=ResultCache())
+    mock_run = mocker.patch.object(agent.portia, 'run')
+
+    class FakePlanRun:
+        def __init__(self):
+            self.outputs = self
+            self.final_output = "Mocked: Actions completed successfully."
+            self.id = "mock_plan_123"
+    mock_run.return_value = FakePlanRun()
+
+    first = agent.run_agent(standup_notes, standup_attendees, "Test context")
+    second = agent.run_agent(standup_notes, list(reversed(standup_attendees)), "Test context")
+
+    assert mock_run.call_count == 1
+    assert first.get("cached") is None
+    assert second["cached"] is True
+    assert second["plan_id"] == "mock_plan_123"
+    assert second["result"].outputs.final_output == "Mocked: Actions completed successfully."
+
+
+def test_condensed_prompt_mode_sends_extract(mocker):
+    """Condensed mode sends the local extract instead of the raw notes."""
+    agent = MeetingNotesAgent(prompt_mode="condensed")
+    mock_run = mocker.patch.object(agent.portia, 'run')
+    mock_run.return_value = mocker.Mock(id="mock_plan_123")
+
+    notes = client_notes + "\nAction: Jennifer will send the revised timeline by January 31st\n" + "small talk\n" * 50
+    result = agent.run_agent(notes, client_attendees)
+
+    assert result["prompt_mode"] == "condensed"
+    prompt = mock_run.call_args[0][0]
+    assert "owner: Jennifer; deadline: January 31st" in prompt
+    assert "small talk" not in prompt
+    assert result["prompt_chars"] == len(prompt)
+
+
+def test_stream_agent_yields_partials_then_final(mocker):
+    """stream_agent reports items per segment and runs the agent once on the merged extract."""
+    agent = MeetingNotesAgent()
+    mock_run = mocker.patch.object(agent.portia, 'run')
+    mock_run.return_value = mocker.Mock(id="mock_plan_123")
+    notes = "\n".join(f"Person{i} will send report {i} by Friday." for i in range(30))
+
+    events = list(agent.stream_agent(notes, standup_attendees, segment_chars=300))
+
+    assert [e["type"] for e in events[:-1]] == ["partial"] * (len(events) - 1)
+    assert len(events) > 2
+    assert events[-1]["type"] == "final"
+    assert events[-1]["result"]["prompt_mode"] == "condensed"
+    mock_run.assert_called_once()
+
+    # Streamed transcripts are condensed even when the agent-wide mode is "full"; full is opt-in
+    assert agent.prompt_mode == "full"
+    assert notes not in mock_run.call_args[0][0]
+    full = list(agent.stream_agent(notes, standup_attendees, segment_chars=300, prompt_mode="full"))[-1]["result"]
+    assert full["prompt_mode"] == "full"
+    assert notes in mock_run.call_args[0][0]
+
+
+def test_portia_client_is_built_lazily_and_shared():
+    """Creating agents is cheap; one process-wide agent is reused across callers."""
+    agent = MeetingNotesAgent()
+    assert agent._portia is None
+
+    assert get_shared_agent() is get_shared_agent()
+
+
+def test_batched_calendar_keeps_calendar_tool_away_from_agent(mocker):
+    """With a scheduler, events are created locally in one batch and the agent only drafts email."""
+    backend = LocalCalendarBackend()
+    agent = MeetingNotesAgent(scheduler=BulkEventScheduler(backend))
+    mock_run = mocker.patch.object(agent.portia, 'run')
+    mock_run.return_value = mocker.Mock(id="mock_plan_123")
+
+    first = agent.run_agent(client_notes, client_attendees)
+    second = agent.run_agent(client_notes, client_attendees)
+
+    assert mock_run.call_args.kwargs["tools"] == ["portia:google:gmail:draft_email"]
+    assert len(first["calendar"]["created"]) == 1  # "Need comprehensive demo by March 15th"
+    assert second["calendar"]["created"] == []
+    assert backend.batch_calls == 1
+
+
+def test_fake_backend_drives_agent_offline():
+    """The pluggable fake backend runs the real code path and simulates failures."""
+    ok_agent = MeetingNotesAgent(portia=FakePortia(llm_latency=0.01, tool_latency=0.005))
+    failing_agent = MeetingNotesAgent(portia=FakePortia(failure_rate=1.0))
+
+    ok = ok_agent.run_agent(client_notes, client_attendees)
+    failed = failing_agent.run_agent(client_notes, client_attendees)
+
+    assert ok["success"] is True
+    assert ok["plan_id"] == "fake-run-1"
+    assert ok["timings"]["execute"] >= 20
+    assert failed["success"] is False
+    assert "429" in failed["error"]
+
+
+def test_reprocess_only_acts_on_edited_items():
+    """Resubmitting edited notes under the same meeting id reconciles only the delta."""
+    backend = LocalCalendarBackend()
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, scheduler=BulkEventScheduler(backend))
+    notes = ("Sarah will send the budget by Friday.\n\n"
+             "John will finalize the specs by Monday.\n\n"
+             "Some chatter about lunch.")
+
+    first = agent.reprocess("weekly-sync", notes, ["sarah@company.com"])
+    typo = agent.reprocess("weekly-sync", notes.replace("lunch", "lunch plans"), ["sarah@company.com"])
+    edited = agent.reprocess("weekly-sync", notes.replace("by Monday", "by Tuesday").replace(
+        "Sarah will send the budget by Friday.\n\n", ""), ["sarah@company.com"])
+
+    assert first["revision"] == 1 and len(first["calendar"]["created"]) == 2
+    assert typo["unchanged"] is True
+    assert typo["changed_sections"] == 1 and typo["reused_sections"] == 2
+    assert fake.calls == 2
+    assert edited["prompt_mode"] == "delta"
+    assert [item["deadline"] for item in edited["delta"]["updated"]] == ["Tuesday"]
+    assert len(edited["calendar"]["cancelled"]) == 1
+    assert len(backend.events) == 1
+    assert backend.batch_calls == 3
+
+
+def test_reprocess_keeps_events_when_the_agent_fails_after_reconcile(mocker):
+    """Events created before a failed agent run are stored, so the retry does not create them again."""
+    from agent.fake_backend import FakeBackendError
+
+    backend = LocalCalendarBackend()
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, scheduler=BulkEventScheduler(backend))
+    notes = "Sarah will send the budget by Friday.\n\nJohn will finalize the specs by Monday."
+    mocker.patch.object(fake, "run", side_effect=FakeBackendError("500 backend error"))
+
+    failed = agent.reprocess("weekly-sync", notes, ["sarah@company.com"])
+
+    assert not failed.success
+    stored = agent.revisions.get("weekly-sync")
+    assert stored["version"] == 0
+    assert sorted(event["event_id"] for event in stored["events"].values()) == sorted(backend.events)
+
+    fake.run.side_effect = None
+    fake.run.return_value = FakePortia().run("retry")
+    retried = agent.reprocess("weekly-sync", notes, ["sarah@company.com"])
+
+    assert retried.success and retried["revision"] == 1
+    assert retried["calendar"]["created"] == [] and len(retried["calendar"]["skipped"]) == 2
+    assert len(backend.events) == 2 and backend.batch_calls == 1
+
+
+def test_plan_template_is_planned_once_and_reused(tmp_path):
+    """Meetings with the same options run the stored plan with only their inputs substituted."""
+    from agent.plans import PlanTemplateStore
+
+    db_path = str(tmp_path / "plans.db")
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, plan_templates=PlanTemplateStore(db_path))
+
+    first = agent.run_agent(standup_notes, standup_attendees, "Test context")
+    second = agent.run_agent(client_notes, client_attendees, "Test context")
+    other_context = agent.run_agent(client_notes, client_attendees, "Only draft the email")
+    # A new process reloads the template from disk instead of planning again
+    restarted = MeetingNotesAgent(portia=fake, plan_templates=PlanTemplateStore(db_path))
+    restarted.run_agent(client_notes, client_attendees, "Test context")
+
+    assert first["success"] and second["success"] and other_context["success"]
+    assert fake.plans == 2
+    assert fake.calls == 4
+    # The notes were substituted into the template, so the prompts differ in size
+    assert first.summary != second.summary
+    assert agent.plan_templates.stats() == {"hits": 1, "misses": 2, "templates": 2}
+    assert restarted.plan_templates.stats()["hits"] == 1
+
+
+def test_prompt_budget_trims_notes_and_records_tokens():
+    """Over-budget notes are condensed before they reach the model; every run is metered."""
+    from agent.budget import TokenBudget
+
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, budget=TokenBudget(max_prompt_tokens=400, prompt_cost_per_1k=0.5))
+    notes = client_notes + "\nAction: Jennifer will send the revised timeline by January 31st\n" + "small talk\n" * 400
+
+    result = agent.run_agent(notes, client_attendees)
+
+    assert result["success"]
+    assert result.prompt_mode == "condensed"
+    assert result.tokens["trimmed"] == ["whitespace", "condensed"]
+    assert result.tokens["prompt_tokens"] <= 400
+    assert result.tokens["cost"] == result.tokens["prompt_tokens"] * 0.5 / 1000
+    assert agent.budget.stats()["runs"] == 1
+
+    # Smaller than the prompt template itself: a clear, non-retryable error instead of a marker-only prompt
+    tiny = MeetingNotesAgent(portia=fake, budget=TokenBudget(max_prompt_tokens=50))
+    failed = tiny.run_agent(notes, client_attendees)
+    assert not failed["success"] and not failed["retryable"]
+    assert "leaves no room for the notes" in failed["error"]
+    assert fake.calls == 1
+
+
+def test_cached_summaries_are_not_shared_across_budgets():
+    """A summary written from a trimmed prompt is not served to an agent with another budget, and vice versa."""
+    from agent.budget import TokenBudget
+
+    fake, cache = FakePortia(), ResultCache()
+    notes = client_notes + "small talk\n" * 400
+    for budget in (None, 400, None):
+        MeetingNotesAgent(portia=fake, cache=cache, budget=TokenBudget(max_prompt_tokens=budget)).run_agent(
+            notes, client_attendees)
+
+    assert fake.calls == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_cached_summaries_are_not_shared_across_digest_settings():
+    """A summary cached while the agent emailed attendees itself is not served to an agent that queues digests."""
+    from agent.digests import DigestCoalescer, LocalMailbox
+
+    fake, cache = FakePortia(), ResultCache()
+    emailing = MeetingNotesAgent(portia=fake, cache=cache)
+    digesting = MeetingNotesAgent(portia=fake, cache=cache, digests=DigestCoalescer(LocalMailbox(), window_seconds=3600))
+
+    emailing.run_agent(client_notes, client_attendees)
+    queued = digesting.run_agent(client_notes, client_attendees)
+    again = digesting.run_agent(client_notes, client_attendees)
+
+    assert fake.calls == 2
+    assert not queued.get("cached") and again["cached"]
+
+
+def test_deadlines_are_resolved_before_the_prompt_is_built(mocker):
+    """Full prompts carry a phrase -> date table; condensed prompts and result items carry their dates."""
+    from agent.deadlines import today_in
+
+    agent = MeetingNotesAgent(timezone="America/New_York", locale="en_US")
+    mock_run = mocker.patch.object(agent.portia, 'run')
+    mock_run.return_value = mocker.Mock(id="mock_plan_123")
+    due = agent.deadline_resolver().resolve("tomorrow")["date"]
+
+    agent.run_agent("Action: Sarah will send the budget by tomorrow.", standup_attendees)
+    condensed = agent.run_agent("Action: Sarah will send the budget by tomorrow.", standup_attendees,
+                                prompt_mode="condensed")
+
+    prompt = mock_run.call_args_list[0][0][0]
+    assert f"Today's date is {today_in('America/New_York').isoformat()}" in prompt
+    assert f"- tomorrow: {due}" in prompt
+    assert f"deadline: tomorrow = {due}" in mock_run.call_args_list[1][0][0]
+    assert condensed.action_items[0].due_date == due
+
+
+def test_item_index_skips_items_repeated_from_earlier_meetings(mocker):
+    """A recurring meeting's repeated items are flagged in the prompt and not scheduled again."""
+    from agent.item_index import ActionItemIndex
+
+    backend = LocalCalendarBackend()
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, scheduler=BulkEventScheduler(backend), item_index=ActionItemIndex())
+    run = mocker.spy(fake, "run")
+    week1 = "Weekly standup\n\nSarah will send the budget report by March 15th.\n\nJohn will fix the login bug."
+    week2 = ("Weekly standup (week 2)\n\nSarah to send budget report by March 15th.\n\n"
+             "John will fix the login bug by March 20th.\n\nMike will update the docs by March 18th.")
+
+    first = agent.run_agent(week1, ["sarah@company.com"])
+    second = agent.run_agent(week2, ["sarah@company.com"])
+
+    assert first["tracked"] == {"new": 2, "duplicate": 0, "updated": 0}
+    assert second["tracked"] == {"new": 1, "duplicate": 1, "updated": 1}
+    prompt = run.call_args[0][0]
+    assert "ALREADY TRACKED" in prompt and "Sarah to send budget report" in prompt
+    # The login bug got a deadline, so it is scheduled now; the budget report was scheduled in week 1
+    assert sorted(event["deadline"] for event in second["calendar"]["created"]) == ["March 18th", "March 20th"]
+    assert len(agent.item_index.open_items("john")) == 1
+    assert agent.item_index.open_items("John")[0]["deadline"] == "March 20th"
+
+    # The budget report slips: its week 1 event is moved rather than a second one created
+    week3 = "Weekly standup (week 3)\n\nSarah will send the budget report by March 22nd."
+    third = agent.run_agent(week3, ["sarah@company.com"])
+    budget = agent.item_index.open_items("sarah")[0]
+
+    assert third["tracked"] == {"new": 0, "duplicate": 0, "updated": 1}
+    assert third["calendar"]["created"] == []
+    assert [event["deadline"] for event in third["calendar"]["updated"]] == ["March 22nd"]
+    assert backend.events[budget["event_id"]]["deadline"] == "March 22nd"
+    assert len(backend.events) == 3
+
+
+def test_reprocessed_edits_keep_the_item_index_current():
+    """Items added, moved or removed by an edit are recorded in the index, not only those of the first run."""
+    from agent.item_index import ActionItemIndex
+
+    agent = MeetingNotesAgent(portia=FakePortia(), scheduler=BulkEventScheduler(LocalCalendarBackend()),
+                              item_index=ActionItemIndex())
+    notes = "Sarah will send the budget by Friday.\n\nJohn will finalize the specs by Monday."
+
+    agent.reprocess("weekly-sync", notes, ["sarah@company.com"])
+    edited = agent.reprocess("weekly-sync", notes.replace("by Monday", "by Tuesday").replace(
+        "Sarah will send the budget by Friday.", "Mike will book the venue by Thursday."), ["sarah@company.com"])
+
+    assert edited["tracked"] == {"new": 1, "duplicate": 0, "updated": 1, "closed": 1}
+    assert agent.item_index.open_items("sarah") == []
+    assert agent.item_index.open_items("john")[0]["deadline"] == "Tuesday"
+    assert agent.item_index.open_items("mike")[0]["event_id"]
+
+
+def test_digests_replace_per_meeting_emails(mocker):
+    """With a coalescer the agent drafts no email; attendees get one digest for all their meetings."""
+    from agent.digests import DigestCoalescer, LocalMailbox
+
+    mailbox = LocalMailbox()
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, digests=DigestCoalescer(mailbox, window_seconds=3600))
+    run = mocker.spy(fake, "run")
+
+    first = agent.run_agent(standup_notes, standup_attendees)
+    second = agent.run_agent(client_notes, standup_attendees[:1])
+
+    assert run.call_args.kwargs["tools"] == ["portia:google:gcalendar:create_event"]
+    assert "Do NOT email anyone" in run.call_args[0][0]
+    assert first["digest"] == {"queued_for": 2, "sent": []}
+    assert second.email_draft is None
+    assert mailbox.batch_calls == 0
+
+    report = agent.flush_digests(force=True)
+
+    assert sorted((sent["to"], sent["meetings"]) for sent in report["sent"]) == [
+        ("john.doe@company.com", 1), ("sarah@company.com", 2)]
+    assert mailbox.batch_calls == 1
+
+
+def test_reprocessed_edits_go_into_the_digest(mocker):
+    """Edits resubmitted with a coalescer are queued for the digest like full runs, not emailed."""
+    from agent.digests import DigestCoalescer, LocalMailbox
+
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, scheduler=BulkEventScheduler(LocalCalendarBackend()),
+                              digests=DigestCoalescer(LocalMailbox(), window_seconds=3600))
+    run = mocker.spy(fake, "run")
+    notes = "Sarah will send the budget by Friday.\n\nJohn will finalize the specs by Monday."
+
+    agent.reprocess("weekly-sync", notes, ["sarah@company.com"])
+    edited = agent.reprocess("weekly-sync", notes.replace("by Monday", "by Tuesday"), ["sarah@company.com"])
+
+    assert edited["prompt_mode"] == "delta"
+    assert run.call_args.kwargs["tools"] == []
+    assert "Do NOT email anyone" in run.call_args[0][0]
+    assert edited["digest"] == {"queued_for": 1, "sent": []}
+    assert agent.digests.stats()["pending"] == 2  # The first submission and the edit, one digest later
+
+
+def test_fast_path_answers_structured_notes_without_portia(mocker):
+    """Fully understood notes skip Portia entirely; free-form notes still go to the agent."""
+    from agent.digests import DigestCoalescer, LocalMailbox
+    from agent.fast_path import FastPath
+
+    backend = LocalCalendarBackend()
+    fake = FakePortia()
+    agent = MeetingNotesAgent(portia=fake, scheduler=BulkEventScheduler(backend), fast_path=FastPath(),
+                              digests=DigestCoalescer(LocalMailbox(), window_seconds=3600))
+    run = mocker.spy(fake, "run")
+    notes = ("Budget sync\n\nAction: Sarah will send the budget report by March 15th.\n"
+             "Action: John to book the venue.\nDecision: Keep the current vendor.")
+
+    local = agent.run_agent(notes, standup_attendees)
+
+    assert run.call_count == 0
+    assert local.success and local["fast_path"]["local"]
+    assert local.tokens == {} and local.prompt_chars == 0
+    assert len(backend.events) == 1
+    assert local["digest"]["queued_for"] == 2
+    assert local.email_draft.startswith("To: sarah@company.com, john.doe@company.com")
+    assert "Sarah will send the budget report" in local.summary
+
+    escalated = agent.run_agent(standup_notes, standup_attendees)
+
+    assert run.call_count == 1
+    assert not escalated["fast_path"]["local"]
+    assert agent.fast_path.stats()["local_rate"] == 0.5
+
+
+def test_run_publishes_progress_events():
+    """The agent brackets each run with progress events; Portia's hooks fill in the steps."""
+    from agent.progress import ProgressEvents, attach_progress_hooks
+    from agent.tracing import Tracer
+
+    class Hooks:
+        pass
+
+    tracer, progress = Tracer(), ProgressEvents()
+    fake = FakePortia(execution_hooks=attach_progress_hooks(Hooks(), progress, tracer))
+    agent = MeetingNotesAgent(portia=fake, tracer=tracer, progress=progress, prompt_mode="condensed")
+
+    with progress.listen() as events:
+        result = agent.run_agent(standup_notes, standup_attendees)
+
+    seen = [events.get_nowait() for _ in range(events.qsize())]
+    assert [event["type"] for event in seen][:3] == ["run_started", "prepared", "plan_created"]
+    assert seen[1]["action_items"] == len(result.action_items)
+    assert seen[-1]["type"] == "run_finished" and "error" not in seen[-1]
+    assert {event["trace_id"] for event in seen} == {result.trace_id}
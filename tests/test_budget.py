@@ -0,0 +1,48 @@
+import pytest
+
+from agent.budget import (TRUNCATION_MARKER, PromptBudgetExceeded, TokenBudget, collapse_whitespace, estimate_tokens,
+                          format_attendees)
+
+
+def test_collapse_whitespace_keeps_lines():
+    text = "  Sarah   will send\tthe budget by Friday.  \n\n\n\n  John will review it.\n"
+
+    assert collapse_whitespace(text) == "Sarah will send the budget by Friday.\n\nJohn will review it."
+
+
+def test_fit_condenses_then_truncates_until_within_budget():
+    notes = "Sarah will send the budget by Friday.\n" + "small talk about the weather\n" * 200
+    emails = [f"person{i}@company.com" for i in range(30)]
+    budget = TokenBudget(max_prompt_tokens=300, max_attendees=5)
+
+    condensed = budget.fit(notes, emails, overhead_tokens=100, condense=lambda: "- Send budget (owner: Sarah)")
+    truncated = budget.fit(notes, emails, overhead_tokens=100, condense=lambda: None)
+
+    assert condensed["steps"] == ["attendees", "whitespace", "condensed"]
+    assert condensed["attendees_text"].endswith("(and 25 more attendees not listed)")
+    assert truncated["steps"] == ["attendees", "whitespace", "truncated"]
+    assert truncated["notes_block"].endswith(TRUNCATION_MARKER)
+    assert 100 + estimate_tokens(truncated["notes_block"]) + estimate_tokens(truncated["attendees_text"]) <= 300
+    assert truncated["tokens_saved"] > 0
+    # Without a budget nothing is changed
+    assert TokenBudget().fit(notes, emails, 100)["notes_block"] == notes
+    assert format_attendees(emails[:2], 5) == "person0@company.com, person1@company.com"
+
+
+def test_measure_meters_tokens_and_cost():
+    budget = TokenBudget(prompt_cost_per_1k=1.0, response_cost_per_1k=2.0)
+
+    usage = budget.measure("x" * 4000, "y" * 400, parts={"notes": "x" * 2000}, trimmed=["whitespace"])
+
+    assert usage["prompt_tokens"] == 1000 and usage["response_tokens"] == 100
+    assert usage["stages"] == {"notes": 500, "instructions": 500, "response": 100}
+    assert usage["cost"] == 1.2
+    stats = budget.stats()
+    assert stats["runs"] == 1 and stats["trimmed_runs"] == 1 and stats["cost"] == 1.2
+
+
+def test_budget_smaller_than_the_template_is_an_error():
+    budget = TokenBudget(max_prompt_tokens=120)
+
+    with pytest.raises(PromptBudgetExceeded, match="leaves no room for the notes"):
+        budget.fit("Sarah will send the budget by Friday.", ["sarah@company.com"], overhead_tokens=200)
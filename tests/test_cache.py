@@ -0,0 +1,47 @@
+import time
+
+from agent.cache import ResultCache, make_cache_key
+
+
+def test_cache_key_ignores_whitespace_and_attendee_order():
+    key_a = make_cache_key("Sarah owns the budget.\n\n  John owns specs.", ["b@x.com", "a@x.com"], "ctx", "2025-01-24")
+    key_b = make_cache_key("  Sarah owns   the budget.\nJohn owns specs.  ", ["A@x.com", "b@x.com"], "ctx", "2025-01-24")
+    assert key_a == key_b
+
+
+def test_cache_key_changes_with_context_and_date():
+    base = make_cache_key("notes", ["a@x.com"], "ctx", "2025-01-24")
+    assert base != make_cache_key("notes", ["a@x.com"], "other ctx", "2025-01-24")
+    assert base != make_cache_key("notes", ["a@x.com"], "ctx", "2025-01-25")
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", "plan-a", "summary a")
+    cache.set("b", "plan-b", "summary b")
+    assert cache.get("a")["final_output"] == "summary a"  # "a" becomes most recent
+    cache.set("c", "plan-c", "summary c")  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c")["plan_id"] == "plan-c"
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl_seconds=0.01)
+    cache.set("a", "plan-a", "summary a")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResultCache(db_path=db_path).set("a", "plan-a", "summary a")
+
+    fresh = ResultCache(db_path=db_path)
+    entry = fresh.get("a")
+    assert entry["final_output"] == "summary a"
+    assert fresh.stats()["disk_hits"] == 1
@@ -0,0 +1,59 @@
+import json
+
+import agent.meeting_agent
+from agent.__main__ import completed_ids, in_shard, iter_meetings, main
+
+
+def _write_inputs(directory):
+    (directory / "standup.txt").write_text("Sarah (sarah@company.com) will send the budget by Friday.\n")
+    (directory / "batch.jsonl").write_text(
+        json.dumps({"id": "m1", "notes": "Bob will fix the bug by Monday.", "attendees": "bob@company.com"}) + "\n"
+        + "\n"
+        + json.dumps({"notes": "Ann will write the docs.", "attendees": ["ann@company.com"]}) + "\n"
+    )
+
+
+def test_directory_input_gets_stable_ids(tmp_path):
+    _write_inputs(tmp_path)
+    meetings = dict(iter_meetings(str(tmp_path)))
+
+    assert list(meetings) == ["m1", "batch.jsonl:3", "standup.txt"]
+    assert meetings["standup.txt"]["attendees"] == ["sarah@company.com"]
+
+
+def test_cli_writes_jsonl_and_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DEMO_MODE", "true")
+    # Configured like the app: calendar events are batched into the local calendar
+    monkeypatch.setenv("CALENDAR_BACKEND", "local")
+    inputs = tmp_path / "meetings"
+    inputs.mkdir()
+    _write_inputs(inputs)
+    output = tmp_path / "results.jsonl"
+    # An earlier run finished m1, failed one meeting and was killed mid-write
+    output.write_text(
+        json.dumps({"id": "m1", "success": True}) + "\n"
+        + json.dumps({"id": "standup.txt", "success": False}) + "\n"
+        + '{"id": "batch.jsonl:3", "succ'
+    )
+    assert completed_ids(str(output)) == {"m1"}
+
+    assert main([str(inputs), "--output", str(output), "--resume", "--concurrency", "2"]) == 0
+
+    lines = output.read_text().splitlines()
+    assert lines[2] == '{"id": "batch.jsonl:3", "succ'
+    records = [json.loads(line) for line in lines[3:]]
+    assert sorted(record["id"] for record in records) == ["batch.jsonl:3", "standup.txt"]
+    assert all(record["success"] and record["worker"] for record in records)
+    assert completed_ids(str(output)) == {"m1", "batch.jsonl:3", "standup.txt"}
+    assert agent.meeting_agent._shared_agent is None  # The CLI's agent is its own, not the process-wide one
+    assert [len(record["calendar"]["created"]) for record in records if record["id"] == "standup.txt"] == [1]
+    assert (tmp_path / "local_calendar.json").exists()
+
+
+def test_shards_partition_the_input():
+    ids = [f"meeting-{i}" for i in range(50)]
+    shards = [[i for i in ids if in_shard(i, (index, 3))] for index in range(3)]
+
+    assert sorted(sum(shards, [])) == sorted(ids)
+    assert all(shards)
@@ -0,0 +1,56 @@
+from datetime import date
+
+from agent.deadlines import (DeadlineResolver, deadline_phrases, format_resolved_deadlines, resolve_deadlines,
+                             resolver_for)
+
+# A Wednesday
+REFERENCE = date(2026, 10, 14)
+
+
+def test_relative_and_explicit_phrases_resolve_from_the_reference_date():
+    resolver = DeadlineResolver(REFERENCE, "Europe/Berlin", "en_GB")
+    dates = {phrase: (resolver.resolve(phrase) or {}).get("date") for phrase in [
+        "today", "ASAP", "tomorrow", "EOD Friday", "Wednesday", "next Tuesday", "end of next week",
+        "end of month", "next month", "March 15th", "15/3", "2026-03-15", "October 1st", "whenever",
+    ]}
+
+    assert dates == {
+        "today": "2026-10-14", "ASAP": "2026-10-14", "tomorrow": "2026-10-15", "EOD Friday": "2026-10-16",
+        "Wednesday": "2026-10-14", "next Tuesday": "2026-10-20", "end of next week": "2026-10-23",
+        "end of month": "2026-10-31", "next month": "2026-11-30",
+        # Long past without a year means next year; recently past or with a year stays put
+        "March 15th": "2027-03-15", "15/3": "2027-03-15", "2026-03-15": "2026-03-15",
+        "October 1st": "2026-10-01", "whenever": None,
+    }
+    # Due times are at the end of the day in the configured timezone (CET once DST ends)
+    assert resolver.resolve("Friday")["due"] == "2026-10-16T17:00:00+02:00"
+    assert resolver.resolve("end of month")["due"] == "2026-10-31T17:00:00+01:00"
+
+
+def test_locale_decides_numeric_date_order_and_tables_are_memoized():
+    us = resolver_for(REFERENCE, None, "en_US")
+    gb = resolver_for(REFERENCE, None, "en_GB")
+
+    assert us.resolve("3/4")["date"] == "2027-03-04"
+    assert gb.resolve("3/4")["date"] == "2027-04-03"
+    assert resolver_for(REFERENCE, None, "en_US") is us
+    us.resolve("EOD  friday.")
+    us.resolve("eod Friday")
+    assert us.table_size() == 2
+
+
+def test_extract_items_get_due_dates_and_notes_get_a_deadline_table():
+    resolver = DeadlineResolver(REFERENCE)
+    extract = {"action_items": [
+        {"task": "Send the budget", "deadline": "Friday"},
+        {"task": "Review the budget", "deadline": "friday"},
+        {"task": "Write docs", "deadline": None},
+        {"task": "Ship it", "deadline": "someday soon"},
+    ]}
+
+    resolved = resolve_deadlines(extract, resolver)
+
+    assert [item["due_date"] for item in extract["action_items"]] == ["2026-10-16", "2026-10-16", None, None]
+    assert format_resolved_deadlines(resolved).splitlines()[1:] == ["- Friday: 2026-10-16 (Friday)"]
+    assert deadline_phrases("Bob will fix it by Monday. Docs (due: March 15th). Ann by monday.") == [
+        "Monday", "March 15th"]
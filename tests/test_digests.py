@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from agent.digests import DigestCoalescer, LocalMailbox, PortiaMailBackend, owned_by, render_digest, start_flush_timer
+from agent.resilience import ResilientCaller
+from agent.utils import PlanRunFailed
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class StubPortia:
+    """Returns the queued plan runs in turn; an exception in the queue is raised instead."""
+
+    def __init__(self, *plan_runs):
+        self.plan_runs = list(plan_runs)
+        self.queries = []
+
+    def run(self, query, end_user=None, tools=None):
+        self.queries.append(query)
+        plan_run = self.plan_runs.pop(0)
+        if isinstance(plan_run, Exception):
+            raise plan_run
+        return plan_run
+
+
+def _queue_meetings(coalescer):
+    coalescer.add(["sarah@company.com", "john.doe@company.com"], "Weekly standup", "Budget is on track.",
+                  [{"task": "Send the budget", "owner": "Sarah", "deadline": "Friday", "due_date": "2026-10-16"}])
+    coalescer.add(["sarah@company.com"], "Client review", "Demo moved to March.",
+                  [{"task": "Fix the login bug", "owner": "John", "deadline": None}])
+
+
+def test_one_digest_per_recipient_in_one_backend_call():
+    mailbox = LocalMailbox()
+    coalescer = DigestCoalescer(mailbox, window_seconds=3600)
+    _queue_meetings(coalescer)
+
+    assert coalescer.flush() == {"sent": [], "backend_calls": 0}  # Nothing has waited an hour yet
+    report = coalescer.flush(force=True)
+
+    assert [(sent["to"], sent["meetings"]) for sent in report["sent"]] == [
+        ("john.doe@company.com", 1), ("sarah@company.com", 2)]
+    assert mailbox.batch_calls == 1
+    sarah = next(draft for draft in mailbox.drafts.values() if draft["to"] == "sarah@company.com")
+    assert sarah["subject"] == "Your meeting digest: 2 meetings"
+    assert "YOUR ACTION ITEMS:\n- Send the budget (Weekly standup, due 2026-10-16)" in sarah["body"]
+    assert coalescer.stats()["emails_saved"] == 1
+    assert coalescer.stats()["pending"] == 0
+
+
+def test_window_is_per_recipient_and_queue_survives_restarts(tmp_path):
+    path = str(tmp_path / "digests.db")
+    coalescer = DigestCoalescer(LocalMailbox(), window_seconds=0.05, db_path=path)
+    coalescer.add(["sarah@company.com"], "Standup", "Short one.", [])
+    time.sleep(0.1)
+    coalescer.add(["john@company.com"], "Standup", "Short one.", [])
+
+    assert coalescer.due() == ["sarah@company.com"]
+    assert DigestCoalescer(window_seconds=0.05, db_path=path).stats()["pending_recipients"] == 2
+
+
+def test_failed_send_keeps_the_queue():
+    class FailingMailbox(LocalMailbox):
+        def send_digests(self, digests):
+            raise RuntimeError("429 quota exceeded")
+
+    coalescer = DigestCoalescer(FailingMailbox(), window_seconds=0)
+    _queue_meetings(coalescer)
+    try:
+        coalescer.flush()
+    except RuntimeError:
+        pass
+
+    assert coalescer.stats()["pending"] == 3
+    assert owned_by("John Doe", "john.doe@company.com") and not owned_by("Ann", "joanne@company.com")
+    single = render_digest("ann@company.com", [{"meeting": "Standup", "summary": "ok", "items": [],
+                                                "queued_at": time.time()}])
+    assert single["subject"] == "Standup"
+
+
+def test_gmail_backend_keeps_the_queue_unless_the_run_completes():
+    failed = Obj(id="run-1", state="FAILED", outputs=Obj(step_outputs={}))
+    complete = Obj(id="run-2", state=Obj(value="COMPLETE"), outputs=Obj(step_outputs={
+        "$step_0_output": Obj(value={"id": "r-draft-1", "message": {"id": "m-1"}}),
+        "$step_1_output": Obj(value="Draft created. Draft ID: r-draft-2"),
+    }))
+    portia = StubPortia(failed, TimeoutError("gmail timed out"), complete)
+    backend = PortiaMailBackend(portia, ResilientCaller(max_retries=1, sleep=lambda s: None))
+    coalescer = DigestCoalescer(backend, window_seconds=0)
+    _queue_meetings(coalescer)
+
+    with pytest.raises(PlanRunFailed):
+        coalescer.flush()
+    assert coalescer.stats()["pending"] == 3
+    report = coalescer.flush()  # The timeout is retried by the resilient caller
+
+    assert [sent["draft_id"] for sent in report["sent"]] == ["r-draft-1", "r-draft-2"]
+    assert len(portia.queries) == 3 and coalescer.stats()["pending"] == 0
+
+
+def test_flush_timer_sends_on_start_and_keeps_ticking():
+    mailbox = LocalMailbox()
+    coalescer = DigestCoalescer(mailbox, window_seconds=0)
+    _queue_meetings(coalescer)
+
+    stop = start_flush_timer(coalescer.flush, interval_seconds=0.01)
+    try:
+        deadline = time.time() + 2
+        while coalescer.stats()["pending"] and time.time() < deadline:
+            time.sleep(0.01)
+        coalescer.add(["ann@company.com"], "Retro", "Went fine.", [])
+        while coalescer.stats()["pending"] and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+
+    assert coalescer.stats()["pending"] == 0
+    assert mailbox.batch_calls == 2
@@ -0,0 +1,54 @@
+import json
+
+from agent.emails import (extract_emails, is_valid_email, load_alias_directory,
+                          normalize_attendees, split_attendees)
+
+
+def test_normalize_dedupes_lowercases_and_reports_invalid():
+    valid, invalid = normalize_attendees([
+        " Sarah@Company.com ", "sarah@company.com", "Mike Lee <mike@company.com>", "not-an-email", "",
+    ])
+
+    assert valid == ["sarah@company.com", "mike@company.com"]
+    assert invalid == ["not-an-email"]
+
+
+def test_pipe_in_tld_is_rejected():
+    # The old [A-Z|a-z] character class accepted this
+    assert not is_valid_email("bob@company.c|m")
+    assert is_valid_email("bob@sub.company.co.uk")
+
+
+def test_aliases_expand_recursively_without_cycles():
+    aliases = {
+        "team@company.com": ["a@company.com", "leads@company.com"],
+        "leads@company.com": ["b@company.com", "team@company.com"],
+    }
+    valid, invalid = normalize_attendees(["team@company.com", "a@company.com"], aliases)
+
+    assert valid == ["a@company.com", "b@company.com"]
+    assert invalid == []
+
+
+def test_load_alias_directory_json_and_csv(tmp_path):
+    json_path = tmp_path / "aliases.json"
+    json_path.write_text(json.dumps({"Eng-All@company.com": ["a@company.com"]}))
+    csv_path = tmp_path / "aliases.csv"
+    csv_path.write_text("alias,member\nops@company.com,x@company.com\nops@company.com,y@company.com\n")
+
+    assert load_alias_directory(str(json_path)) == {"eng-all@company.com": ["a@company.com"]}
+    assert load_alias_directory(str(csv_path)) == {"ops@company.com": ["x@company.com", "y@company.com"]}
+
+
+def test_extract_and_split_helpers():
+    assert extract_emails("Ping Alex (alex@client.com) and ALEX@client.com, jen@client.com") == [
+        "alex@client.com", "jen@client.com"]
+    assert split_attendees("a@x.com, b@x.com;c@x.com\nd@x.com") == ["a@x.com", "b@x.com", "c@x.com", "d@x.com"]
+    assert split_attendees("Sarah Lee <s@x.com>, b@x.com") == ["Sarah Lee <s@x.com>", "b@x.com"]
+
+
+def test_normalize_scales_linearly():
+    addresses = [f"user{i % 50000}@company.com" for i in range(100000)]
+    valid, invalid = normalize_attendees(addresses)
+    assert len(valid) == 50000
+    assert invalid == []
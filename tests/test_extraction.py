@@ -0,0 +1,74 @@
+from agent.extraction import (extract_meeting_items, find_deadline, find_owner,
+                              format_condensed_notes, parse_meeting_context)
+
+standup_notes = """
+Date: today
+Attendees: sarah@company.com, John, Mike (mike@company.com)
+
+Sarah needs budget approval by Thursday for Project Phoenix.
+John will finalize the tech specs by EOD Friday.
+Mike is launching the marketing campaign next week.
+Decision: The product launch will be pushed to next month.
+Sarah to schedule a follow-up with the finance team ASAP.
+We spent a while chatting about the offsite.
+"""
+
+client_notes = """
+Client project review meeting
+Date: January 24, 2025
+Present: Alex Thompson (alex@techcorp.com), Jennifer Liu, our project team
+
+Decisions:
+- Demo date confirmed: March 15th, 2 PM
+- Additional developer allocated to Module B
+
+Action Items:
+- Demo environment setup: Tech team by March 10th
+- Module B timeline revision: Project manager by January 31st
+"""
+
+
+def test_find_deadline_phrases():
+    assert find_deadline("John will finalize the tech specs by EOD Friday.") == "EOD Friday"
+    assert find_deadline("- Budget approval: Sarah (Due: Thursday)") == "Thursday"
+    assert find_deadline("Send the timeline by the end of this week.") == "end of this week"
+    assert find_deadline("Prepare the demo by March 10th") == "March 10th"
+    assert find_deadline("We talked about Fridays in general") is None
+
+
+def test_find_owner_variants():
+    assert find_owner("John will finalize the tech specs by EOD Friday.") == "John"
+    assert find_owner("Sarah to schedule a follow-up with the finance team ASAP.") == "Sarah"
+    assert find_owner("- Demo environment setup: Tech team by March 10th") == "Tech team"
+    assert find_owner("- Budget approval: Sarah (Due: Thursday)") == "Sarah"
+
+
+def test_extract_standup_items():
+    extract = extract_meeting_items(standup_notes)
+    owners = [(item["owner"], item["deadline"]) for item in extract["action_items"]]
+
+    assert owners == [("Sarah", "Thursday"), ("John", "EOD Friday"), ("Mike", "next week"), ("Sarah", "ASAP")]
+    assert extract["decisions"] == ["The product launch will be pushed to next month."]
+    assert extract["emails"] == ["sarah@company.com", "mike@company.com"]
+
+
+def test_extract_sections():
+    extract = extract_meeting_items(client_notes)
+
+    assert [item["owner"] for item in extract["action_items"]] == ["Tech team", "Project manager"]
+    assert len(extract["decisions"]) == 2
+    assert extract["context"]["date"] == "January 24, 2025"
+    assert extract["context"]["title"] == "Client project review meeting"
+
+
+def test_parse_meeting_context_type():
+    assert parse_meeting_context("Weekly standup notes")["meeting_type"] == "Standup Meeting"
+
+
+def test_condensed_notes_drop_chatter():
+    condensed = format_condensed_notes(extract_meeting_items(standup_notes))
+
+    assert "Project Phoenix" in condensed
+    assert "owner: John; deadline: EOD Friday" in condensed
+    assert "offsite" not in condensed
+    assert len(condensed) < len(standup_notes) * 1.5
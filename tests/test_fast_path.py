@@ -0,0 +1,71 @@
+from datetime import date
+
+from agent.deadlines import DeadlineResolver, resolve_deadlines
+from agent.extraction import extract_meeting_items
+from agent.fast_path import FastPath, render_summary_email, score_extract
+
+STRUCTURED_NOTES = """Budget sync
+Date: October 14, 2026
+
+Action Items:
+Action: Sarah will send the budget report by Friday.
+Action: John to book the venue by October 30th.
+
+Decision: Keep the current vendor.
+"""
+
+LOOSE_NOTES = """Budget sync
+Talked through the numbers, mostly fine.
+Maybe push the offsite? Not sure who owns the venue.
+Action: someone should look at the venue by Friday.
+"""
+
+
+def _extract(notes):
+    extract = extract_meeting_items(notes)
+    resolve_deadlines(extract, DeadlineResolver(date(2026, 10, 14)))
+    return extract
+
+
+def test_structured_notes_are_fully_explained():
+    score = score_extract(STRUCTURED_NOTES, _extract(STRUCTURED_NOTES))
+
+    assert score["confidence"] == 1.0
+    assert score["reasons"] == []
+
+
+def test_loose_notes_escalate_with_reasons():
+    fast_path = FastPath(threshold=0.8)
+    loose = fast_path.route(LOOSE_NOTES, _extract(LOOSE_NOTES))
+    blocked = fast_path.route(STRUCTURED_NOTES, _extract(STRUCTURED_NOTES), ["calendar events need the agent"])
+    local = fast_path.route(STRUCTURED_NOTES, _extract(STRUCTURED_NOTES))
+
+    assert not loose["local"] and loose["confidence"] < 0.5
+    assert "1 open question(s)" in loose["reasons"]
+    assert not blocked["local"] and blocked["confidence"] == 1.0
+    assert local["local"]
+    stats = fast_path.stats()
+    assert (stats["runs"], stats["local"], stats["escalated"]) == (3, 1, 2)
+    assert stats["local_rate"] == 1 / 3
+    assert stats["escalation_reasons"]["calendar events need the agent"] == 1
+
+
+def test_summary_email_is_rendered_locally():
+    email = render_summary_email(_extract(STRUCTURED_NOTES), ["sarah@company.com", "john@company.com"],
+                                 "2026-10-14")
+
+    assert email.startswith("To: sarah@company.com, john@company.com\nSubject: Summary: Budget sync")
+    assert "(owner: Sarah, due 2026-10-16)" in email
+    assert "DECISIONS:\n- Keep the current vendor." in email
+
+
+def test_repeated_items_are_not_announced_as_new():
+    extract = _extract(STRUCTURED_NOTES)
+    extract["action_items"][0]["tracked"] = "duplicate"
+    extract["action_items"][1]["tracked"] = "updated"
+
+    email = render_summary_email(extract, ["sarah@company.com"], "2026-10-14")
+    new, tracked = email.split("ALREADY TRACKED (open from earlier meetings):")
+
+    assert "book the venue" in new and "send the budget report" not in new
+    assert "send the budget report" in tracked and "book the venue" not in tracked
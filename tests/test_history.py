@@ -0,0 +1,50 @@
+import time
+
+from agent.history import HistoryStore
+
+
+def make_store(**kwargs):
+    return HistoryStore(":memory:", **kwargs)
+
+
+def test_pages_are_newest_first_and_filterable_by_attendee():
+    history = make_store()
+    for i in range(25):
+        attendees = ["sarah@company.com"] if i % 2 else ["john@company.com"]
+        history.record(processing_time=1.0, input_length=i, success=True, attendees=attendees,
+                       plan_id=f"plan-{i}", created_at=1000 + i)
+
+    first = history.page(0, page_size=10)
+    assert [row["input_length"] for row in first] == list(range(24, 14, -1))
+    assert len(history.page(2, page_size=10)) == 5
+    assert history.count(attendee="Sarah@Company.com") == 12
+    assert all(row["input_length"] % 2 for row in history.page(0, 20, attendee="sarah@company.com"))
+    assert history.find_by_plan("plan-3")[0]["input_length"] == 3
+
+
+def test_stats_are_aggregated_in_sql():
+    history = make_store()
+    history.record(processing_time=2.0, input_length=100, success=True, cached=True)
+    history.record(processing_time=4.0, input_length=300, success=False, error="quota")
+
+    stats = history.stats()
+    assert stats["total"] == 2
+    assert stats["succeeded"] == 1
+    assert stats["cached"] == 1
+    assert stats["avg_processing_time"] == 3.0
+    assert stats["max_processing_time"] == 4.0
+    assert stats["success_rate"] == 0.5
+
+
+def test_retention_drops_old_and_excess_runs():
+    history = make_store(max_records=3, max_age_days=1, prune_every=1000)
+    run_id = history.record(processing_time=1, input_length=1, success=True, attendees=["a@b.com"],
+                            created_at=time.time() - 3 * 86400)
+    for i in range(5):
+        history.record(processing_time=1, input_length=i, success=True)
+
+    assert history.prune() == 3
+    assert history.count() == 3
+    assert history.get(run_id) is None
+    assert history.count(attendee="a@b.com") == 0
+    assert [row["input_length"] for row in history.page()] == [4, 3, 2]
@@ -0,0 +1,29 @@
+"""Guards against heavy imports creeping back onto the agent's startup path."""
+import subprocess
+import sys
+
+import pytest
+
+# Generous ceiling for slow CI machines; a local run is ~100 ms
+IMPORT_BUDGET_MS = 1000
+
+
+def _import_stats(module: str):
+    code = f"import sys, {module}; print(','.join(sorted(m.split('.')[0] for m in sys.modules)))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True)
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000.0, set(proc.stdout.strip().split(","))
+
+
+@pytest.mark.parametrize("module", ["agent.meeting_agent", "agent.utils"])
+def test_agent_modules_import_lazily(module):
+    elapsed_ms, loaded = _import_stats(module)
+
+    assert "portia" not in loaded
+    assert "pandas" not in loaded
+    assert elapsed_ms < IMPORT_BUDGET_MS
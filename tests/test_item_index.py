@@ -0,0 +1,72 @@
+import sqlite3
+
+from agent.item_index import ActionItemIndex, jaccard, shingles
+
+
+def _item(task, owner=None, deadline=None, due_date=None):
+    return {"task": task, "owner": owner, "deadline": deadline, "due_date": due_date}
+
+
+def test_reworded_items_match_and_other_owners_do_not():
+    index = ActionItemIndex()
+    index.record([_item("Sarah will send the budget report by Friday", "Sarah", "Friday", "2026-10-16"),
+                  _item("John will fix the login bug", "John")], source="week-1")
+
+    classified = index.classify([
+        _item("Sarah to send budget report by Friday", "sarah", "Friday", "2026-10-16"),
+        _item("John fixes the login bug by Monday", "John", "Monday", "2026-10-19"),
+        _item("Ann will fix the login bug", "Ann"),
+        _item("Mike will book the offsite venue", "Mike"),
+    ])
+
+    assert [entry["status"] for entry in classified] == ["duplicate", "updated", "new", "new"]
+    assert classified[0]["match"]["source"] == "week-1"
+    assert jaccard(shingles("john fixes login bug"), shingles("john to fix the login bug")) == 1.0
+    # classify() records nothing
+    assert index.stats()["open"] == 2
+
+
+def test_record_applies_updates_and_queries_open_items_per_owner():
+    index = ActionItemIndex()
+    index.record([_item("John will fix the login bug", "John"), _item("Write the release notes")])
+    counts = index.record([_item("John will fix the login bug by Monday", "John", "Monday", "2026-10-19"),
+                           _item("Ann will write the release notes", "Ann"),
+                           _item("John will fix the login bug", "John")])
+
+    assert counts == {"new": 0, "duplicate": 1, "updated": 2}
+    john = index.open_items("JOHN")
+    assert [(item["deadline"], item["occurrences"]) for item in john] == [("Monday", 3)]
+    assert [item["owner"] for item in index.open_items("ann")] == ["Ann"]
+    assert index.close(john[0]["id"]) is True
+    assert index.open_items("john") == []
+    assert index.match(_item("John will fix the login bug", "John")) is None
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    path = str(tmp_path / "items.db")
+    first = ActionItemIndex(path)
+    first.record([_item("Sarah will send the budget report", "Sarah"), _item("Mike will update the docs", "Mike")])
+    first.close(first.open_items("mike")[0]["id"])
+
+    reopened = ActionItemIndex(path)
+
+    assert [item["task"] for item in reopened.open_items()] == ["Sarah will send the budget report"]
+    tracked, similarity = reopened.match(_item("Sarah sends the budget report", "Sarah"))
+    assert tracked["owner"] == "Sarah" and similarity == 1.0
+
+
+def test_items_keep_their_event_and_expire_when_stale(tmp_path):
+    path = str(tmp_path / "items.db")
+    index = ActionItemIndex(path, max_age_days=30)
+    index.record([dict(_item("Sarah will send the budget report", "Sarah", "Friday"), event_id="evt-1"),
+                  _item("Mike will update the docs", "Mike")])
+    index.record([_item("Sarah will send the budget report by Monday", "Sarah", "Monday")])
+
+    assert index.classify([_item("Sarah sends the budget report", "Sarah")])[0]["match"]["event_id"] == "evt-1"
+    with sqlite3.connect(path) as db:  # Mike's item last came up two months ago
+        db.execute("UPDATE action_items SET last_seen = '2020-01-01T00:00:00' WHERE owner = 'Mike'")
+    reopened = ActionItemIndex(path, max_age_days=30)
+
+    assert [item["owner"] for item in reopened.open_items()] == ["Sarah"]
+    assert reopened.stats()["expired"] == 1
+    assert reopened.open_items()[0]["event_id"] == "evt-1"
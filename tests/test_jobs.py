@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+
+from agent.fake_backend import FakePortia
+from agent.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, process_job, run_worker
+from agent.meeting_agent import MeetingNotesAgent, agent_components_from_env
+from agent.scheduling import LocalCalendarBackend
+
+payload = {
+    "notes": "Sarah will send the budget by Friday.",
+    "attendees": ["sarah@company.com"],
+    "context": "",
+}
+
+
+def test_submit_claim_complete(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.submit(payload)
+
+    assert queue.get(job_id)["status"] == QUEUED
+    job = queue.claim("worker-1")
+    assert job["id"] == job_id
+    assert job["payload"] == payload
+    assert queue.get(job_id)["status"] == RUNNING
+    assert queue.claim("worker-2") is None
+
+    queue.complete(job_id, {"success": True, "summary": "done"})
+    stored = queue.get(job_id)
+    assert stored["status"] == SUCCEEDED
+    assert stored["result"]["summary"] == "done"
+    assert queue.stats()[SUCCEEDED] == 1
+
+
+def test_failed_job_retries_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), retry_backoff=0)
+    job_id = queue.submit(payload, max_attempts=2)
+
+    queue.claim("w")
+    assert queue.fail(job_id, "429 quota") == QUEUED
+    assert queue.claim("w")["attempts"] == 2
+    assert queue.fail(job_id, "429 quota") == FAILED
+    assert queue.claim("w") is None
+    assert queue.get(job_id)["error"] == "429 quota"
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=-1)
+    job_id = queue.submit(payload)
+
+    queue.claim("crashed-worker")
+    job = queue.claim("worker-2")
+
+    assert job["id"] == job_id
+    assert queue.get(job_id)["worker"] == "worker-2"
+
+
+def test_validation_errors_are_not_retried(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), retry_backoff=0)
+    job_id = queue.submit({"notes": "", "attendees": ["sarah@company.com"]})
+    agent = MeetingNotesAgent(portia=FakePortia())
+
+    assert process_job(queue, queue.claim("w"), agent) == FAILED
+    assert queue.get(job_id)["attempts"] == 1
+
+
+def test_worker_drains_queue_with_fake_backend(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path)
+    ids = [queue.submit(payload) for _ in range(3)]
+
+    processed = run_worker(db_path, poll_interval=0, agent=MeetingNotesAgent(portia=FakePortia()))
+
+    assert processed == 3
+    assert all(queue.get(job_id)["status"] == SUCCEEDED for job_id in ids)
+    assert "FAKE BACKEND" in queue.get(ids[0])["result"]["summary"]
+
+
+def test_only_the_lease_holder_records_the_outcome(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=60)
+    job_id = queue.submit(payload)
+    stale = queue.claim("worker-1")
+    lease = queue.get(job_id)["lease_expires_at"]
+
+    assert queue.set_progress(job_id, "Still running", "worker-1")
+    assert queue.get(job_id)["lease_expires_at"] >= lease
+    with sqlite3.connect(str(tmp_path / "jobs.db")) as db:  # The lease lapses and worker-2 takes over
+        db.execute("UPDATE jobs SET lease_expires_at = 0 WHERE id = ?", (job_id,))
+    queue.claim("worker-2")
+
+    assert not queue.set_progress(job_id, "Still running", stale["worker"])
+    assert not queue.complete(job_id, {"summary": "late"}, stale["worker"])
+    assert queue.fail(job_id, "timeout", worker=stale["worker"]) == RUNNING
+    assert queue.complete(job_id, {"summary": "done"}, "worker-2")
+    assert queue.get(job_id)["result"] == {"summary": "done"}
+
+
+def test_lease_is_renewed_while_the_agent_runs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.15)
+    job_id = queue.submit(payload)
+    agent = MeetingNotesAgent(portia=FakePortia(llm_latency=0.2))
+
+    job = queue.claim("w")
+    worker = threading.Thread(target=process_job, args=(queue, job, agent))
+    worker.start()
+    time.sleep(0.25)  # Past the original lease, mid-run
+
+    assert queue.claim("other") is None
+    worker.join()
+    assert queue.get(job_id)["status"] == SUCCEEDED
+
+
+def test_workers_build_the_same_agent_as_the_app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CALENDAR_BACKEND", "local")
+    monkeypatch.setenv("EMAIL_DIGEST_WINDOW_MINUTES", "60")
+
+    components = agent_components_from_env()
+
+    assert isinstance(components["scheduler"].backend, LocalCalendarBackend)
+    assert components["digests"] is not None and components["cache"] is not None
+    assert (tmp_path / "revisions.db").exists() and (tmp_path / "digests.db").exists()
+    assert components["item_index"] is None and not (tmp_path / "action_items.db").exists()
@@ -0,0 +1,63 @@
+import pytest
+
+from agent.models import ActionItem, AgentResult, CalendarEvent, RunOutput
+
+
+def make_result():
+    result = AgentResult(
+        success=True,
+        summary="Budget due Friday.",
+        plan_id="plan-1",
+        prompt_mode="condensed",
+        action_items=[ActionItem("Send budget", "Sarah", "Friday")],
+        decisions=["Launch moves to next month"],
+        events=[CalendarEvent("Send budget (Sarah)", "Friday", "Sarah", "local-1")],
+        timings={"execute": 12.5},
+    )
+    result["index"] = 3
+    return result
+
+
+def test_json_round_trip_keeps_types():
+    restored = AgentResult.from_json(make_result().to_json())
+
+    assert restored == make_result()
+    assert isinstance(restored.action_items[0], ActionItem)
+    assert restored.extra == {"index": 3}
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    result = make_result()
+
+    assert AgentResult.from_msgpack(result.to_msgpack()) == result
+
+
+def test_dict_style_access_for_existing_callers():
+    result = make_result()
+    failure = AgentResult.failure("quota", "Failed to process meeting notes: quota", retryable=False)
+
+    assert result["success"] is True
+    assert result["result"] == RunOutput("plan-1", "Budget due Friday.")
+    assert result["result"].outputs.final_output == "Budget due Friday."
+    assert result.get("calendar") is None
+    assert failure["result"] == "Failed to process meeting notes: quota"
+    assert failure.to_dict()["summary"] == failure.message
+    assert failure["retryable"] is False
+
+
+def test_agent_run_returns_plain_typed_result():
+    import json
+
+    from agent.fake_backend import FakePortia
+    from agent.meeting_agent import MeetingNotesAgent
+
+    agent = MeetingNotesAgent(portia=FakePortia())
+    result = agent.run_agent("John will finalize the specs by Friday.", ["john@company.com"])
+
+    assert isinstance(result, AgentResult)
+    due = agent.deadline_resolver().resolve("Friday")["date"]
+    assert result.action_items == [ActionItem("John will finalize the specs by Friday.", "John", "Friday",
+                                              "John will finalize the specs by Friday.", due)]
+    assert result.email_draft is None  # The agent's drafts live in Gmail
+    assert json.loads(result.to_json())["plan_id"] == "fake-run-1"
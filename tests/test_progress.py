@@ -0,0 +1,90 @@
+import contextvars
+import threading
+
+from agent.fake_backend import FakePortia
+from agent.progress import ProgressEvents, ProgressMetrics, attach_progress_hooks, describe_event
+from agent.tracing import Tracer
+
+
+class Hooks:
+    pass
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _run(progress, tracer, portia, name):
+    with tracer.span("agent.run") as root:
+        progress.emit("run_started", root["trace_id"], name=name)
+        portia.run("notes", tools=["portia:google:gmail:draft_email", "portia:google:gcalendar:create_event"])
+        progress.emit("run_finished", root["trace_id"])
+
+
+def test_listener_sees_only_its_own_run_step_by_step():
+    progress, tracer = ProgressEvents(), Tracer()
+    portia = FakePortia(tool_latency=0.01, execution_hooks=attach_progress_hooks(Hooks(), progress, tracer))
+    everything = progress.subscribe()
+
+    with progress.listen() as events:
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(_run, progress, tracer, portia, "mine"))
+        worker.start()
+        worker.join()
+    _run(progress, tracer, portia, "other")
+
+    mine = [events.get_nowait() for _ in range(events.qsize())]
+    assert [event["type"] for event in mine] == [
+        "run_started", "plan_created", "step_started", "tool_finished", "step_finished",
+        "step_started", "tool_finished", "step_finished", "run_finished"]
+    assert mine[0]["name"] == "mine" and len({event["trace_id"] for event in mine}) == 1
+    assert mine[3]["tool"] == "portia:google:gmail:draft_email" and mine[3]["latency_ms"] >= 10
+    assert mine[5]["step"] == 1 and mine[5]["total"] == 2
+    assert mine[-1]["elapsed_ms"] >= mine[1]["elapsed_ms"]
+    assert everything.qsize() == 18
+    assert describe_event(mine[2]) == "▶️ Step 1/2: portia:google:gmail:draft_email" + \
+        f" ({mine[2]['elapsed_ms'] / 1000:.1f}s)"
+
+
+def test_clarifications_are_reported():
+    class ClarifyingHooks:
+        def before_tool_call(self, tool, args, plan_run, step):
+            return Obj(user_guidance="Which calendar should I use?")
+
+    progress, tracer = ProgressEvents(), Tracer()
+    hooks = attach_progress_hooks(ClarifyingHooks(), progress, tracer)
+    plan_run = Obj(id="run-1", state="NEED_CLARIFICATION",
+                   get_outstanding_clarifications=lambda: [Obj(user_guidance="Confirm the attendees")])
+
+    with progress.listen() as events:
+        clarification = hooks.before_tool_call(Obj(id="gcalendar"), {}, plan_run, Obj(task="create event"))
+        hooks.after_plan_run(Obj(id="plan-1", steps=[]), plan_run, None)
+
+    assert clarification.user_guidance == "Which calendar should I use?"
+    guidance = [events.get_nowait()["guidance"] for _ in range(events.qsize())]
+    assert guidance == ["Which calendar should I use?", "Confirm the attendees"]
+
+
+def test_metrics_aggregate_latency_and_live_steps():
+    progress, tracer = ProgressEvents(), Tracer()
+    metrics = ProgressMetrics(progress)
+    portia = FakePortia(tool_latency=0.01, execution_hooks=attach_progress_hooks(Hooks(), progress, tracer))
+    for _ in range(3):
+        _run(progress, tracer, portia, "run")
+    progress.emit("run_started", "trace-slow")
+    progress.emit("step_started", "trace-slow", plan_run_id="run-x", step=0, name="draft_email", total=1)
+    metrics.wait()
+
+    stats = metrics.stats()
+    assert stats["latency"]["tool:portia:google:gmail:draft_email"]["count"] == 3
+    assert stats["latency"]["step:portia:google:gcalendar:create_event"]["p95_ms"] >= 10
+    assert stats["latency"]["first_feedback"]["count"] == 4
+    assert stats["latency"]["run"]["count"] == 3
+    assert [step["name"] for step in metrics.running()] == ["draft_email"]
+
+    tiny = progress.subscribe(maxsize=1)
+    progress.emit("run_finished", "trace-slow")
+    progress.emit("run_finished", "trace-slow")
+    metrics.wait()
+    assert progress.dropped == 1 and tiny.qsize() == 1
+    assert metrics.running() == []
@@ -0,0 +1,173 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from agent.fake_backend import FakeBackendError, FakePortia
+from agent.meeting_agent import MeetingNotesAgent
+from agent.resilience import (CircuitBreaker, CircuitOpenError, RateLimitTimeout, ResilientCaller, TokenBucket,
+                              is_retryable)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_reports_wait_when_empty():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.1
+
+
+def test_token_bucket_is_shared_through_sqlite(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first = TokenBucket(rate=0.001, capacity=1, db_path=path)
+    second = TokenBucket(rate=0.001, capacity=1, db_path=path)
+
+    assert first.reserve() == 0
+    assert second.reserve() > 0
+
+
+def test_shared_reservations_close_their_connection(tmp_path, monkeypatch):
+    path = str(tmp_path / "limits.db")
+    bucket = TokenBucket(rate=1, db_path=path)
+    connections = []
+    connect = bucket._connect
+    monkeypatch.setattr(bucket, "_connect", lambda: connections.append(connect()) or connections[-1])
+
+    bucket.reserve()
+    with sqlite3.connect(path) as db:
+        db.execute("DELETE FROM token_buckets")
+    with pytest.raises(TypeError):
+        bucket.reserve()  # No bucket row: fails inside the transaction
+
+    assert len(connections) == 2
+    for db in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute("SELECT 1")  # Closed, so no other process waits on a leaked write lock
+    other = sqlite3.connect(path, timeout=0, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("ROLLBACK")
+    other.close()
+
+
+def test_retries_retryable_errors_with_backoff():
+    sleeps = []
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeBackendError("429 Resource has been exhausted")
+        return "ok"
+
+    caller = ResilientCaller(max_retries=3, base_delay=1, sleep=sleeps.append, seed=1)
+
+    assert caller.call(flaky) == "ok"
+    assert len(sleeps) == 2 and all(0 <= s <= 2 for s in sleeps)
+    assert caller.stats()["retries"] == 2
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    caller = ResilientCaller(sleep=lambda s: None)
+
+    with pytest.raises(ValueError):
+        caller.call(lambda: (_ for _ in ()).throw(ValueError("OAuth required for google")))
+    assert caller.stats()["retries"] == 0
+    assert not is_retryable(ValueError("OAuth required for google"))
+
+
+def test_circuit_opens_then_half_opens_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    caller = ResilientCaller(breaker=breaker, max_retries=0, sleep=lambda s: None)
+
+    def down():
+        raise FakeBackendError("503 unavailable")
+
+    for _ in range(2):
+        with pytest.raises(FakeBackendError):
+            caller.call(down)
+    with pytest.raises(CircuitOpenError):
+        caller.call(down)
+
+    clock.now = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert caller.call(lambda: "recovered") == "recovered"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert caller.stats()["short_circuited"] == 1
+
+
+def _half_open_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_non_retryable_error_in_half_open_frees_the_trial():
+    breaker = _half_open_breaker()
+    caller = ResilientCaller(breaker=breaker, sleep=lambda s: None)
+
+    with pytest.raises(ValueError):
+        caller.call(lambda: (_ for _ in ()).throw(ValueError("OAuth required for google")))
+
+    assert breaker.state == CircuitBreaker.CLOSED  # The upstream answered
+    assert caller.call(lambda: "ok") == "ok"
+
+
+def test_rate_limit_timeout_does_not_take_the_trial():
+    breaker = _half_open_breaker()
+    limiter = TokenBucket(rate=0.001, capacity=1)
+    limiter.reserve()
+    caller = ResilientCaller(limiter=limiter, breaker=breaker, acquire_timeout=0, sleep=lambda s: None)
+
+    with pytest.raises(RateLimitTimeout):
+        caller.call(lambda: "never called")
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()  # The trial slot is still free
+
+
+def test_cancelled_trial_is_released():
+    breaker = _half_open_breaker()
+    caller = ResilientCaller(breaker=breaker, sleep=lambda s: None)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def cancel_trial():
+        task = asyncio.create_task(caller.acall(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert caller.call(lambda: "recovered") == "recovered"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_agent_falls_back_to_local_extraction_when_upstream_is_down():
+    caller = ResilientCaller(breaker=CircuitBreaker(failure_threshold=1), max_retries=1, sleep=lambda s: None)
+    fake = FakePortia(failure_rate=1.0)
+    agent = MeetingNotesAgent(portia=fake, resilience=caller)
+
+    first = agent.run_agent("John will finalize the specs by Friday.", ["john@company.com"])
+    second = agent.run_agent("Sarah will send the budget by Monday.", ["sarah@company.com"])
+
+    assert first["success"] is True and first["fallback"] is True
+    assert first.action_items[0].owner == "John"
+    assert fake.calls == 1  # The second run never reached the upstream
+    assert "circuit breaker open" in second["degraded_reason"]
+    assert caller.stats()["fallbacks"] == 2
@@ -0,0 +1,46 @@
+from agent.revisions import RevisionStore, diff_action_items, extract_incrementally, split_sections
+
+
+def test_split_sections_keeps_headers_with_their_bullets():
+    notes = "Weekly sync\n\nAction items:\n\n- Sarah: budget by Friday\n- John: specs\n\n\n  Wrap up  "
+
+    assert split_sections(notes) == [
+        "Weekly sync",
+        "Action items:\n- Sarah: budget by Friday\n- John: specs",
+        "Wrap up",
+    ]
+
+
+def test_unchanged_sections_reuse_previous_extract():
+    notes = "Sarah will send the budget by Friday.\n\nJohn will review the specs by Monday."
+    _, sections, changed = extract_incrementally(notes)
+    _, _, changed_again = extract_incrementally(notes + "\n\nMike will book the room by Tuesday.", sections)
+
+    assert len(changed) == 2
+    assert changed_again == ["Mike will book the room by Tuesday."]
+
+
+def test_diff_detects_created_updated_and_cancelled_items():
+    before = [
+        {"task": "John will review the specs by Monday.", "owner": "John", "deadline": "Monday"},
+        {"task": "Sarah will send the budget.", "owner": "Sarah", "deadline": None},
+    ]
+    after = [
+        {"task": "John will review the specs by Tuesday.", "owner": "John", "deadline": "Tuesday"},
+        {"task": "Mike will book the room.", "owner": "Mike", "deadline": None},
+    ]
+
+    delta = diff_action_items(before, after)
+
+    assert [item["task"] for item in delta["created"]] == ["Mike will book the room."]
+    assert delta["updated"][0]["previous"] == {"owner": "John", "deadline": "Monday"}
+    assert [item["task"] for item in delta["cancelled"]] == ["Sarah will send the budget."]
+
+
+def test_revision_store_versions(tmp_path):
+    store = RevisionStore(str(tmp_path / "revisions.db"))
+    assert store.get("m1") is None
+
+    assert store.save("m1", "notes", {}, [], {}, "plan-1", "summary") == 1
+    assert store.save("m1", "notes v2", {}, [], {}, "plan-2", "summary 2") == 2
+    assert RevisionStore(str(tmp_path / "revisions.db")).get("m1")["notes"] == "notes v2"
@@ -0,0 +1,103 @@
+import pytest
+
+from agent.digests import MailBackend
+from agent.extraction import extract_meeting_items
+from agent.meeting_agent import MeetingNotesAgent
+from agent.scheduling import (BulkEventScheduler, CalendarBackend, IdempotencyIndex, LocalCalendarBackend,
+                              PortiaCalendarBackend, item_fingerprint)
+
+notes = """
+Sarah needs budget approval by Thursday for Project Phoenix.
+John will finalize the tech specs by EOD Friday.
+Mike mentioned the office plants look great.
+Action: Our team needs to prepare the demo environment by March 10th.
+"""
+attendees = ["sarah@company.com", "john@company.com"]
+
+
+def test_deadline_items_created_in_one_batch():
+    backend = LocalCalendarBackend()
+    scheduler = BulkEventScheduler(backend)
+
+    result = scheduler.schedule(notes, extract_meeting_items(notes)["action_items"], attendees)
+
+    assert len(result["created"]) == 3
+    assert result["backend_calls"] == 1
+    assert backend.batch_calls == 1
+    assert len(backend.events) == 3
+
+
+def test_rerun_skips_existing_events(tmp_path):
+    index_path = str(tmp_path / "index.db")
+    backend = LocalCalendarBackend(str(tmp_path / "calendar.json"))
+    items = extract_meeting_items(notes)["action_items"]
+
+    first = BulkEventScheduler(backend, IdempotencyIndex(index_path)).schedule(notes, items, attendees)
+    # A fresh scheduler over the same index behaves like a process restart
+    second = BulkEventScheduler(backend, IdempotencyIndex(index_path)).schedule("  " + notes, items, attendees)
+
+    assert second["created"] == []
+    assert second["backend_calls"] == 0
+    assert {e["event_id"] for e in second["skipped"]} == {e["event_id"] for e in first["created"]}
+    assert backend.batch_calls == 1
+    assert len(LocalCalendarBackend(str(tmp_path / "calendar.json")).events) == 3
+
+
+def test_item_fingerprint_ignores_punctuation_and_case():
+    a = {"task": "Send the deck.", "owner": "Sarah"}
+    b = {"task": "send the deck", "owner": "sarah"}
+    assert item_fingerprint(a) == item_fingerprint(b)
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class CalendarPortia:
+    """Answers every run with one completed step per reported event id."""
+
+    def __init__(self):
+        self.runs = []
+
+    def run(self, query, end_user=None, tools=None):
+        self.runs.append((query, tools))
+        reported = [f"Event created with id: gcal{len(self.runs)}x{i}" for i in range(2)]
+        return Obj(id=f"run-{len(self.runs)}", state="COMPLETE", outputs=Obj(
+            step_outputs={f"$step_{i}_output": Obj(value=value) for i, value in enumerate(reported)}))
+
+
+def test_google_backend_uses_the_reported_event_ids():
+    portia = CalendarPortia()
+    scheduler = BulkEventScheduler()
+    agent = MeetingNotesAgent(portia=portia, scheduler=scheduler)
+    items = extract_meeting_items(notes)["action_items"]
+
+    first = scheduler.reconcile({}, items, attendees)
+    moved = [dict(item, task=item["task"].replace(item["deadline"], "next Monday"), deadline="next Monday")
+             if item["owner"] == "Sarah" else item for item in items[:2]]
+    delta = scheduler.reconcile(first["events"], moved, attendees)
+
+    assert isinstance(scheduler.backend, PortiaCalendarBackend) and scheduler.backend._client() is agent.portia
+    # The third event was created but reported no id: it is kept, but cannot be cancelled
+    assert [event["event_id"] for event in first["created"]] == ["gcal1x0", "gcal1x1", ""]
+    assert [tools for _, tools in portia.runs] == [[PortiaCalendarBackend.TOOL_ID],
+                                                   [PortiaCalendarBackend.MODIFY_TOOL_ID]]
+    assert "Event gcal1x0 -> " in portia.runs[1][0]
+    assert len(delta["updated"]) == 1 and len(delta["cancelled"]) == 1
+    assert scheduler.schedule(notes, items, attendees)["backend_calls"] == 1
+    assert scheduler.schedule(notes, items, attendees)["backend_calls"] == 0
+
+
+def test_incomplete_backends_fail_when_constructed():
+    class CreateOnly(CalendarBackend):
+        def create_events(self, events):
+            return []
+
+    class NoMail(MailBackend):
+        pass
+
+    with pytest.raises(TypeError, match="cancel_events"):
+        CreateOnly()
+    with pytest.raises(TypeError, match="send_digests"):
+        NoMail()
@@ -0,0 +1,38 @@
+from agent.streaming import ActionItemMerger, split_into_segments, stream_extraction
+
+
+def _long_transcript(repeats: int = 40) -> str:
+    chatter = "Everyone chatted about the weather and weekend plans for a bit.\n" * 10
+    items = "\n".join(f"Person{i} will send report {i} by Friday." for i in range(repeats))
+    return chatter + items + "\n" + chatter + "John will finalize the tech specs by EOD Friday.\n"
+
+
+def test_segments_respect_size_and_overlap():
+    notes = "\n".join(f"line {i:03d}" for i in range(100))
+    segments = list(split_into_segments(notes, max_chars=100, overlap_lines=2))
+
+    assert len(segments) > 1
+    assert all(len(segment) <= 100 for segment in segments)
+    # The last two lines of each segment open the next one
+    for current, following in zip(segments, segments[1:]):
+        assert following.splitlines()[:2] == current.splitlines()[-2:]
+
+
+def test_merger_dedupes_and_fills_missing_fields():
+    merger = ActionItemMerger()
+    first = merger.add({"action_items": [{"task": "Send the deck.", "owner": None, "deadline": None}]})
+    second = merger.add({"action_items": [{"task": "send the deck", "owner": "Sarah", "deadline": "Friday"}]})
+
+    assert len(first["action_items"]) == 1
+    assert second["action_items"] == []
+    assert merger.action_items == [{"task": "Send the deck.", "owner": "Sarah", "deadline": "Friday"}]
+
+
+def test_stream_extraction_is_incremental_and_complete():
+    events = list(stream_extraction(_long_transcript(), max_chars=500, overlap_lines=2))
+    merged = events[-1]["merged"]
+
+    assert len(events) > 3
+    assert len(merged["action_items"]) == 41
+    assert sum(len(event["new_action_items"]) for event in events) == 41
+    assert merged["action_items"][-1]["owner"] == "John"
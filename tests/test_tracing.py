@@ -0,0 +1,72 @@
+import json
+
+from agent.tracing import Tracer, attach_tracing_hooks, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_nested_spans_share_trace_and_link_parents():
+    tracer = Tracer()
+    with tracer.span("agent.run") as root:
+        with tracer.span("validate") as child:
+            pass
+
+    assert child["trace_id"] == root["trace_id"]
+    assert child["parent_span_id"] == root["span_id"]
+    assert set(tracer.timings(root["trace_id"])) == {"agent.run", "validate"}
+
+
+def test_errors_are_recorded_and_counted():
+    tracer = Tracer()
+    try:
+        with tracer.span("execute"):
+            raise RuntimeError("quota exceeded")
+    except RuntimeError:
+        pass
+
+    stats = tracer.stats()["execute"]
+    assert stats["count"] == 1
+    assert stats["errors"] == 1
+    assert tracer.spans()[0]["attributes"]["error"] == "quota exceeded"
+
+
+def test_otlp_export_is_json_serializable(tmp_path):
+    tracer = Tracer()
+    with tracer.span("agent.run", mode="sync"):
+        pass
+
+    otlp = json.loads(json.dumps(tracer.to_otlp_json()))
+    spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert spans[0]["name"] == "agent.run"
+    assert tracer.export_jsonl(str(tmp_path / "spans.jsonl")) == 1
+
+
+def test_hooks_record_planning_and_tool_spans():
+    class Hooks:
+        before_plan_run = None
+        before_tool_call = None
+        after_tool_call = None
+
+    class Obj:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    tracer = Tracer()
+    hooks = attach_tracing_hooks(Hooks(), tracer)
+    plan, plan_run, step = Obj(id="plan-1", steps=[1, 2]), Obj(id="run-1"), Obj(task="create event")
+    tool = Obj(id="portia:google:gcalendar:create_event")
+
+    with tracer.span("execute") as execute:
+        hooks.before_plan_run(plan, plan_run)
+        hooks.before_tool_call(tool, {}, plan_run, step)
+        hooks.after_tool_call(tool, "ok", plan_run, step)
+
+    timings = tracer.timings(execute["trace_id"])
+    assert "planning" in timings
+    assert "tool:portia:google:gcalendar:create_event" in timings
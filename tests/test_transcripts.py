@@ -0,0 +1,79 @@
+import io
+
+from agent.transcripts import clean_transcript, detect_format, iter_blocks, iter_transcript_lines
+
+VTT = """WEBVTT
+Kind: captions
+
+NOTE exported by the
+meeting recorder
+
+1
+00:00:01.000 --> 00:00:04.000 align:start
+<v Sarah Lee>I will send the budget by Friday.</v>
+
+intro
+00:00:04.000 --> 00:00:06.000
+<v Sarah Lee>I will send the budget by Friday.</v>
+
+00:00:06.000 --> 00:00:09.000
+<c.yellow>John</c>: Mail <i>me</i> at <john@company.com>
+about the launch
+"""
+
+SRT = "1\r\n00:00:01,000 --> 00:00:02,000\r\nSPEAKER_01: Action: Mike will fix the bug.\r\n\r\n2\r\n00:00:02,000 --> 00:00:03,000\r\n- Ann: Sounds good\r\n"
+
+
+def test_vtt_cues_timestamps_and_speakers_are_stripped(tmp_path):
+    path = tmp_path / "standup.vtt"
+    path.write_text(VTT)
+
+    lines = list(iter_transcript_lines(str(path)))
+
+    assert lines == ["I will send the budget by Friday.", "Mail me at <john@company.com>", "about the launch"]
+    assert list(iter_transcript_lines(str(path), keep_speakers=True))[:2] == [
+        "Sarah Lee: I will send the budget by Friday.", "John: Mail me at <john@company.com>"]
+    # Streams cut into small blocks give the same result as the memory-mapped file
+    assert list(iter_transcript_lines(io.BytesIO(VTT.encode()), fmt="vtt", block_bytes=32)) == lines
+
+
+def test_srt_and_plain_text_transcripts():
+    assert list(iter_transcript_lines(io.BytesIO(SRT.encode()), fmt="srt")) == [
+        "Action: Mike will fix the bug.", "Sounds good"]
+    text = b"[00:00:01] Speaker 1: hello\n9:30 standup\n00:01:02 - John will review the spec\n- Sarah: notes\n"
+    assert list(iter_transcript_lines(io.BytesIO(text))) == [
+        "hello", "9:30 standup", "John will review the spec", "- Sarah: notes"]
+    assert detect_format("call.SRT") == "srt"
+    assert detect_format(None, "WEBVTT") == "vtt"
+
+
+def test_clean_transcript_caps_kept_text(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_text("".join(f"Line {i}: Sarah will send report {i}.\n" for i in range(5000)))
+
+    result = clean_transcript(str(path), max_chars=1000)
+
+    assert result["truncated"] is True
+    assert len(result["text"]) <= 1000
+    assert result["text"].startswith("Line 0: Sarah will send report 0.")
+    empty = tmp_path / "empty.vtt"
+    empty.touch()
+    assert clean_transcript(str(empty)) == {"text": "", "lines": 0, "truncated": False}
+
+
+def test_text_without_line_breaks_is_cut_into_bounded_blocks(tmp_path):
+    data = "Sarah will send the café budget report. ".encode() * 5000  # One 200 KB line
+    path = tmp_path / "one-line.txt"
+    path.write_bytes(data)
+
+    for source in (io.BytesIO(data), str(path)):
+        blocks = list(iter_blocks(source, block_bytes=1024))
+        assert max(len(block) for block in blocks) <= 5 * 1024
+        assert b"".join(blocks) == data
+        assert all(block.decode("utf-8") for block in blocks)  # No character split across blocks
+
+
+def test_a_line_longer_than_the_cap_keeps_its_prefix():
+    result = clean_transcript(io.BytesIO(b"x" * 5000 + b"\nsecond line\n"), fmt="txt", max_chars=1000)
+
+    assert result == {"text": "x" * 1000, "lines": 1, "truncated": True}